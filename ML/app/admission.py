@@ -0,0 +1,224 @@
+import os
+import math
+import time
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import Dict, Any, Optional, AsyncIterator
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------- Config ---------------------------------- #
+
+# Admission control for /recommend (interactive lane) and /recommend/batch (bulk lane)
+ADMISSION_CONTROL = os.getenv("ADMISSION_CONTROL", "1").strip().lower() in {"1", "true", "yes", "on"}
+# Interactive lane: requests running at once, waiting at most, and how long one may wait
+INTERACTIVE_MAX_CONCURRENT = int(os.getenv("INTERACTIVE_MAX_CONCURRENT", "32") or 32)
+INTERACTIVE_MAX_QUEUE = int(os.getenv("INTERACTIVE_MAX_QUEUE", "64") or 64)
+INTERACTIVE_MAX_WAIT_MS = float(os.getenv("INTERACTIVE_MAX_WAIT_MS", "1000") or 1000)
+# Interactive latency objective: above it (recent EWMA) bulk work is deferred
+INTERACTIVE_SLO_MS = float(os.getenv("INTERACTIVE_SLO_MS", "500") or 500)
+# Above this EWMA, requests that would have to queue are shed at once (0 = never)
+INTERACTIVE_SHED_LATENCY_MS = float(os.getenv("INTERACTIVE_SHED_LATENCY_MS", "2000") or 0)
+# Bulk lane: batches running at once, waiting at most, and how long one may wait
+BULK_MAX_CONCURRENT = int(os.getenv("BULK_MAX_CONCURRENT", "2") or 2)
+BULK_MAX_QUEUE = int(os.getenv("BULK_MAX_QUEUE", "8") or 8)
+BULK_MAX_WAIT_MS = float(os.getenv("BULK_MAX_WAIT_MS", "10000") or 10000)
+# Longest a running batch pauses between students for interactive traffic
+BULK_MAX_DEFER_MS = float(os.getenv("BULK_MAX_DEFER_MS", "5000") or 5000)
+# Weight of the newest latency in the EWMAs
+ADMISSION_EWMA_ALPHA = float(os.getenv("ADMISSION_EWMA_ALPHA", "0.2") or 0.2)
+# A latency EWMA older than this no longer counts as congestion
+ADMISSION_LATENCY_WINDOW_S = 10.0
+
+INTERACTIVE = "interactive"
+BULK = "bulk"
+
+# ----------------------------- Lanes ---------------------------------- #
+
+class Overloaded(Exception):
+    """Request shed by admission control; `retry_after` is a suggested wait in seconds."""
+
+    def __init__(self, lane: str, reason: str, retry_after: int) -> None:
+        super().__init__(f"{lane} lane overloaded ({reason})")
+        self.lane = lane
+        self.reason = reason
+        self.retry_after = retry_after
+
+class Lane:
+    """Concurrency limit, bounded wait queue and latency EWMA for one class of traffic."""
+
+    def __init__(self, name: str, max_concurrent: int, max_queue: int, max_wait_ms: float,
+                 shed_latency_ms: float = 0.0) -> None:
+        self.name = name
+        self.max_concurrent = max(1, int(max_concurrent))
+        self.max_queue = max(0, int(max_queue))
+        self.max_wait_ms = max(0.0, float(max_wait_ms))
+        self.shed_latency_ms = float(shed_latency_ms)
+        self.in_flight = 0
+        self.waiting = 0
+        self.latency_ewma_ms: Optional[float] = None
+        self.last_done = 0.0
+        self.admitted = 0
+        self.queued = 0
+        self.shed: Dict[str, int] = {}
+
+    def recent_latency_ms(self) -> float:
+        if self.latency_ewma_ms is None or time.monotonic() - self.last_done > ADMISSION_LATENCY_WINDOW_S:
+            return 0.0
+        return self.latency_ewma_ms
+
+    def retry_after(self) -> int:
+        """Seconds until the current backlog has likely drained (1-30)."""
+        per_request_s = (self.latency_ewma_ms or 1000.0) / 1000.0
+        backlog = (self.waiting + self.in_flight) / self.max_concurrent
+        return int(min(30, max(1, math.ceil(per_request_s * backlog))))
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "latency_ewma_ms": round(self.latency_ewma_ms, 1) if self.latency_ewma_ms is not None else None,
+            "admitted": self.admitted,
+            "queued": self.queued,
+            "shed": dict(self.shed),
+        }
+
+# --------------------------- Controller ------------------------------- #
+
+class AdmissionController:
+    """
+    Per-worker admission for two priority lanes. A request starts when its
+    lane has a free slot, otherwise it waits in the lane's bounded queue
+    for at most max_wait; a full queue, a timed-out wait, or a lane whose
+    latency EWMA is above its shed threshold rejects it (Overloaded ->
+    503 with Retry-After) instead of letting the backlog grow.
+
+    The bulk lane yields to the interactive one: no batch starts, and
+    running batches pause between students (defer()), while interactive
+    requests are queueing or their recent latency is above
+    INTERACTIVE_SLO_MS. All state lives on the event loop; no locks.
+    """
+
+    def __init__(
+        self,
+        interactive: Optional[Lane] = None,
+        bulk: Optional[Lane] = None,
+        slo_ms: float = INTERACTIVE_SLO_MS,
+        alpha: float = ADMISSION_EWMA_ALPHA,
+        enabled: bool = ADMISSION_CONTROL,
+    ) -> None:
+        self.lanes: Dict[str, Lane] = {
+            INTERACTIVE: interactive or Lane(INTERACTIVE, INTERACTIVE_MAX_CONCURRENT, INTERACTIVE_MAX_QUEUE,
+                                             INTERACTIVE_MAX_WAIT_MS, INTERACTIVE_SHED_LATENCY_MS),
+            BULK: bulk or Lane(BULK, BULK_MAX_CONCURRENT, BULK_MAX_QUEUE, BULK_MAX_WAIT_MS),
+        }
+        self.slo_ms = slo_ms
+        self.alpha = alpha
+        self.enabled = enabled
+        self.deferrals = 0
+        self._changed: Optional[asyncio.Condition] = None  # created on the serving loop
+
+    def _condition(self) -> asyncio.Condition:
+        if self._changed is None:
+            self._changed = asyncio.Condition()
+        return self._changed
+
+    def interactive_congested(self) -> bool:
+        lane = self.lanes[INTERACTIVE]
+        return lane.waiting > 0 or lane.recent_latency_ms() > self.slo_ms
+
+    def _can_start(self, lane: Lane) -> bool:
+        if lane.in_flight >= lane.max_concurrent:
+            return False
+        return lane.name != BULK or not self.interactive_congested()
+
+    def _shed(self, lane: Lane, reason: str) -> Overloaded:
+        lane.shed[reason] = lane.shed.get(reason, 0) + 1
+        logger.warning("Shedding %s request (%s): in_flight=%d waiting=%d ewma=%s",
+                       lane.name, reason, lane.in_flight, lane.waiting, lane.latency_ewma_ms)
+        return Overloaded(lane.name, reason, lane.retry_after())
+
+    async def _acquire(self, lane: Lane) -> None:
+        if lane.waiting == 0 and self._can_start(lane):
+            lane.in_flight += 1
+            return
+        if lane.shed_latency_ms > 0 and lane.recent_latency_ms() > lane.shed_latency_ms:
+            raise self._shed(lane, "latency")
+        if lane.waiting >= lane.max_queue:
+            raise self._shed(lane, "queue_full")
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + lane.max_wait_ms / 1000.0
+        changed = self._condition()
+        lane.waiting += 1
+        lane.queued += 1
+        try:
+            async with changed:
+                while not self._can_start(lane):
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        raise self._shed(lane, "queue_timeout")
+                    # wake periodically too: congestion also ends by the latency window expiring
+                    try:
+                        await asyncio.wait_for(changed.wait(), min(remaining, 0.25))
+                    except asyncio.TimeoutError:
+                        pass
+                lane.in_flight += 1
+        finally:
+            lane.waiting -= 1
+
+    async def _release(self, lane: Lane, elapsed_ms: float) -> None:
+        lane.in_flight -= 1
+        lane.latency_ewma_ms = (elapsed_ms if lane.latency_ewma_ms is None
+                                else self.alpha * elapsed_ms + (1.0 - self.alpha) * lane.latency_ewma_ms)
+        lane.last_done = time.monotonic()
+        changed = self._condition()
+        async with changed:
+            changed.notify_all()
+
+    @asynccontextmanager
+    async def admit(self, lane_name: str) -> AsyncIterator[None]:
+        """Hold a slot in `lane_name` for the body; raises Overloaded when shed."""
+        if not self.enabled:
+            yield
+            return
+        lane = self.lanes[lane_name]
+        start = time.perf_counter()
+        await self._acquire(lane)
+        lane.admitted += 1
+        try:
+            yield
+        finally:
+            # queue wait included: the EWMA tracks what clients see
+            await self._release(lane, (time.perf_counter() - start) * 1000.0)
+
+    async def defer(self) -> float:
+        """
+        Called by bulk work between units (students): wait while interactive
+        traffic is congested, at most BULK_MAX_DEFER_MS. Returns ms waited.
+        """
+        if not self.enabled or not self.interactive_congested():
+            return 0.0
+        self.deferrals += 1
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        deadline = start + BULK_MAX_DEFER_MS / 1000.0
+        changed = self._condition()
+        async with changed:
+            while self.interactive_congested() and loop.time() < deadline:
+                try:
+                    await asyncio.wait_for(changed.wait(), min(deadline - loop.time(), 0.25))
+                except asyncio.TimeoutError:
+                    pass
+        return (loop.time() - start) * 1000.0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "interactive_slo_ms": self.slo_ms,
+            "interactive_congested": self.interactive_congested(),
+            "bulk_deferrals": self.deferrals,
+            "lanes": {name: lane.snapshot() for name, lane in self.lanes.items()},
+        }
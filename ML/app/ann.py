@@ -0,0 +1,180 @@
+import os
+import json
+import logging
+import argparse
+import threading
+from typing import List, Optional, Iterable, Set
+
+import numpy as np
+
+from app.preprocessing import normalize_work_mode
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------- Config ---------------------------------- #
+
+# Directory written by `python -m app.ann build`
+ANN_INDEX_DIR = os.getenv("ANN_INDEX_DIR", "")
+# How many nationwide remote/hybrid candidates to merge into the geo shortlist
+ANN_CANDIDATES = int(os.getenv("ANN_CANDIDATES", "50"))
+
+PLANES_FILE = "planes.npy"
+KEYS_FILE = "keys.npy"
+ROWS_FILE = "rows.npy"
+META_FILE = "meta.json"
+
+ANN_WORK_MODES = ("remote", "hybrid")
+
+# ----------------------------- Index ---------------------------------- #
+
+class LSHIndex:
+    """
+    Random-projection LSH over unit-normalized embedding rows (cosine).
+    Each of `tables` hash tables keys a row by the sign bits of `bits`
+    random hyperplanes; rows are stored sorted by key so a bucket lookup
+    is two searchsorted calls. Queries probe the exact bucket plus every
+    1-bit neighbour, then rerank the union exactly against the vectors.
+    """
+
+    def __init__(self, planes: np.ndarray, keys: np.ndarray, rows: np.ndarray, vectors: np.ndarray) -> None:
+        self.planes = planes      # (tables, bits, dim) float32
+        self.keys = keys          # (tables, n) uint32, sorted per table
+        self.rows = rows          # (tables, n) int64, embedding rows in key order
+        self.vectors = vectors    # (count, dim) float32 embedding store
+        self.tables, self.bits, self.dim = planes.shape
+        self._weights = (1 << np.arange(self.bits, dtype=np.uint32)).astype(np.uint32)
+
+    def _hash(self, vecs: np.ndarray) -> np.ndarray:
+        """Bucket keys for vecs (m, dim) in every table -> (tables, m) uint32."""
+        signs = np.einsum("tbd,md->tmb", self.planes, vecs) > 0
+        return (signs.astype(np.uint32) * self._weights).sum(axis=2, dtype=np.uint32)
+
+    @classmethod
+    def build(
+        cls,
+        vectors: np.ndarray,
+        rows: Iterable[int],
+        tables: int = 8,
+        bits: int = 16,
+        seed: int = 13,
+    ) -> "LSHIndex":
+        rows = np.asarray(list(rows), dtype=np.int64)
+        dim = vectors.shape[1]
+        planes = np.random.default_rng(seed).standard_normal((tables, bits, dim)).astype(np.float32)
+        index = cls(planes, np.empty((tables, 0), np.uint32), np.empty((tables, 0), np.int64), vectors)
+        keys = np.empty((tables, rows.size), dtype=np.uint32)
+        for start in range(0, rows.size, 65536):
+            chunk = rows[start:start + 65536]
+            keys[:, start:start + chunk.size] = index._hash(np.asarray(vectors[chunk], dtype=np.float32))
+        order = np.argsort(keys, axis=1, kind="stable")
+        index.keys = np.take_along_axis(keys, order, axis=1)
+        index.rows = rows[order]
+        return index
+
+    def save(self, path: str, store_path: str) -> None:
+        os.makedirs(path, exist_ok=True)
+        np.save(os.path.join(path, PLANES_FILE), self.planes)
+        np.save(os.path.join(path, KEYS_FILE), self.keys)
+        np.save(os.path.join(path, ROWS_FILE), self.rows)
+        with open(os.path.join(path, META_FILE), "w", encoding="utf-8") as f:
+            json.dump({"tables": self.tables, "bits": self.bits, "dim": self.dim,
+                       "count": int(self.rows.shape[1]), "embeddings": os.path.abspath(store_path)}, f)
+
+    @classmethod
+    def load(cls, path: str, vectors: np.ndarray) -> "LSHIndex":
+        planes = np.load(os.path.join(path, PLANES_FILE))
+        keys = np.load(os.path.join(path, KEYS_FILE), mmap_mode="r")
+        rows = np.load(os.path.join(path, ROWS_FILE), mmap_mode="r")
+        return cls(planes, keys, rows, vectors)
+
+    def query(self, vec: np.ndarray, k: int, exclude_rows: Optional[Set[int]] = None) -> List[int]:
+        """Top-k embedding rows by cosine among probed buckets."""
+        q = np.asarray(vec, dtype=np.float32).reshape(1, -1)
+        base = self._hash(q)[:, 0]
+        flips = np.concatenate([[0], self._weights]).astype(np.uint32)
+        parts: List[np.ndarray] = []
+        for t in range(self.tables):
+            keys_t = self.keys[t]
+            probes = np.bitwise_xor(base[t], flips)
+            lo = np.searchsorted(keys_t, probes, side="left")
+            counts = np.searchsorted(keys_t, probes, side="right") - lo
+            total = int(counts.sum())
+            if total:
+                # positions lo[i]..lo[i]+counts[i]-1 for every probe, without a Python loop
+                starts = np.repeat(lo - np.cumsum(counts) + counts, counts)
+                parts.append(np.asarray(self.rows[t])[starts + np.arange(total)])
+        if not parts:
+            return []
+        cands = np.unique(np.concatenate(parts))
+        if exclude_rows:
+            cands = cands[~np.isin(cands, np.fromiter(exclude_rows, dtype=np.int64))]
+        if cands.size == 0:
+            return []
+        sims = np.asarray(self.vectors[cands], dtype=np.float32) @ q[0]
+        if cands.size > k:
+            top = np.argpartition(-sims, k - 1)[:k]
+        else:
+            top = np.arange(cands.size)
+        top = top[np.argsort(-sims[top], kind="stable")]
+        return [int(r) for r in cands[top]]
+
+# --------------------------- Global access ---------------------------- #
+
+_index_lock = threading.Lock()
+_index: Optional[LSHIndex] = None
+_index_failed = False
+
+def get_ann_index() -> Optional[LSHIndex]:
+    """Process-wide LSH index over the embedding store (None if unavailable)."""
+    global _index, _index_failed
+    if _index is not None or _index_failed or not ANN_INDEX_DIR:
+        return _index
+    from app.embeddings import get_embedding_matcher
+
+    with _index_lock:
+        if _index is None and not _index_failed:
+            try:
+                matcher = get_embedding_matcher()
+                if matcher is None:
+                    raise RuntimeError("ANN index needs EMBEDDING_INDEX_DIR")
+                _index = LSHIndex.load(ANN_INDEX_DIR, matcher.store.vectors)
+                logger.info("Loaded ANN index from %s (%d rows)", ANN_INDEX_DIR, _index.rows.shape[1])
+            except Exception as e:
+                _index_failed = True
+                logger.error("Failed to load ANN index from %s: %s", ANN_INDEX_DIR, e)
+    return _index
+
+# ------------------------------ CLI ----------------------------------- #
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from app.embeddings import EmbeddingStore, EMBEDDING_INDEX_DIR
+    from app.snapshot import iter_catalog_documents
+
+    parser = argparse.ArgumentParser(prog="python -m app.ann", description="Nationwide remote/hybrid ANN index")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="Build the LSH index over remote/hybrid internship embeddings")
+    build.add_argument("--out", default=ANN_INDEX_DIR, help="Output dir (default: $ANN_INDEX_DIR)")
+    build.add_argument("--embeddings", default=EMBEDDING_INDEX_DIR, help="Embedding store dir")
+    build.add_argument("--snapshot", default=None, help="Read work modes from a snapshot root instead of MongoDB")
+    build.add_argument("--tables", type=int, default=8)
+    build.add_argument("--bits", type=int, default=16)
+    args = parser.parse_args(argv)
+
+    if not args.out or not args.embeddings:
+        parser.error("--out and --embeddings (or ANN_INDEX_DIR / EMBEDDING_INDEX_DIR) are required")
+
+    store = EmbeddingStore(args.embeddings)
+    rows: List[int] = []
+    for doc in iter_catalog_documents(args.snapshot):
+        mode = normalize_work_mode(doc.get("work_mode") or (doc.get("preference") or {}).get("work_mode", ""))
+        row = store.row(doc.get("id"))
+        if mode in ANN_WORK_MODES and row is not None:
+            rows.append(row)
+    index = LSHIndex.build(store.vectors, rows, tables=args.tables, bits=args.bits)
+    index.save(args.out, args.embeddings)
+    print(f"indexed {len(rows)} remote/hybrid internships into {args.out}")
+    return 0
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    raise SystemExit(main())
@@ -0,0 +1,135 @@
+import os
+import time
+import logging
+import threading
+from collections import deque
+from typing import Deque, Dict, Any, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------- Config ---------------------------------- #
+
+DB_BREAKER_WINDOW_SECONDS = float(os.getenv("DB_BREAKER_WINDOW_SECONDS", "30") or 30)
+DB_BREAKER_MIN_CALLS = int(os.getenv("DB_BREAKER_MIN_CALLS", "5") or 5)
+DB_BREAKER_ERROR_RATE = float(os.getenv("DB_BREAKER_ERROR_RATE", "0.5") or 0.5)
+DB_BREAKER_SLOW_CALL_MS = float(os.getenv("DB_BREAKER_SLOW_CALL_MS", "2000") or 2000)
+DB_BREAKER_SLOW_RATE = float(os.getenv("DB_BREAKER_SLOW_RATE", "0.5") or 0.5)
+DB_BREAKER_OPEN_SECONDS = float(os.getenv("DB_BREAKER_OPEN_SECONDS", "15") or 15)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# ---------------------------- Breaker --------------------------------- #
+
+class CircuitBreaker:
+    """
+    Error-rate + latency circuit breaker over a sliding time window.
+
+    closed    -> calls pass; trips to open once the window holds at least
+                 `min_calls` outcomes and either the error rate or the share
+                 of calls slower than `slow_call_ms` reaches its threshold.
+    open      -> `allow()` is False until `open_seconds` have passed.
+    half_open -> one trial call passes (another once `open_seconds` pass
+                 without its outcome); its recorded outcome closes the
+                 breaker (success) or re-opens it (failure or slow call).
+    """
+
+    def __init__(
+        self,
+        name: str = "db",
+        window_seconds: float = DB_BREAKER_WINDOW_SECONDS,
+        min_calls: int = DB_BREAKER_MIN_CALLS,
+        error_rate: float = DB_BREAKER_ERROR_RATE,
+        slow_call_ms: float = DB_BREAKER_SLOW_CALL_MS,
+        slow_rate: float = DB_BREAKER_SLOW_RATE,
+        open_seconds: float = DB_BREAKER_OPEN_SECONDS,
+    ) -> None:
+        self.name = name
+        self.window_seconds = window_seconds
+        self.min_calls = max(1, int(min_calls))
+        self.error_rate = error_rate
+        self.slow_call_ms = slow_call_ms
+        self.slow_rate = slow_rate
+        self.open_seconds = open_seconds
+        self._lock = threading.Lock()
+        self._calls: Deque[Tuple[float, bool, bool]] = deque()  # (ts, failed, slow)
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._trial_started: Optional[float] = None  # half-open trial call in flight
+        self._trips = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state(time.monotonic())
+
+    def _current_state(self, now: float) -> str:
+        if self._state == OPEN and now - self._opened_at >= self.open_seconds:
+            self._state = HALF_OPEN
+            self._trial_started = None
+            logger.info("Circuit %s half-open; allowing a trial call", self.name)
+        return self._state
+
+    def allow(self) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            state = self._current_state(now)
+            if state != HALF_OPEN:
+                return state == CLOSED
+            if self._trial_started is not None and now - self._trial_started < self.open_seconds:
+                return False
+            self._trial_started = now
+            return True
+
+    def record(self, ok: bool, latency_ms: float) -> None:
+        now = time.monotonic()
+        slow = latency_ms >= self.slow_call_ms
+        with self._lock:
+            state = self._current_state(now)
+            if state == HALF_OPEN:
+                self._trial_started = None
+                if ok and not slow:
+                    self._state = CLOSED
+                    self._calls.clear()
+                    logger.info("Circuit %s closed", self.name)
+                else:
+                    self._open(now, "trial call failed" if not ok else "trial call slow")
+                return
+            if state == OPEN:
+                return
+
+            self._calls.append((now, not ok, slow))
+            cutoff = now - self.window_seconds
+            while self._calls and self._calls[0][0] < cutoff:
+                self._calls.popleft()
+            n = len(self._calls)
+            if n < self.min_calls:
+                return
+            failures = sum(1 for _, failed, _ in self._calls if failed)
+            slow_calls = sum(1 for _, _, s in self._calls if s)
+            if failures / n >= self.error_rate:
+                self._open(now, f"error rate {failures}/{n}")
+            elif slow_calls / n >= self.slow_rate:
+                self._open(now, f"slow calls {slow_calls}/{n} >= {self.slow_call_ms:.0f}ms")
+
+    def _open(self, now: float, reason: str) -> None:
+        self._state = OPEN
+        self._opened_at = now
+        self._trips += 1
+        self._calls.clear()
+        logger.warning("Circuit %s opened (%s); failing fast for %.0fs", self.name, reason, self.open_seconds)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            now = time.monotonic()
+            state = self._current_state(now)
+            n = len(self._calls)
+            return {
+                "state": state,
+                "trips": self._trips,
+                "window_calls": n,
+                "window_failures": sum(1 for _, failed, _ in self._calls if failed),
+                "window_slow_calls": sum(1 for _, _, s in self._calls if s),
+                "retry_in_seconds": round(max(0.0, self.open_seconds - (now - self._opened_at)), 1) if state == OPEN else 0.0,
+            }
@@ -1,13 +1,274 @@
 import os
+import time
 import logging
-from typing import List, Dict, Any, Optional
+import json
+import argparse
+import threading
+from typing import List, Dict, Any, Optional, Tuple, Callable, TYPE_CHECKING
 
-from pymongo import MongoClient, ASCENDING, DESCENDING, GEOSPHERE, TEXT
-from pymongo.collection import Collection
-from pymongo.errors import ConnectionFailure, OperationFailure
-from pymongo.server_api import ServerApi
+from app.preprocessing import normalize_text, normalize_skills, normalize_work_mode, normalize_duration_months
+from app.diagnostics import get_query_recorder
+from app.breaker import CircuitBreaker, OPEN
+from app.utils import LazyStr
+
+# pymongo is imported on first connect/index build to keep service import fast
+if TYPE_CHECKING:
+    from pymongo import MongoClient
+    from pymongo.collection import Collection
 
 logger = logging.getLogger(__name__)
+# per-query result lines; sampled by default (config "log_sampling")
+query_logger = logging.getLogger(f"{__name__}.query")
+
+
+def normalize_values(values: Any) -> List[str]:
+    """Normalized, de-duplicated, sorted values (stable `$in` lists)."""
+    if isinstance(values, str):
+        values = [values]
+    return sorted({n for n in (normalize_text(v) for v in (values or []) if v) if n})
+
+
+# ------------------------- Canonical match fields --------------------- #
+
+# Normalized copies of the fields the nearest filter matches on. They are
+# written next to the originals (which keep the casing they were entered
+# with) by insert_internship(s), and backfilled on older documents with
+# `python -m app.database backfill`. Legacy fields are folded in:
+# `preference.work_mode` into work_mode_norm, `duration.months` into
+# duration_months (taken the way preprocess_internship does), so each
+# preference is one equality or range on one field.
+MATCH_FIELDS: Tuple[str, ...] = ("sector_norm", "job_role_norm", "work_mode_norm", "skills_norm", "duration_months")
+
+
+def _norm_field(value: Any) -> Any:
+    """normalize_text for a string; normalize_values for a list (array fields stay arrays)."""
+    if isinstance(value, list):
+        return normalize_values(value)
+    return normalize_text(value) if isinstance(value, str) else ""
+
+
+def canonical_match_fields(doc: Dict[str, Any]) -> Dict[str, Any]:
+    """The MATCH_FIELDS values for a raw internship document."""
+    legacy = doc.get("preference")
+    work_mode = normalize_work_mode(doc.get("work_mode") or doc.get("mode") or "")
+    if not work_mode and isinstance(legacy, dict):
+        work_mode = normalize_work_mode(legacy.get("work_mode") or "")
+    skills = doc.get("skills")
+    return {
+        "sector_norm": _norm_field(doc.get("sector")),
+        "job_role_norm": _norm_field(doc.get("job_role")),
+        "work_mode_norm": work_mode,
+        "skills_norm": sorted(set(normalize_skills(skills if isinstance(skills, list) else [skills]))),
+        "duration_months": normalize_duration_months(doc.get("duration", doc.get("duration_months", 0))),
+    }
+
+
+def preference_match_values(preference: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    A recommend preference normalized the way canonical_match_fields
+    normalizes documents. Shared by every backend's nearest filter.
+    """
+    pref = preference or {}
+    skills = pref.get("skills") or []
+    md = pref.get("min_duration_months")
+    return {
+        "sectors": normalize_values([pref.get("sector")] + list(pref.get("preferred_sectors") or [])),
+        "roles": normalize_values(pref.get("preferred_job_roles")),
+        "skills": sorted(set(normalize_skills([skills] if isinstance(skills, str) else list(skills)))),
+        "work_mode": normalize_work_mode(pref.get("work_mode") or ""),
+        "min_months": int(md) if isinstance(md, (int, float)) and md > 0 else 0,
+    }
+
+
+def build_nearest_filter(
+    user_lat: float,
+    user_lon: float,
+    preference: Optional[Dict[str, Any]] = None,
+    geo_field: str = "location_point_exact",
+    max_distance_km: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Filter document for the nearest-internships query. Preference values are
+    matched exactly against the canonical MATCH_FIELDS (no regexes), and
+    keys always appear in index order:
+
+        {<geo_field>: {"$near": ...},
+         "sector_norm": {"$in": [...]},         # sector + preferred_sectors
+         "job_role_norm": {"$in": [...]},
+         "work_mode_norm": m,
+         "duration_months": {"$gte": d},
+         "skills_norm": {"$in": [...]}}
+
+    Absent preferences drop their key. There are no `$or` groups: legacy
+    field shapes are folded into the canonical fields on write. `$in`
+    lists are sorted so equal preferences always produce the same document.
+    """
+    near_clause: Dict[str, Any] = {
+        "$geometry": {"type": "Point", "coordinates": [float(user_lon), float(user_lat)]}
+    }
+    if max_distance_km is not None:
+        near_clause["$maxDistance"] = int(max(0, max_distance_km)) * 1000
+    query: Dict[str, Any] = {geo_field: {"$near": near_clause}}
+
+    match = preference_match_values(preference)
+    if match["sectors"]:
+        query["sector_norm"] = {"$in": match["sectors"]}
+    if match["roles"]:
+        query["job_role_norm"] = {"$in": match["roles"]}
+    if match["work_mode"]:
+        query["work_mode_norm"] = match["work_mode"]
+    if match["min_months"]:
+        query["duration_months"] = {"$gte": match["min_months"]}
+    if match["skills"]:
+        query["skills_norm"] = {"$in": match["skills"]}
+    return query
+
+
+def nearest_filter_predicate(preference: Optional[Dict[str, Any]] = None) -> Callable[[Dict[str, Any]], bool]:
+    """
+    In-memory twin of build_nearest_filter without the geo clause: a
+    predicate over raw (unpreprocessed) documents applying the same exact
+    matches, for callers that filter already-fetched candidates. Documents
+    without the MATCH_FIELDS get them computed. Array fields match when any
+    element matches, as they do in MongoDB.
+    """
+    match = preference_match_values(preference)
+    sectors, roles, skills = set(match["sectors"]), set(match["roles"]), set(match["skills"])
+    work_mode = match["work_mode"]
+    min_months = match["min_months"]
+
+    def _any(value: Any, wanted: set) -> bool:
+        values = value if isinstance(value, list) else [value]
+        return any(isinstance(v, str) and v in wanted for v in values)
+
+    def accept(doc: Dict[str, Any]) -> bool:
+        fields = doc if all(f in doc for f in MATCH_FIELDS) else canonical_match_fields(doc)
+        if sectors and not _any(fields.get("sector_norm"), sectors):
+            return False
+        if roles and not _any(fields.get("job_role_norm"), roles):
+            return False
+        if work_mode and fields.get("work_mode_norm") != work_mode:
+            return False
+        if skills and not _any(fields.get("skills_norm"), skills):
+            return False
+        if min_months and not fields.get("duration_months", 0) >= min_months:
+            return False
+        return True
+
+    return accept
+
+
+# --------------------------- Projections ------------------------------ #
+
+# Full documents: every field the recommender and API responses use
+DOCUMENT_PROJECTION: Dict[str, Any] = {
+    "_id": 0,
+    "id": 1,
+    "title": 1,
+    "description": 1,
+    "sector": 1,
+    "skills": 1,
+    "interests": 1,
+    "job_role": 1,
+    "qualification": 1,
+    "location": 1,
+    "location_point_exact": 1,
+    "location_point_city": 1,
+    "duration": 1,
+    "duration_months": 1,
+    "expected_salary": 1,
+    "stipend": 1,
+    "compensation": 1,
+    "additional_support": 1,
+    "work_mode": 1,
+    "preference.work_mode": 1,  # legacy
+    "geo": 1,
+    "created_at": 1,
+    "posted_at": 1,
+    "createdAt": 1,
+}
+
+# Shortlist documents: only what scoring and the tie-breakers read. No
+# description, no GeoJSON points (distance uses location.lat/lon), and only
+# the monthly figure of compensation. Winners are re-read with
+# DOCUMENT_PROJECTION via find_internships_by_ids.
+SCORING_PROJECTION: Dict[str, Any] = {
+    "_id": 0,
+    "id": 1,
+    "title": 1,
+    "sector": 1,
+    "skills": 1,
+    "interests": 1,
+    "job_role": 1,
+    "qualification": 1,
+    "location.lat": 1,
+    "location.lon": 1,
+    "location.city": 1,
+    "duration": 1,
+    "duration_months": 1,
+    "expected_salary": 1,
+    "stipend": 1,
+    "compensation.monthly": 1,
+    "additional_support": 1,
+    "work_mode": 1,
+    "preference.work_mode": 1,  # legacy
+    "created_at": 1,
+    "posted_at": 1,
+    "createdAt": 1,
+    # canonical match fields, for in-memory filtering (nearest_filter_predicate)
+    "sector_norm": 1,
+    "job_role_norm": 1,
+    "work_mode_norm": 1,
+    "skills_norm": 1,
+}
+
+# ---------------------------- Indexes --------------------------------- #
+
+# Declarative index set for the internships collection. Key directions are
+# pymongo's literal values (1 / -1 / "2dsphere" / "text") so this module
+# does not import pymongo. The compound geo indexes follow the recommend
+# filter built by build_nearest_filter: geo first, then the canonical
+# equality/range fields, so $near candidates are filtered on index keys
+# instead of after a FETCH. `skills_norm` is left out on purpose: it is an
+# array and would make the geo index multikey (one entry per skill).
+# Changing an index's keys means a new name (ensure_indexes skips existing
+# names); the old name goes to SUPERSEDED_INDEXES.
+INDEX_SPECS: List[Dict[str, Any]] = [
+    {
+        "name": "idx_geo_exact_match",
+        "keys": [("location_point_exact", "2dsphere"), ("sector_norm", 1), ("job_role_norm", 1),
+                 ("work_mode_norm", 1), ("duration_months", 1)],
+    },
+    {
+        "name": "idx_geo_city_match",
+        "keys": [("location_point_city", "2dsphere"), ("sector_norm", 1), ("job_role_norm", 1),
+                 ("work_mode_norm", 1), ("duration_months", 1)],
+    },
+    {
+        "name": "idx_text_all",  # only one text index per collection
+        "keys": [("title", "text"), ("description", "text"), ("skills", "text"),
+                 ("interests", "text"), ("sector", "text"), ("job_role", "text")],
+        "options": {"default_language": "english"},
+        "optional": True,
+    },
+    {"name": "idx_sector_role_salary_norm", "keys": [("sector_norm", 1), ("job_role_norm", 1), ("expected_salary", -1)]},
+    {"name": "idx_skills", "keys": [("skills", 1)]},
+    {"name": "idx_id", "keys": [("id", 1)]},
+    {"name": "idx_created_at", "keys": [("created_at", -1)]},
+    {"name": "idx_posted_at", "keys": [("posted_at", -1)]},
+    {"name": "idx_createdAt_legacy", "keys": [("createdAt", -1)]},
+]
+
+# Replaced by INDEX_SPECS entries: the standalone geo indexes (same leading
+# field) and the compounds over the raw, unnormalized fields
+SUPERSEDED_INDEXES: Tuple[str, ...] = (
+    "idx_geo_exact", "idx_geo_city",
+    "idx_geo_exact_filters", "idx_geo_city_filters", "idx_sector_role_salary",
+)
+
+
+class DatabaseUnavailableError(RuntimeError):
+    """Raised instead of waiting on MongoDB when a query fails or the circuit is open."""
 
 
 class DatabaseManager:
@@ -20,12 +281,18 @@ class DatabaseManager:
         self.db_name = os.getenv("MONGODB_DB", "project_1")
         self.collection_name = os.getenv("MONGODB_COLLECTION", "internship_data")
 
-        self.client: Optional[MongoClient] = None
+        self.client: Optional["MongoClient"] = None
         self.db = None
-        self.internships_collection: Optional[Collection] = None
+        self.internships_collection: Optional["Collection"] = None
+        self.index_build_status: Dict[str, Any] = {"state": "idle"}
+        self.breaker = CircuitBreaker("mongodb")
 
     def connect(self) -> bool:
         """Establish connection to MongoDB."""
+        from pymongo import MongoClient
+        from pymongo.errors import ConnectionFailure
+        from pymongo.server_api import ServerApi
+
         try:
             # ServerApi('1') works for Atlas; harmless for community server
             self.client = MongoClient(
@@ -44,79 +311,180 @@ class DatabaseManager:
             return True
         except ConnectionFailure as e:
             logger.error("Failed to connect to MongoDB: %s", e)
+            self._reset_client()
             return False
         except Exception as e:
             logger.error("Unexpected error connecting to MongoDB: %s", e)
+            self._reset_client()
             return False
 
-    def ensure_indexes(self) -> bool:
-        """Create necessary indexes for efficient queries."""
+    def _reset_client(self) -> None:
+        if self.client is not None:
+            self.client.close()
+        self.client = None
+        self.db = None
+        self.internships_collection = None
+
+    def ensure_connected(self) -> bool:
+        """
+        Connect once (pymongo reconnects on its own afterwards). Fails fast
+        while the circuit is open; connect failures count against it.
+        """
+        if self.internships_collection is not None:
+            return True
+        if not self.breaker.allow():
+            return False
+        start = time.perf_counter()
+        ok = self.connect()
+        self.breaker.record(ok, (time.perf_counter() - start) * 1000.0)
+        return ok
+
+    def is_degraded(self) -> bool:
+        """True while the circuit breaker is open (callers should serve fallbacks)."""
+        return self.breaker.state == OPEN
+
+    def ensure_indexes(self, drop_superseded: bool = False) -> bool:
+        """
+        Create every index in INDEX_SPECS (existing ones are left alone).
+        Superseded indexes are only dropped when `drop_superseded` is set.
+        Progress is published in `index_build_status`.
+        """
+        from pymongo.errors import OperationFailure
+
         if self.internships_collection is None:
             logger.error("No collection available for index creation")
             return False
 
+        col = self.internships_collection
+        status = self.index_build_status
+        status.update(state="running", started_at=time.time(), finished_at=None, error=None,
+                      current=None, completed=[], total=len(INDEX_SPECS))
         try:
-            col = self.internships_collection
-
-            # Geospatial indexes (GeoJSON expects lon,lat and GEOSPHERE)
-            try:
-                col.create_index([("location_point_exact", GEOSPHERE)], name="idx_geo_exact")
-            except OperationFailure as e:
-                if "IndexOptionsConflict" in str(e):
-                    logger.info("Geospatial index for location_point_exact already exists")
+            existing = col.index_information()
+            for spec in INDEX_SPECS:
+                name = spec["name"]
+                status["current"] = name
+                if name in existing:
+                    logger.info("Index %s already exists", name)
                 else:
-                    raise
-            try:
-                col.create_index([("location_point_city", GEOSPHERE)], name="idx_geo_city")
-            except OperationFailure as e:
-                if "IndexOptionsConflict" in str(e):
-                    logger.info("Geospatial index for location_point_city already exists")
-                else:
-                    raise
-            logger.info("Ensured geospatial indexes")
-
-            # Text index for search fields (single combined text index)
-            # Note: only one text index per collection in MongoDB
-            try:
-                col.create_index(
-                    [
-                        ("title", TEXT),
-                        ("description", TEXT),
-                        ("skills", TEXT),
-                        ("interests", TEXT),
-                        ("sector", TEXT),
-                        ("job_role", TEXT),
-                    ],
-                    name="idx_text_all",
-                    default_language="english",
-                )
-                logger.info("Ensured text index")
-            except OperationFailure as te:
-                logger.warning("Text index ensure warning: %s", te)
-
-            # Compound indexes for common filters/sorts
-            col.create_index([("sector", ASCENDING), ("job_role", ASCENDING), ("expected_salary", DESCENDING)],
-                             name="idx_sector_role_salary")
-            col.create_index([("created_at", DESCENDING)], name="idx_created_at")
-            col.create_index([("posted_at", DESCENDING)], name="idx_posted_at")
-            col.create_index([("createdAt", DESCENDING)], name="idx_createdAt_legacy")
-
+                    start = time.time()
+                    try:
+                        col.create_index(list(spec["keys"]), name=name, **spec.get("options", {}))
+                        logger.info("Built index %s in %.1fs", name, time.time() - start)
+                    except OperationFailure as e:
+                        # same keys under another name, or an option mismatch: report and carry on
+                        if "IndexOptionsConflict" in str(e) or "IndexKeySpecsConflict" in str(e):
+                            logger.warning("Index %s conflicts with an existing index: %s", name, e)
+                        elif spec.get("optional"):
+                            logger.warning("Optional index %s not created: %s", name, e)
+                        else:
+                            raise
+                status["completed"].append(name)
+
+            if drop_superseded:
+                for name in SUPERSEDED_INDEXES:
+                    if name in existing:
+                        col.drop_index(name)
+                        logger.info("Dropped superseded index %s", name)
+
+            status.update(state="done", current=None, finished_at=time.time())
             logger.info("All indexes ensured")
             return True
-        except OperationFailure as e:
+        except Exception as e:
+            status.update(state="failed", error=str(e), finished_at=time.time())
             logger.error("Failed to create indexes: %s", e)
             return False
+
+    def build_indexes_in_background(self, drop_superseded: bool = False) -> Optional[threading.Thread]:
+        """Run ensure_indexes on a daemon thread (no-op if a build is already running)."""
+        if self.index_build_status.get("state") == "running":
+            return None
+        self.index_build_status["state"] = "running"
+        thread = threading.Thread(
+            target=self.ensure_indexes,
+            kwargs={"drop_superseded": drop_superseded},
+            name="index-build",
+            daemon=True,
+        )
+        thread.start()
+        return thread
+
+    def index_build_progress(self) -> Dict[str, Any]:
+        """`index_build_status` plus server-side progress of in-flight createIndexes ops."""
+        progress = dict(self.index_build_status)
+        progress["completed"] = list(progress.get("completed") or [])
+        if self.client is None or progress.get("state") != "running":
+            return progress
+        try:
+            ops = self.client.admin.aggregate([
+                {"$currentOp": {"allUsers": True, "idleConnections": False}},
+                {"$match": {"command.createIndexes": self.collection_name}},
+            ])
+            progress["server_ops"] = [
+                {"msg": op.get("msg"), "progress": op.get("progress")} for op in ops
+            ]
         except Exception as e:
-            logger.error("Unexpected error creating indexes: %s", e)
-            return False
+            progress["server_ops_error"] = str(e)
+        return progress
+
+    @staticmethod
+    def _index_matches(spec: Dict[str, Any], info: Dict[str, Any]) -> bool:
+        """
+        Whether an index_information() entry has the key pattern of `spec`.
+        A text index reports its key as `_fts`/`_ftsx`; its fields are the
+        keys of `weights`.
+        """
+        text_fields = {field for field, kind in spec["keys"] if kind == "text"}
+        if not text_fields:
+            return list(info.get("key", [])) == list(spec["keys"])
+        others = [k for k in spec["keys"] if k[1] != "text"]
+        reported = [k for k in info.get("key", []) if k[0] not in ("_fts", "_ftsx")]
+        return set(info.get("weights") or {}) == text_fields and reported == others
+
+    def verify_indexes(self) -> Dict[str, Any]:
+        """
+        Compare the collection's indexes with INDEX_SPECS (by name and key
+        pattern), and check that documents carry the canonical MATCH_FIELDS
+        the recommend filter matches on (`needs_backfill` otherwise: run
+        `python -m app.database backfill`). The probe looks for a document
+        without `sector_norm`, the leading field of an index.
+        """
+        if self.internships_collection is None:
+            return {"ok": False, "error": "no collection"}
+        try:
+            existing = self.internships_collection.index_information()
+        except Exception as e:
+            return {"ok": False, "error": str(e)}
+
+        missing: List[str] = []
+        mismatched: List[str] = []
+        for spec in INDEX_SPECS:
+            info = existing.get(spec["name"])
+            if info is None:
+                if not spec.get("optional"):
+                    missing.append(spec["name"])
+            elif not self._index_matches(spec, info):
+                mismatched.append(spec["name"])
+        superseded = [name for name in SUPERSEDED_INDEXES if name in existing]
+        try:
+            needs_backfill = self.internships_collection.find_one({"sector_norm": {"$exists": False}}, {"_id": 1}) is not None
+        except Exception as e:
+            return {"ok": False, "error": str(e)}
+        return {
+            "ok": not missing and not mismatched and not needs_backfill,
+            "missing": missing,
+            "mismatched": mismatched,
+            "superseded_present": superseded,
+            "needs_backfill": needs_backfill,
+        }
 
     def insert_internship(self, internship: Dict[str, Any]) -> bool:
-        """Insert a single internship document."""
+        """Insert a single internship document (with its canonical match fields)."""
         if self.internships_collection is None:
             logger.error("No collection available for insertion")
             return False
         try:
-            result = self.internships_collection.insert_one(internship)
+            result = self.internships_collection.insert_one({**internship, **canonical_match_fields(internship)})
             logger.info("Inserted internship with ID: %s", result.inserted_id)
             return True
         except Exception as e:
@@ -124,7 +492,7 @@ class DatabaseManager:
             return False
 
     def insert_internships_bulk(self, internships: List[Dict[str, Any]]) -> bool:
-        """Insert multiple internship documents."""
+        """Insert multiple internship documents (with their canonical match fields)."""
         if self.internships_collection is None:
             logger.error("No collection available for bulk insertion")
             return False
@@ -132,13 +500,81 @@ class DatabaseManager:
             logger.info("No internships provided for bulk insert")
             return True
         try:
-            result = self.internships_collection.insert_many(internships, ordered=False)
+            docs = [{**doc, **canonical_match_fields(doc)} for doc in internships]
+            result = self.internships_collection.insert_many(docs, ordered=False)
             logger.info("Inserted %d internships", len(result.inserted_ids))
             return True
         except Exception as e:
             logger.error("Failed to insert internships in bulk: %s", e)
             return False
 
+    def backfill_match_fields(self, recompute: bool = False, batch_size: int = 500) -> int:
+        """
+        One-off migration: write the canonical MATCH_FIELDS on documents
+        that lack them (all documents with `recompute`, e.g. after a change
+        to the normalization). Returns the number of documents updated.
+        """
+        from pymongo import UpdateOne
+
+        if self.internships_collection is None:
+            logger.error("No collection available for backfill")
+            return 0
+        col = self.internships_collection
+        query = {} if recompute else {"$or": [{f: {"$exists": False}} for f in MATCH_FIELDS]}
+        projection = {"sector": 1, "job_role": 1, "work_mode": 1, "mode": 1, "preference.work_mode": 1, "skills": 1,
+                      "duration": 1, "duration_months": 1}
+        updated = 0
+        ops: List[Any] = []
+        for doc in col.find(query, projection).batch_size(batch_size):
+            ops.append(UpdateOne({"_id": doc["_id"]}, {"$set": canonical_match_fields(doc)}))
+            if len(ops) >= batch_size:
+                updated += col.bulk_write(ops, ordered=False).modified_count
+                ops = []
+        if ops:
+            updated += col.bulk_write(ops, ordered=False).modified_count
+        logger.info("Backfilled match fields on %d internships", updated)
+        return updated
+
+    def _find(
+        self,
+        name: str,
+        query: Dict[str, Any],
+        projection: Optional[Dict[str, Any]] = None,
+        limit: Optional[int] = None,
+        sort: Optional[List[Tuple[str, int]]] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Run a find through the circuit breaker and hand its shape + latency to
+        the query plan recorder. Raises DatabaseUnavailableError when the
+        circuit is open or the server can't be reached; other driver errors
+        (a bad query, an auth failure) come from a server that answered, so
+        they are re-raised as is and don't count against the breaker.
+        """
+        from pymongo.errors import AutoReconnect, NetworkTimeout, ServerSelectionTimeoutError
+
+        if not self.breaker.allow():
+            raise DatabaseUnavailableError(f"{name}: circuit open")
+        start = time.perf_counter()
+        try:
+            cursor = self.internships_collection.find(query, projection)
+            if sort:
+                cursor = cursor.sort(sort)
+            if limit:
+                cursor = cursor.limit(int(limit))
+            results = list(cursor)
+        except (AutoReconnect, ServerSelectionTimeoutError, NetworkTimeout) as e:
+            self.breaker.record(False, (time.perf_counter() - start) * 1000.0)
+            raise DatabaseUnavailableError(f"{name}: {e}") from e
+        except Exception:
+            self.breaker.record(True, (time.perf_counter() - start) * 1000.0)
+            raise
+        elapsed_ms = (time.perf_counter() - start) * 1000.0
+        self.breaker.record(True, elapsed_ms)
+        recorder = get_query_recorder()
+        if recorder.enabled:
+            recorder.record(name, self.internships_collection, query, projection, limit, elapsed_ms)
+        return results
+
     def find_internships_by_location(
         self,
         lat: float,
@@ -165,9 +601,8 @@ class DatabaseManager:
             }
 
             projection = {"_id": 0}
-            cursor = self.internships_collection.find(query, projection).limit(int(limit))
-            results = list(cursor)
-            logger.info("Found %d internships within %dkm via %s", len(results), max_distance_km, geo_field)
+            results = self._find("find_internships_by_location", query, projection, limit)
+            query_logger.info("Found %d internships within %dkm via %s", len(results), max_distance_km, geo_field)
             return results
         except Exception as e:
             logger.error("Failed to find internships by location: %s", e)
@@ -181,109 +616,34 @@ class DatabaseManager:
         n: int = 5,
         geo_field: str = "location_point_exact",
         max_distance_km: Optional[int] = None,
+        projection: Optional[Dict[str, Any]] = None,
     ) -> List[Dict[str, Any]]:
         """
         Find the nearest N internships to the user's coordinates, optionally filtered by preference.
-        Supports max_distance_km to limit search radius.
+        Supports max_distance_km to limit search radius. `projection` defaults to
+        DOCUMENT_PROJECTION; pass SCORING_PROJECTION for a lean shortlist.
         """
-        if self.client is None:
-            logger.info("Connecting to database for nearest search")
-            if not self.connect():
-                logger.error("Failed to connect to database")
-                return []
-        if self.internships_collection is None:
-            logger.error("No collection available for nearest search")
-            return []
+        if not self.ensure_connected():
+            raise DatabaseUnavailableError(f"nearest search: database unavailable (circuit {self.breaker.state})")
 
         try:
-            base_filter: Dict[str, Any] = {}
-
-            # Preference filters (case-insensitive; your preprocessing normalizes to lowercase)
-            if preference:
-                sector = preference.get("sector")
-                if sector:
-                    base_filter["sector"] = {"$regex": f"^{sector}$", "$options": "i"}
-
-                skills = preference.get("skills") or []
-                if skills:
-                    # normalized skills are simple lowercase tokens
-                    base_filter["skills"] = {"$in": [str(s).lower() for s in skills if s]}
-
-                work_mode = preference.get("work_mode")
-                if work_mode:
-                    # support both new 'work_mode' field and legacy 'preference.work_mode'
-                    base_filter["$or"] = [
-                        {"work_mode": {"$regex": f"^{work_mode}$", "$options": "i"}},
-                        {"preference.work_mode": {"$regex": f"^{work_mode}$", "$options": "i"}},
-                    ]
-
-                # optional role/sector arrays
-                preferred_roles = preference.get("preferred_job_roles") or []
-                if preferred_roles:
-                    base_filter["job_role"] = {"$in": [str(r).lower() for r in preferred_roles if r]}
-
-                preferred_sectors = preference.get("preferred_sectors") or []
-                if preferred_sectors:
-                    base_filter.setdefault("$or", [])
-                    base_filter["$or"].append({"sector": {"$in": [str(s).lower() for s in preferred_sectors if s]}})
-
-                # duration minimum if provided
-                md = preference.get("min_duration_months")
-                if isinstance(md, (int, float)) and md > 0:
-                    # duration stored as {"months": int} and/or flat duration_months
-                    base_filter["$or"] = (base_filter.get("$or") or []) + [
-                        {"duration.months": {"$gte": int(md)}},
-                        {"duration_months": {"$gte": int(md)}},
-                    ]
-
-            # Geospatial near query (requires GEOSPHERE index on geo_field)
-            near_clause: Dict[str, Any] = {
-                "$geometry": {"type": "Point", "coordinates": [float(user_lon), float(user_lat)]}
-            }
-            if max_distance_km is not None:
-                near_clause["$maxDistance"] = int(max(0, max_distance_km)) * 1000
-
-            base_filter[geo_field] = {"$near": near_clause}
-
-            # Projection: include fields the recommender uses for scoring/tie-breakers
-            projection = {
-                "_id": 0,
-                "id": 1,
-                "title": 1,
-                "description": 1,
-                "sector": 1,
-                "skills": 1,
-                "interests": 1,
-                "job_role": 1,
-                "qualification": 1,
-                "location": 1,
-                "location_point_exact": 1,
-                "location_point_city": 1,
-                "duration": 1,
-                "duration_months": 1,
-                "expected_salary": 1,
-                "stipend": 1,
-                "compensation": 1,
-                "additional_support": 1,
-                "work_mode": 1,
-                "preference.work_mode": 1,  # legacy
-                "geo": 1,
-                "created_at": 1,
-                "posted_at": 1,
-                "createdAt": 1,
-            }
+            base_filter = build_nearest_filter(user_lat, user_lon, preference, geo_field, max_distance_km)
 
-            cursor = self.internships_collection.find(base_filter, projection).limit(int(n))
-            results = list(cursor)
-            logger.info(
+            if projection is None:
+                projection = DOCUMENT_PROJECTION
+
+            results = self._find("find_nearest_internships", base_filter, projection, n)
+            query_logger.info(
                 "Found %d nearest internships using %s (prefs=%s, radius_km=%s)",
                 len(results),
                 geo_field,
-                {k: v for k, v in (preference or {}).items() if v},
+                LazyStr(lambda p: {k: v for k, v in p.items() if v}, preference or {}),
                 max_distance_km,
             )
             return results
 
+        except DatabaseUnavailableError:
+            raise
         except Exception as e:
             logger.error("Failed to find nearest internships: %s", e)
             return []
@@ -309,16 +669,15 @@ class DatabaseManager:
                 ]
             }
 
-            cursor = self.internships_collection.find(query, {"_id": 0}).limit(int(limit))
-            results = list(cursor)
-            logger.info("Found %d internships matching skills: %s", len(results), skills_norm)
+            results = self._find("find_internships_by_skills", query, {"_id": 0}, limit)
+            query_logger.info("Found %d internships matching skills: %s", len(results), skills_norm)
             return results
         except Exception as e:
             logger.error("Failed to find internships by skills: %s", e)
             return []
 
     def find_internships_by_sector(self, sectors: List[str], limit: int = 50) -> List[Dict[str, Any]]:
-        """Find internships in specific sectors (case-insensitive)."""
+        """Find internships in specific sectors (matched on sector_norm)."""
         if self.internships_collection is None:
             logger.error("No collection available for sector search")
             return []
@@ -326,20 +685,60 @@ class DatabaseManager:
         try:
             if not sectors:
                 return []
-            # Use regex OR for case-insensitive membership
-            regexes = [{"sector": {"$regex": f"^{str(s).lower()}$", "$options": "i"}} for s in sectors if s]
-            if not regexes:
+            wanted = normalize_values(sectors)
+            if not wanted:
                 return []
 
-            query = {"$or": regexes}
-            cursor = self.internships_collection.find(query, {"_id": 0}).limit(int(limit))
-            results = list(cursor)
-            logger.info("Found %d internships in sectors: %s", len(results), sectors)
+            query = {"sector_norm": {"$in": wanted}}
+            results = self._find("find_internships_by_sector", query, {"_id": 0}, limit)
+            query_logger.info("Found %d internships in sectors: %s", len(results), sectors)
             return results
         except Exception as e:
             logger.error("Failed to find internships by sector: %s", e)
             return []
 
+    def find_internships_by_ids(self, ids: List[str], projection: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """Fetch internships by their `id` field, returned in the order of `ids`."""
+        if not self.ensure_connected():
+            raise DatabaseUnavailableError(f"id lookup: database unavailable (circuit {self.breaker.state})")
+
+        try:
+            wanted = [str(i) for i in (ids or []) if i is not None]
+            if not wanted:
+                return []
+            docs = self._find("find_internships_by_ids", {"id": {"$in": wanted}}, projection or {"_id": 0})
+            by_id = {str(doc.get("id")): doc for doc in docs}
+            return [by_id[i] for i in wanted if i in by_id]
+        except DatabaseUnavailableError:
+            raise
+        except Exception as e:
+            logger.error("Failed to find internships by ids: %s", e)
+            return []
+
+    def find_internships_created_since(
+        self,
+        since: Any,
+        projection: Optional[Dict[str, Any]] = None,
+        limit: int = 1000,
+    ) -> List[Dict[str, Any]]:
+        """Internships with `created_at` after `since` (datetime or ISO string), oldest first."""
+        if not self.ensure_connected():
+            raise DatabaseUnavailableError(f"created-since: database unavailable (circuit {self.breaker.state})")
+
+        try:
+            return self._find(
+                "find_internships_created_since",
+                {"created_at": {"$gt": since}},
+                projection or {"_id": 0},
+                limit,
+                sort=[("created_at", 1)],
+            )
+        except DatabaseUnavailableError:
+            raise
+        except Exception as e:
+            logger.error("Failed to find internships created since %s: %s", since, e)
+            return []
+
     def get_collection_count(self) -> int:
         """Get total count of internships in collection."""
         if self.internships_collection is None:
@@ -363,3 +762,41 @@ db_manager = DatabaseManager()
 def get_database() -> DatabaseManager:
     """Get the global database manager instance."""
     return db_manager
+
+# ------------------------------ CLI ----------------------------------- #
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.database", description="Database maintenance")
+    sub = parser.add_subparsers(dest="command", required=True)
+    idx = sub.add_parser("indexes", help="Verify (default) or build the indexes in INDEX_SPECS")
+    idx.add_argument("--build", action="store_true", help="Create missing indexes")
+    idx.add_argument("--drop-superseded", action="store_true",
+                     help=f"After building, drop {', '.join(SUPERSEDED_INDEXES)}")
+    fill = sub.add_parser("backfill", help=f"Write {', '.join(MATCH_FIELDS)} on documents missing them")
+    fill.add_argument("--recompute", action="store_true", help="Rewrite the fields on every document")
+    args = parser.parse_args(argv)
+
+    db = get_database()
+    if not db.connect():
+        print("could not connect to MongoDB")
+        return 2
+    if args.command == "backfill":
+        print(f"updated {db.backfill_match_fields(recompute=args.recompute)} internships")
+        return 0
+    if args.build:
+        thread = db.build_indexes_in_background(drop_superseded=args.drop_superseded)
+        while thread is not None and thread.is_alive():
+            progress = db.index_build_progress()
+            print(f"[{len(progress['completed'])}/{progress.get('total')}] building {progress.get('current')} "
+                  f"{progress.get('server_ops') or ''}")
+            thread.join(timeout=5.0)
+        if db.index_build_status.get("state") != "done":
+            print(f"index build failed: {db.index_build_status.get('error')}")
+            return 1
+    report = db.verify_indexes()
+    print(json.dumps(report, indent=1))
+    return 0 if report["ok"] else 1
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    raise SystemExit(main())
@@ -0,0 +1,246 @@
+import os
+import json
+import time
+import logging
+import argparse
+import threading
+from typing import List, Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------- Config ---------------------------------- #
+
+# Record query shapes and explain new ones (off by default: explain is a second round trip)
+QUERY_DIAGNOSTICS = os.getenv("QUERY_DIAGNOSTICS", "0").strip().lower() in {"1", "true", "yes", "on"}
+# Flag plans that examine more than this many keys/docs per returned doc
+QUERY_SCAN_RATIO_THRESHOLD = float(os.getenv("QUERY_SCAN_RATIO_THRESHOLD", "10") or 10)
+# Re-explain a known shape every N calls (0 = only the first time it is seen)
+QUERY_REEXPLAIN_EVERY = int(os.getenv("QUERY_REEXPLAIN_EVERY", "0") or 0)
+
+# ----------------------------- Shapes --------------------------------- #
+
+def query_shape(query: Any) -> Any:
+    """
+    Filter document with every literal replaced by its type, so calls that
+    differ only in values share a shape. Operators, field names and key
+    order are kept; `$in`/`$nin` lists collapse to a single placeholder.
+    """
+    if isinstance(query, dict):
+        out: Dict[str, Any] = {}
+        for key, value in query.items():
+            if key in ("$in", "$nin", "$all"):
+                out[key] = "<list>"
+            elif key in ("$geometry", "$maxDistance", "$minDistance"):
+                out[key] = "<geo>"
+            else:
+                out[key] = query_shape(value)
+        return out
+    if isinstance(query, list):
+        return [query_shape(v) for v in query]
+    return f"<{type(query).__name__}>"
+
+def _plan_stages(plan: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Flatten a winning plan tree into (stage, indexName) entries, root first."""
+    stages: List[Dict[str, Any]] = []
+    stack = [plan]
+    while stack:
+        node = stack.pop()
+        if not isinstance(node, dict):
+            continue
+        entry = {"stage": node.get("stage")}
+        if node.get("indexName"):
+            entry["index"] = node["indexName"]
+        stages.append(entry)
+        if "inputStage" in node:
+            stack.append(node["inputStage"])
+        stack.extend(reversed(node.get("inputStages") or []))
+    return stages
+
+def summarize_explain(explain: Dict[str, Any], ratio_threshold: float = QUERY_SCAN_RATIO_THRESHOLD) -> Dict[str, Any]:
+    """Winning-plan stages, execution counters and flags from explain("executionStats")."""
+    planner = explain.get("queryPlanner") or {}
+    stats = explain.get("executionStats") or {}
+    stages = _plan_stages(planner.get("winningPlan") or {})
+    keys = int(stats.get("totalKeysExamined") or 0)
+    docs = int(stats.get("totalDocsExamined") or 0)
+    returned = int(stats.get("nReturned") or 0)
+    ratio = max(keys, docs) / max(1, returned)
+
+    flags: List[str] = []
+    if any(s.get("stage") == "COLLSCAN" for s in stages):
+        flags.append("COLLSCAN")
+    if ratio > ratio_threshold:
+        flags.append("HIGH_SCAN_RATIO")
+    return {
+        "stages": stages,
+        "indexes": sorted({s["index"] for s in stages if s.get("index")}),
+        "keys_examined": keys,
+        "docs_examined": docs,
+        "returned": returned,
+        "scan_ratio": round(ratio, 2),
+        "execution_ms": stats.get("executionTimeMillis"),
+        "flags": flags,
+    }
+
+# ---------------------------- Recorder -------------------------------- #
+
+class QueryPlanRecorder:
+    """
+    Per-process registry of DatabaseManager query shapes: call counts and
+    latency per shape, plus the explain summary of the first call of each
+    new shape (and every `reexplain_every` calls after that).
+    """
+
+    def __init__(
+        self,
+        enabled: bool = QUERY_DIAGNOSTICS,
+        ratio_threshold: float = QUERY_SCAN_RATIO_THRESHOLD,
+        reexplain_every: int = QUERY_REEXPLAIN_EVERY,
+    ) -> None:
+        self.enabled = enabled
+        self.ratio_threshold = ratio_threshold
+        self.reexplain_every = max(0, int(reexplain_every))
+        self._lock = threading.Lock()
+        self._shapes: Dict[str, Dict[str, Any]] = {}
+
+    def record(
+        self,
+        name: str,
+        collection: Any,
+        query: Dict[str, Any],
+        projection: Optional[Dict[str, Any]],
+        limit: Optional[int],
+        elapsed_ms: float,
+    ) -> None:
+        if not self.enabled:
+            return
+        shape = query_shape(query)
+        key = f"{name}:{json.dumps(shape, sort_keys=False)}"
+        with self._lock:
+            entry = self._shapes.get(key)
+            if entry is None:
+                entry = self._shapes[key] = {
+                    "name": name,
+                    "shape": shape,
+                    "calls": 0,
+                    "total_ms": 0.0,
+                    "max_ms": 0.0,
+                    "plan": None,
+                    "explained_at": None,
+                }
+            entry["calls"] += 1
+            entry["total_ms"] += elapsed_ms
+            entry["max_ms"] = max(entry["max_ms"], elapsed_ms)
+            due = entry["plan"] is None or (self.reexplain_every and entry["calls"] % self.reexplain_every == 0)
+        if due:
+            plan = self._explain(collection, query, projection, limit)
+            if plan is not None:
+                with self._lock:
+                    entry["plan"] = plan
+                    entry["explained_at"] = time.time()
+                if plan["flags"]:
+                    logger.warning("Query %s flagged %s (indexes=%s, scan_ratio=%s): %s",
+                                   name, plan["flags"], plan["indexes"], plan["scan_ratio"], json.dumps(shape))
+
+    def _explain(
+        self,
+        collection: Any,
+        query: Dict[str, Any],
+        projection: Optional[Dict[str, Any]],
+        limit: Optional[int],
+    ) -> Optional[Dict[str, Any]]:
+        cmd: Dict[str, Any] = {"find": collection.name, "filter": query}
+        if projection:
+            cmd["projection"] = projection
+        if limit:
+            cmd["limit"] = int(limit)
+        try:
+            explain = collection.database.command("explain", cmd, verbosity="executionStats")
+        except Exception as e:
+            logger.warning("explain failed for %s: %s", collection.name, e)
+            return None
+        return summarize_explain(explain, self.ratio_threshold)
+
+    def summary(self) -> Dict[str, Any]:
+        """Shapes sorted flagged-first, then by call count."""
+        with self._lock:
+            entries = [dict(e) for e in self._shapes.values()]
+        for e in entries:
+            e["avg_ms"] = round(e["total_ms"] / e["calls"], 2) if e["calls"] else 0.0
+            e["total_ms"] = round(e["total_ms"], 2)
+            e["max_ms"] = round(e["max_ms"], 2)
+        entries.sort(key=lambda e: (not (e["plan"] or {}).get("flags"), -e["calls"]))
+        return {
+            "enabled": self.enabled,
+            "scan_ratio_threshold": self.ratio_threshold,
+            "shapes": entries,
+            "flagged": sum(1 for e in entries if (e["plan"] or {}).get("flags")),
+        }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._shapes.clear()
+
+_recorder = QueryPlanRecorder()
+
+def get_query_recorder() -> QueryPlanRecorder:
+    """Process-wide query plan recorder."""
+    return _recorder
+
+# ------------------------------ CLI ----------------------------------- #
+
+def format_summary(summary: Dict[str, Any]) -> str:
+    lines = [f"{len(summary['shapes'])} query shapes, {summary['flagged']} flagged "
+             f"(scan ratio threshold {summary['scan_ratio_threshold']:g})"]
+    for e in summary["shapes"]:
+        plan = e["plan"] or {}
+        flags = ",".join(plan.get("flags") or []) or "ok"
+        lines.append(f"[{flags}] {e['name']} calls={e['calls']} avg={e['avg_ms']}ms "
+                     f"indexes={plan.get('indexes')} ratio={plan.get('scan_ratio')}")
+        lines.append(f"    {json.dumps(e['shape'])}")
+    return "\n".join(lines)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from app.database import get_database
+    from app.tables import CITY_COORDINATES
+
+    parser = argparse.ArgumentParser(prog="python -m app.diagnostics", description="Query plan diagnostics")
+    sub = parser.add_subparsers(dest="command", required=True)
+    plans = sub.add_parser("query-plans", help="Run every DatabaseManager query shape and explain it")
+    plans.add_argument("--city", default="Delhi", help="City used for the geo queries")
+    plans.add_argument("--json", action="store_true", help="Print the raw summary as JSON")
+    args = parser.parse_args(argv)
+
+    coords = CITY_COORDINATES.get(args.city)
+    if coords is None:
+        parser.error(f"unknown city: {args.city}")
+    db = get_database()
+    if not db.connect():
+        print("could not connect to MongoDB")
+        return 2
+
+    recorder = get_query_recorder()
+    recorder.enabled = True
+    lat, lon = coords["lat"], coords["lon"]
+    # one call per shape the recommender can emit (preference keys present/absent)
+    preferences = [
+        {},
+        {"sector": "technology", "skills": ["python"], "work_mode": "hybrid", "min_duration_months": 3,
+         "preferred_job_roles": ["data scientist"], "preferred_sectors": ["technology"]},
+        {"preferred_job_roles": ["data scientist"]},
+        {"sector": "finance", "min_duration_months": 6},
+    ]
+    for pref in preferences:
+        db.find_nearest_internships(lat, lon, preference=pref, n=200, max_distance_km=60)
+    db.find_internships_by_location(lat, lon, max_distance_km=60)
+    db.find_internships_by_skills(["python", "sql"])
+    db.find_internships_by_sector(["technology"])
+    db.find_internships_by_ids(["__diagnostics__"])
+
+    summary = recorder.summary()
+    print(json.dumps(summary, indent=1, default=str) if args.json else format_summary(summary))
+    return 1 if summary["flagged"] else 0
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    raise SystemExit(main())
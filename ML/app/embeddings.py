@@ -0,0 +1,206 @@
+import os
+import json
+import hashlib
+import logging
+import argparse
+import threading
+from typing import List, Dict, Any, Optional, Iterable
+
+import numpy as np
+
+from app.preprocessing import internship_text, student_text
+from app.utils import LRUCache
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------- Config ---------------------------------- #
+
+# Directory written by `python -m app.embeddings build`
+EMBEDDING_INDEX_DIR = os.getenv("EMBEDDING_INDEX_DIR", "")
+# Encoder override: "hash[:dim]" or a local sentence-transformers model dir
+EMBEDDING_ENCODER = os.getenv("EMBEDDING_ENCODER", "")
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "4096"))
+
+VECTORS_FILE = "vectors.f32"
+IDS_FILE = "ids.json"
+META_FILE = "meta.json"
+
+# ---------------------------- Encoders -------------------------------- #
+
+class HashingEncoder:
+    """
+    Deterministic stand-in encoder: signed feature hashing of unigrams and
+    bigrams into `dim` buckets, L2-normalized. No model files needed.
+    """
+
+    def __init__(self, dim: int = 256) -> None:
+        self.dim = int(dim)
+        self.spec = f"hash:{self.dim}"
+
+    def _vector(self, text: str) -> np.ndarray:
+        vec = np.zeros(self.dim, dtype=np.float32)
+        tokens = text.split()
+        grams = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+        for g in grams:
+            h = int.from_bytes(hashlib.blake2b(g.encode("utf-8"), digest_size=8).digest(), "little")
+            vec[h % self.dim] += 1.0 if (h >> 63) & 1 else -1.0
+        norm = float(np.linalg.norm(vec))
+        return vec / norm if norm > 0 else vec
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        return np.vstack([self._vector(t) for t in texts]).astype(np.float32)
+
+class SentenceTransformerEncoder:
+    """sentence-transformers model loaded from a local directory (never downloads)."""
+
+    def __init__(self, path: str) -> None:
+        if not os.path.isdir(path):
+            raise ValueError(f"embedding model path is not a local directory: {path}")
+        os.environ.setdefault("HF_HUB_OFFLINE", "1")
+        os.environ.setdefault("TRANSFORMERS_OFFLINE", "1")
+        from sentence_transformers import SentenceTransformer
+
+        self.model = SentenceTransformer(path, device="cpu")
+        self.dim = int(self.model.get_sentence_embedding_dimension())
+        self.spec = os.path.abspath(path)
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        vecs = self.model.encode(texts, batch_size=64, normalize_embeddings=True, convert_to_numpy=True)
+        return np.asarray(vecs, dtype=np.float32).reshape(len(texts), self.dim)
+
+def load_encoder(spec: str):
+    """Build an encoder from "hash" / "hash:<dim>" or a local model path."""
+    spec = (spec or "hash").strip()
+    if spec == "hash" or spec.startswith("hash:"):
+        _, _, dim = spec.partition(":")
+        return HashingEncoder(int(dim) if dim else 256)
+    return SentenceTransformerEncoder(spec)
+
+# ----------------------------- Store ---------------------------------- #
+
+class EmbeddingStore:
+    """Precomputed internship embeddings: float32 (count, dim) memmap + id list."""
+
+    def __init__(self, path: str) -> None:
+        with open(os.path.join(path, META_FILE), "r", encoding="utf-8") as f:
+            self.meta: Dict[str, Any] = json.load(f)
+        with open(os.path.join(path, IDS_FILE), "r", encoding="utf-8") as f:
+            self.ids: List[str] = json.load(f)
+        self.dim = int(self.meta["dim"])
+        self.count = int(self.meta["count"])
+        self.vectors = np.memmap(os.path.join(path, VECTORS_FILE), dtype=np.float32, mode="r",
+                                 shape=(self.count, self.dim))
+        self._rows: Dict[str, int] = {iid: i for i, iid in enumerate(self.ids)}
+
+    def row(self, internship_id: Any) -> Optional[int]:
+        return self._rows.get(str(internship_id))
+
+    @staticmethod
+    def build(internships: Iterable[Dict[str, Any]], encoder: Any, path: str, batch_size: int = 256) -> int:
+        """Encode the catalog in batches straight into a new memmap. Returns count."""
+        docs = [it for it in internships if it.get("id") is not None]
+        os.makedirs(path, exist_ok=True)
+        vectors_path = os.path.join(path, VECTORS_FILE)
+        vectors = np.memmap(vectors_path + ".tmp", dtype=np.float32, mode="w+", shape=(max(1, len(docs)), encoder.dim))
+        for start in range(0, len(docs), batch_size):
+            batch = docs[start:start + batch_size]
+            vectors[start:start + len(batch)] = encoder.encode([internship_text(it) for it in batch])
+        vectors.flush()
+        del vectors
+        os.replace(vectors_path + ".tmp", vectors_path)
+        with open(os.path.join(path, IDS_FILE), "w", encoding="utf-8") as f:
+            json.dump([str(it["id"]) for it in docs], f)
+        with open(os.path.join(path, META_FILE), "w", encoding="utf-8") as f:
+            json.dump({"dim": encoder.dim, "count": len(docs), "encoder": encoder.spec}, f)
+        logger.info("Wrote %d internship embeddings (dim=%d) to %s", len(docs), encoder.dim, path)
+        return len(docs)
+
+# ---------------------------- Matcher --------------------------------- #
+
+class EmbeddingMatcher:
+    """
+    Relevance of a student against a shortlist: one batched product of the
+    precomputed internship rows with the (LRU-cached) profile embedding.
+    Internship text is never encoded per request; ids missing from the
+    store score 0.
+    """
+
+    def __init__(self, store: EmbeddingStore, encoder: Any, cache_size: int = EMBEDDING_CACHE_SIZE) -> None:
+        if encoder.dim != store.dim:
+            raise ValueError(f"encoder dim {encoder.dim} != store dim {store.dim}")
+        self.store = store
+        self.encoder = encoder
+        self.cache = LRUCache(cache_size)
+
+    def profile_embedding(self, student: Dict[str, Any]) -> np.ndarray:
+        text = student_text(student)
+        key = hashlib.sha1(text.encode("utf-8")).hexdigest()
+        vec = self.cache.get(key)
+        if vec is None:
+            vec = self.encoder.encode([text])[0]
+            self.cache.put(key, vec)
+        return vec
+
+    def similarities(self, student: Dict[str, Any], internships: List[Dict[str, Any]]) -> List[float]:
+        if not internships:
+            return []
+        positions: List[int] = []
+        rows: List[int] = []
+        for pos, it in enumerate(internships):
+            row = self.store.row(it.get("id"))
+            if row is not None:
+                positions.append(pos)
+                rows.append(row)
+        sims = np.zeros(len(internships), dtype=np.float32)
+        if rows:
+            sims[positions] = self.store.vectors[rows] @ self.profile_embedding(student)
+        return np.clip(sims, 0.0, 1.0).tolist()
+
+# --------------------------- Global access ---------------------------- #
+
+_matcher_lock = threading.Lock()
+_matcher: Optional[EmbeddingMatcher] = None
+_matcher_failed = False
+
+def get_embedding_matcher() -> Optional[EmbeddingMatcher]:
+    """Process-wide matcher over EMBEDDING_INDEX_DIR (None if unavailable)."""
+    global _matcher, _matcher_failed
+    if _matcher is not None or _matcher_failed or not EMBEDDING_INDEX_DIR:
+        return _matcher
+    with _matcher_lock:
+        if _matcher is None and not _matcher_failed:
+            try:
+                store = EmbeddingStore(EMBEDDING_INDEX_DIR)
+                encoder = load_encoder(EMBEDDING_ENCODER or store.meta.get("encoder", "hash"))
+                _matcher = EmbeddingMatcher(store, encoder)
+                logger.info("Loaded %d internship embeddings from %s", store.count, EMBEDDING_INDEX_DIR)
+            except Exception as e:
+                _matcher_failed = True
+                logger.error("Failed to load embedding index from %s: %s", EMBEDDING_INDEX_DIR, e)
+    return _matcher
+
+# ------------------------------ CLI ----------------------------------- #
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from app.snapshot import iter_catalog_documents
+
+    parser = argparse.ArgumentParser(prog="python -m app.embeddings", description="Internship embedding tools")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="Encode the catalog and write the embedding store")
+    build.add_argument("--out", default=EMBEDDING_INDEX_DIR, help="Output dir (default: $EMBEDDING_INDEX_DIR)")
+    build.add_argument("--encoder", default=EMBEDDING_ENCODER or "hash", help='"hash[:dim]" or a local model dir')
+    build.add_argument("--snapshot", default=None, help="Read the catalog from a snapshot root instead of MongoDB")
+    build.add_argument("--batch-size", type=int, default=256)
+    args = parser.parse_args(argv)
+
+    if not args.out:
+        parser.error("--out or EMBEDDING_INDEX_DIR is required")
+    count = EmbeddingStore.build(iter_catalog_documents(args.snapshot), load_encoder(args.encoder), args.out, args.batch_size)
+    print(f"wrote {count} embeddings to {args.out}")
+    return 0
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    raise SystemExit(main())
@@ -0,0 +1,394 @@
+import os
+import json
+import time
+import random
+import asyncio
+import logging
+import argparse
+import threading
+from datetime import datetime, timedelta
+from typing import List, Dict, Any, Optional, Tuple
+
+from app.preprocessing import SKILL_SYNONYMS
+from app.tables import CITY_COORDINATES, RELATED_JOBS
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------- Config ---------------------------------- #
+
+# Where `run` saves results (one JSON file per run) for `compare`
+LOADTEST_DIR = os.getenv("LOADTEST_DIR", "loadtest_runs")
+# SQLite catalog used as the local stand-in for MongoDB (seeded on first use)
+LOADTEST_CATALOG = os.getenv("LOADTEST_CATALOG", "loadtest_catalog.sqlite3")
+
+_SKILLS = sorted(set(SKILL_SYNONYMS.values()))
+_ROLES = sorted(RELATED_JOBS)
+_SECTORS = (
+    "technology", "finance", "healthcare", "education", "manufacturing",
+    "marketing", "government", "social work", "retail", "energy",
+)
+_QUALIFICATIONS = ("B.Tech", "B.E", "BSc", "BCom", "BA", "BCA", "BBA", "M.Tech", "MSc", "MBA", "Diploma", "ITI", "12th")
+_WORK_MODES = ("onsite", "hybrid", "remote")
+_SUPPORT = ["mentor", "certificate", "laptop", "housing"]
+_CITIES = list(CITY_COORDINATES)
+# Demand is skewed towards the first (largest) cities in the table, like production traffic
+_CITY_WEIGHTS = [1.0 / (rank + 1) for rank in range(len(_CITIES))]
+
+# ------------------------ Synthetic data ------------------------------ #
+
+def _around(rnd: random.Random, city: str, spread_deg: float) -> Tuple[float, float]:
+    c = CITY_COORDINATES[city]
+    return (
+        round(c["lat"] + rnd.uniform(-spread_deg, spread_deg), 5),
+        round(c["lon"] + rnd.uniform(-spread_deg, spread_deg), 5),
+    )
+
+def synthetic_profile(rnd: random.Random, seq: int) -> Dict[str, Any]:
+    """A student profile shaped like real /recommend traffic (skewed cities, partial preferences)."""
+    city = rnd.choices(_CITIES, weights=_CITY_WEIGHTS)[0]
+    lat, lon = _around(rnd, city, 0.15)
+    profile: Dict[str, Any] = {
+        "id": f"load-{seq}",
+        "education": rnd.choice(_QUALIFICATIONS),
+        "skills": rnd.sample(_SKILLS, rnd.randint(2, 6)),
+        "interests": rnd.sample(_SECTORS, rnd.randint(0, 2)),
+        "preferred_job_roles": rnd.sample(_ROLES, rnd.randint(0, 2)),
+        "preferred_sectors": rnd.sample(_SECTORS, rnd.randint(0, 2)),
+        "location": {"city": city, "state": "", "lat": lat, "lon": lon},  # state is required, not ranked on
+        "max_distance_km": rnd.choice([25, 50, 50, 100]),
+        "min_duration_months": rnd.choice([1, 1, 2, 3]),
+    }
+    if rnd.random() < 0.5:
+        profile["expected_salary"] = rnd.choice([5000, 10000, 15000, 20000])
+    if rnd.random() < 0.3:
+        profile["additional_preferences"] = rnd.sample(_SUPPORT, rnd.randint(1, 2))
+    return profile
+
+def synthetic_internship(rnd: random.Random, seq: int) -> Dict[str, Any]:
+    city = rnd.choices(_CITIES, weights=_CITY_WEIGHTS)[0]
+    lat, lon = _around(rnd, city, 0.5)
+    centre = CITY_COORDINATES[city]
+    role = rnd.choice(_ROLES)
+    sector = rnd.choice(_SECTORS)
+    skills = rnd.sample(_SKILLS, rnd.randint(2, 6))
+    created = datetime(2024, 1, 1) + timedelta(minutes=rnd.randint(0, 60 * 24 * 365))
+    return {
+        "id": f"load-int-{seq}",
+        "title": f"{role.title()} Intern",
+        "description": f"Work as {role} in {sector} using {', '.join(skills[:2])}",
+        "qualification": rnd.choice(_QUALIFICATIONS),
+        "skills": skills,
+        "interests": rnd.sample(_SECTORS, 1),
+        "job_role": role,
+        "sector": sector,
+        "location": {"city": city, "lat": lat, "lon": lon},
+        "location_point_exact": {"type": "Point", "coordinates": [lon, lat]},
+        "location_point_city": {"type": "Point", "coordinates": [centre["lon"], centre["lat"]]},
+        "duration": {"months": rnd.choice([1, 2, 3, 6])},
+        "stipend": rnd.choice([0, 5000, 10000, 15000, 20000]),
+        "work_mode": rnd.choice(_WORK_MODES),
+        "additional_support": rnd.sample(_SUPPORT, 2),
+        "created_at": created.isoformat(),
+    }
+
+def seed_catalog(path: str, size: int, seed: int = 7) -> int:
+    """Fill the SQLite stand-in with `size` synthetic internships unless it already has some."""
+    from app.storage import SQLiteBackend
+
+    backend = SQLiteBackend(path)
+    count = backend.get_collection_count()
+    if count:
+        return count
+    rnd = random.Random(seed)
+    for start in range(0, size, 5000):
+        backend.insert_internships_bulk([synthetic_internship(rnd, i) for i in range(start, min(size, start + 5000))])
+    logger.info("Seeded %s with %d synthetic internships", path, size)
+    return backend.get_collection_count()
+
+# --------------------------- Targets ---------------------------------- #
+
+def local_app(catalog_path: str):
+    """
+    The API wired to the SQLite stand-in: the recommender reads the catalog
+    from it and the MongoDB dependency is bypassed. Startup warm-up is not
+    run (the caller drives the app without its lifespan).
+    """
+    from app import main
+    from app.database import get_database
+    from app.storage import SQLiteBackend
+
+    main.recommender.backend = SQLiteBackend(catalog_path)
+    main.app.dependency_overrides[main.get_db] = get_database
+    return main.app
+
+def serve_local(app: Any, port: int) -> Any:
+    """Run `app` under uvicorn on 127.0.0.1:`port` in a daemon thread; returns the server."""
+    import uvicorn
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, lifespan="off", log_level="warning"))
+    threading.Thread(target=server.run, name="loadtest-server", daemon=True).start()
+    deadline = time.monotonic() + 10.0
+    while not server.started:
+        if time.monotonic() > deadline:
+            raise RuntimeError(f"server did not start on port {port}")
+        time.sleep(0.05)
+    return server
+
+# ---------------------------- Driver ---------------------------------- #
+
+class LoadGenerator:
+    """
+    Sends a mix of /recommend and /recommend/batch requests.
+
+    Closed loop (`rate` 0): `concurrency` workers each send the next request
+    as soon as the previous one returns. Open loop (`rate` > 0): requests
+    arrive as a Poisson process at `rate` per second whatever the app does,
+    at most `concurrency` in flight; latency is measured from the scheduled
+    arrival, so time spent queued behind a slow app is counted rather than
+    hidden (no coordinated omission).
+
+    `repeat_ratio` of profiles are resent from recently used ones, as
+    returning students and client retries do in production.
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        concurrency: int = 8,
+        rate: float = 0.0,
+        batch_ratio: float = 0.1,
+        batch_size: int = 10,
+        repeat_ratio: float = 0.1,
+        top_k: int = 5,
+        seed: int = 42,
+    ) -> None:
+        self.client = client
+        self.concurrency = max(1, int(concurrency))
+        self.rate = max(0.0, float(rate))
+        self.batch_ratio = batch_ratio
+        self.batch_size = max(1, int(batch_size))
+        self.repeat_ratio = repeat_ratio
+        self.top_k = top_k
+        self._rnd = random.Random(seed)
+        self._recent: List[Dict[str, Any]] = []
+        self._seq = 0
+        self._issued = 0
+        # (endpoint, status, latency ms); status 0 is a transport error
+        self.samples: List[Tuple[str, int, float]] = []
+
+    def _profile(self) -> Dict[str, Any]:
+        if self._recent and self._rnd.random() < self.repeat_ratio:
+            return self._rnd.choice(self._recent)
+        self._seq += 1
+        profile = synthetic_profile(self._rnd, self._seq)
+        self._recent.append(profile)
+        if len(self._recent) > 200:
+            self._recent.pop(0)
+        return profile
+
+    def _next_request(self) -> Tuple[str, str, Any]:
+        if self._rnd.random() < self.batch_ratio:
+            return "/recommend/batch", f"/recommend/batch?top_k={self.top_k}", [self._profile() for _ in range(self.batch_size)]
+        return "/recommend", f"/recommend?top_k={self.top_k}", self._profile()
+
+    async def _send(self, endpoint: str, path: str, body: Any, started: float) -> None:
+        try:
+            resp = await self.client.post(path, json=body)
+            status = resp.status_code
+        except Exception as e:
+            logger.debug("request to %s failed: %s", endpoint, e)
+            status = 0
+        self.samples.append((endpoint, status, (time.perf_counter() - started) * 1000.0))
+
+    async def _closed_loop(self, deadline: float, limit: Optional[int]) -> None:
+        async def worker() -> None:
+            while time.perf_counter() < deadline and (limit is None or self._issued < limit):
+                self._issued += 1
+                endpoint, path, body = self._next_request()
+                await self._send(endpoint, path, body, time.perf_counter())
+
+        await asyncio.gather(*(worker() for _ in range(self.concurrency)))
+
+    async def _open_loop(self, deadline: float, limit: Optional[int]) -> None:
+        slots = asyncio.Semaphore(self.concurrency)
+
+        async def arrival(endpoint: str, path: str, body: Any, scheduled: float) -> None:
+            async with slots:
+                await self._send(endpoint, path, body, scheduled)
+
+        tasks = []
+        scheduled = time.perf_counter()
+        while scheduled < deadline and (limit is None or self._issued < limit):
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self._issued += 1
+            tasks.append(asyncio.ensure_future(arrival(*self._next_request(), scheduled)))
+            scheduled += self._rnd.expovariate(self.rate)
+        await asyncio.gather(*tasks)
+
+    async def run(self, duration_s: float = 30.0, requests: Optional[int] = None, warmup_requests: int = 0) -> float:
+        """Drive the target; returns the measured wall time in seconds (warm-up excluded)."""
+        self._issued = 0
+        if warmup_requests:
+            await self._closed_loop(time.perf_counter() + duration_s, warmup_requests)
+            self.samples.clear()
+            self._issued = 0
+        start = time.perf_counter()
+        deadline = start + duration_s if requests is None else float("inf")
+        if self.rate > 0:
+            await self._open_loop(deadline, requests)
+        else:
+            await self._closed_loop(deadline, requests)
+        return time.perf_counter() - start
+
+# ---------------------------- Reports --------------------------------- #
+
+def _percentile(ordered: List[float], q: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+def summarize(samples: List[Tuple[str, int, float]], elapsed_s: float) -> Dict[str, Dict[str, Any]]:
+    """Per-endpoint (and "all") throughput, error count and latency percentiles."""
+    groups: Dict[str, List[Tuple[str, int, float]]] = {}
+    for sample in samples:
+        groups.setdefault(sample[0], []).append(sample)
+    groups["all"] = list(samples)
+    out: Dict[str, Dict[str, Any]] = {}
+    for endpoint, rows in groups.items():
+        latencies = sorted(r[2] for r in rows)
+        statuses: Dict[str, int] = {}
+        for r in rows:
+            statuses[str(r[1])] = statuses.get(str(r[1]), 0) + 1
+        out[endpoint] = {
+            "requests": len(rows),
+            "errors": sum(1 for r in rows if not 200 <= r[1] < 300),
+            "statuses": statuses,
+            "throughput_rps": round(len(rows) / elapsed_s, 2) if elapsed_s > 0 else 0.0,
+            "mean_ms": round(sum(latencies) / len(latencies), 2) if latencies else 0.0,
+            "p50_ms": round(_percentile(latencies, 0.50), 2),
+            "p95_ms": round(_percentile(latencies, 0.95), 2),
+            "p99_ms": round(_percentile(latencies, 0.99), 2),
+            "max_ms": round(latencies[-1], 2) if latencies else 0.0,
+        }
+    return out
+
+def format_report(result: Dict[str, Any]) -> str:
+    lines = [f"{'endpoint':<18}{'reqs':>7}{'errs':>6}{'rps':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}"]
+    for endpoint, s in result["endpoints"].items():
+        lines.append(
+            f"{endpoint:<18}{s['requests']:>7}{s['errors']:>6}{s['throughput_rps']:>9.1f}"
+            f"{s['p50_ms']:>9.1f}{s['p95_ms']:>9.1f}{s['p99_ms']:>9.1f}{s['max_ms']:>9.1f}"
+        )
+    return "\n".join(lines)
+
+_COMPARED = ("throughput_rps", "p50_ms", "p95_ms", "p99_ms", "max_ms", "errors")
+
+def compare(base: Dict[str, Any], new: Dict[str, Any]) -> str:
+    """Side-by-side of two saved runs with relative change per metric."""
+    lines = [f"base: {base['meta'].get('label')} ({base['meta'].get('started_at')})",
+             f"new:  {new['meta'].get('label')} ({new['meta'].get('started_at')})"]
+    for endpoint in base["endpoints"]:
+        if endpoint not in new["endpoints"]:
+            continue
+        lines.append(f"\n{endpoint}")
+        for metric in _COMPARED:
+            a = base["endpoints"][endpoint][metric]
+            b = new["endpoints"][endpoint][metric]
+            change = f"{(b - a) / a * 100.0:+.1f}%" if a else "n/a"
+            lines.append(f"  {metric:<16}{a:>10}{b:>10}{change:>10}")
+    return "\n".join(lines)
+
+# ------------------------------ CLI ----------------------------------- #
+
+async def _run(args: argparse.Namespace) -> Dict[str, Any]:
+    import httpx
+
+    logging.getLogger("httpx").setLevel(logging.WARNING)  # one INFO line per request otherwise
+    server = None
+    if args.url:
+        target, client = args.url, httpx.AsyncClient(base_url=args.url, timeout=args.timeout)
+    else:
+        catalog_size = seed_catalog(args.catalog, args.catalog_size)
+        app = local_app(args.catalog)
+        if args.serve:
+            server = serve_local(app, args.serve)
+            target = f"http://127.0.0.1:{args.serve}"
+            client = httpx.AsyncClient(base_url=target, timeout=args.timeout)
+        else:
+            target = "in-process"
+            client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://loadtest", timeout=args.timeout)
+    try:
+        gen = LoadGenerator(client, args.concurrency, args.rate, args.batch_ratio, args.batch_size,
+                            args.repeat_ratio, args.top_k, args.seed)
+        started_at = datetime.now().isoformat(timespec="seconds")
+        elapsed = await gen.run(args.duration, args.requests, args.warmup)
+    finally:
+        await client.aclose()
+        if server is not None:
+            server.should_exit = True
+    return {
+        "meta": {
+            "label": args.label,
+            "started_at": started_at,
+            "target": target,
+            "mode": "open" if args.rate > 0 else "closed",
+            "concurrency": args.concurrency,
+            "rate": args.rate,
+            "elapsed_s": round(elapsed, 3),
+            "batch_ratio": args.batch_ratio,
+            "batch_size": args.batch_size,
+            "repeat_ratio": args.repeat_ratio,
+            "top_k": args.top_k,
+            "seed": args.seed,
+            "catalog_size": None if args.url else catalog_size,
+        },
+        "endpoints": summarize(gen.samples, elapsed),
+    }
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.loadtest", description="Load-test /recommend and /recommend/batch")
+    sub = parser.add_subparsers(dest="command", required=True)
+    run = sub.add_parser("run", help="Generate load and report latency percentiles per endpoint")
+    run.add_argument("--url", default=None, help="Running server to target (default: the app in-process)")
+    run.add_argument("--serve", type=int, default=0, metavar="PORT",
+                     help="Serve the app on 127.0.0.1:PORT and drive it over HTTP")
+    run.add_argument("--catalog", default=LOADTEST_CATALOG, help="SQLite stand-in catalog (default: $LOADTEST_CATALOG)")
+    run.add_argument("--catalog-size", type=int, default=20000, help="Internships to seed into a new stand-in catalog")
+    run.add_argument("--duration", type=float, default=30.0, help="Seconds to run (ignored with --requests)")
+    run.add_argument("--requests", type=int, default=None, help="Stop after this many requests")
+    run.add_argument("--warmup", type=int, default=20, help="Unmeasured requests sent first")
+    run.add_argument("--concurrency", type=int, default=8, help="Workers (closed loop) or max in flight (open loop)")
+    run.add_argument("--rate", type=float, default=0.0, help="Open-loop arrival rate per second (0: closed loop)")
+    run.add_argument("--batch-ratio", type=float, default=0.1, help="Share of requests sent to /recommend/batch")
+    run.add_argument("--batch-size", type=int, default=10)
+    run.add_argument("--repeat-ratio", type=float, default=0.1, help="Share of profiles resent from recent ones")
+    run.add_argument("--top-k", type=int, default=5)
+    run.add_argument("--timeout", type=float, default=30.0)
+    run.add_argument("--seed", type=int, default=42)
+    run.add_argument("--label", default="run")
+    run.add_argument("--save", default=LOADTEST_DIR, help="Directory for the run's JSON (default: $LOADTEST_DIR; '' to skip)")
+    cmp_ = sub.add_parser("compare", help="Compare two saved runs")
+    cmp_.add_argument("base")
+    cmp_.add_argument("new")
+    args = parser.parse_args(argv)
+
+    if args.command == "compare":
+        with open(args.base, encoding="utf-8") as a, open(args.new, encoding="utf-8") as b:
+            print(compare(json.load(a), json.load(b)))
+        return 0
+
+    result = asyncio.run(_run(args))
+    print(format_report(result))
+    if args.save:
+        os.makedirs(args.save, exist_ok=True)
+        path = os.path.join(args.save, f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{args.label}.json")
+        with open(path, "w", encoding="utf-8") as fh:
+            json.dump(result, fh, indent=2)
+        print(f"saved {path}")
+    return 0
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    raise SystemExit(main())
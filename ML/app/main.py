@@ -1,15 +1,28 @@
+import hmac
+import json
 import time
 import logging
+import threading
+from contextlib import asynccontextmanager
 from datetime import datetime
-from typing import Dict, Any, List, Optional, Tuple
-from fastapi import FastAPI, HTTPException, Request, Depends
+from typing import Dict, Any, List, Optional, Tuple, Literal
+from fastapi import FastAPI, HTTPException, Request, Depends, Header, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel, Field, field_validator
 
-from app.recommender import Recommender
+from app.admission import AdmissionController, Overloaded, INTERACTIVE, BULK
+from app.recommender import Recommender, CursorExpiredError
 from app.database import get_database, DatabaseManager
+from app.diagnostics import get_query_recorder
 from app.models import RecommendationResponse, HealthResponse
+from app.profiling import MemoryMonitor, catalog_structures, pipeline_stage, profile_call, TRACEMALLOC_TOP
+from app.singleflight import SingleFlight
+from app.slowlog import SlowRequestRecorder
+from app.startup import WarmUp
 from app.utils import (
     get_config,
     setup_logging,
@@ -17,6 +30,8 @@ from app.utils import (
     validate_student_profile,
     sanitize_student_profile,
     format_processing_time,
+    profile_fingerprint,
+    LazyStr,
 )
 
 # --------------------------- Setup -------------------------------- #
@@ -28,6 +43,34 @@ logger = logging.getLogger("pm_internship_ai.api")
 # Global recommender instance
 recommender = Recommender()
 
+# Identical concurrent /recommend bodies share one computation
+recommend_flight = SingleFlight("recommend")
+
+# RSS history for /admin/memory
+memory_monitor = MemoryMonitor()
+
+# Replayable bundles for slow /recommend calls (see app.replay)
+slow_requests = SlowRequestRecorder()
+
+# Priority lanes: interactive /recommend ahead of bulk /recommend/batch
+admission = AdmissionController()
+
+# --------------------------- Lifespan ------------------------------ #
+
+warmup = WarmUp()
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    # off the event loop: connect() can take the full server selection timeout,
+    # and /health must answer while the worker warms up (/ready does not)
+    threading.Thread(target=warmup.run, args=(recommender, config), name="warm-up", daemon=True).start()
+    memory_monitor.start()
+    yield
+    warmup.stop()
+    memory_monitor.stop()
+    if recommender.pools is not None:
+        recommender.pools.stop()
+
 # FastAPI app
 app = FastAPI(
     title="PM Internship AI Recommender",
@@ -35,6 +78,7 @@ app = FastAPI(
     version="1.0.0",
     docs_url="/docs",
     redoc_url="/redoc",
+    lifespan=lifespan,
 )
 
 # CORS
@@ -46,6 +90,20 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Response compression per Accept-Encoding: brotli when the optional
+# brotli-asgi package is installed, gzip otherwise. Brotli sits inside gzip,
+# which passes already-encoded responses through.
+if config.get("response_compression"):
+    min_bytes = int(config.get("compression_min_bytes", 1024))
+    try:
+        from brotli_asgi import BrotliMiddleware
+
+        app.add_middleware(BrotliMiddleware, quality=int(config.get("brotli_quality", 4)),
+                           minimum_size=min_bytes, gzip_fallback=False)
+    except ImportError:
+        logger.info("brotli-asgi not installed; responses are gzip-compressed only")
+    app.add_middleware(GZipMiddleware, minimum_size=min_bytes, compresslevel=int(config.get("gzip_level", 6)))
+
 # --------------------------- Request Models (unchanged) ------------- #
 
 class Location(BaseModel):
@@ -79,12 +137,41 @@ class StudentProfile(BaseModel):
 # --------------------------- Dependencies --------------------------- #
 
 def get_db():
-    """Dependency to get database connection."""
+    """
+    Dependency to get database connection. While the circuit breaker is open
+    the manager is returned unconnected so the recommender can serve stale
+    results instead of waiting on MongoDB. Not required at all when the
+    recommender reads from a SQLite catalog or a snapshot.
+    """
     db = get_database()
-    if not db.connect():
+    if not recommender.uses_mongo:
+        return db
+    if not db.ensure_connected() and not db.is_degraded():
         raise HTTPException(status_code=503, detail={"error": "Service unavailable", "details": {"db": "connection failed"}})
     return db
 
+def require_admin(x_admin_token: Optional[str] = Header(default=None)) -> None:
+    """Guard for /admin/* endpoints; they do not exist unless ADMIN_TOKEN is set."""
+    expected = config.get("admin_token") or ""
+    if not expected:
+        raise HTTPException(status_code=404, detail={"error": "Not found"})
+    if not x_admin_token or not hmac.compare_digest(x_admin_token, expected):
+        raise HTTPException(status_code=403, detail={"error": "Forbidden", "details": {"auth": "invalid admin token"}})
+
+def _lane(name: str):
+    """Dependency holding a slot in admission lane `name` for the request; 503 + Retry-After when shed."""
+    async def _admitted():
+        try:
+            async with admission.admit(name):
+                yield
+        except Overloaded as e:
+            raise HTTPException(
+                status_code=503,
+                detail={"error": "Service overloaded", "details": {"lane": e.lane, "reason": e.reason, "retry_after": e.retry_after}},
+                headers={"Retry-After": str(e.retry_after)},
+            )
+    return _admitted
+
 # --------------------------- Middleware ---------------------------- #
 
 @app.middleware("http")
@@ -125,14 +212,26 @@ async def log_requests(request: Request, call_next):
 # --------------------------- Endpoints ----------------------------- #
 
 @app.get("/health", response_model=HealthResponse, tags=["Health"])
-async def health_check(db: DatabaseManager = Depends(get_db)):
-    """Health check endpoint."""
+async def health_check():
+    """Liveness: answers from in-process state, without touching MongoDB (see /ready)."""
     try:
+        db = get_database()
+        breaker = db.breaker.snapshot()
+        degraded = breaker["state"] != "closed"
         return HealthResponse(
-            status="healthy",
+            status="degraded" if degraded else "healthy",
             timestamp=datetime.now(),
-            database_connected=True,
+            database_connected=db.internships_collection is not None and not degraded,
             model_loaded=True,
+            additional_info={
+                "indexes": db.index_build_progress(),
+                "circuit_breaker": breaker,
+                "city_pools": recommender.pools.stats() if recommender.pools is not None else None,
+                "coalescing": recommend_flight.stats(),
+                "slow_requests": slow_requests.stats(),
+                "admission": admission.stats(),
+                "warmup": warmup.state,
+            },
         )
     except Exception as e:
         logger.error("Health check failed: %s", e, exc_info=True)
@@ -143,14 +242,25 @@ async def health_check(db: DatabaseManager = Depends(get_db)):
             model_loaded=False,
         )
 
-@app.post("/recommend", response_model=RecommendationResponse, tags=["Recommendations"])
+@app.get("/ready", tags=["Health"])
+async def readiness_check():
+    """Readiness: 503 until startup warm-up has completed, then 200."""
+    return JSONResponse(status_code=200 if warmup.ready else 503, content=warmup.snapshot())
+
+@app.post("/recommend", response_model=RecommendationResponse, tags=["Recommendations"], dependencies=[Depends(_lane(INTERACTIVE))])
 async def get_recommendations(
     student_profile: StudentProfile,
     request: Request,
     top_k: int = 5,
+    page_size: Optional[int] = None,
+    cursor: Optional[str] = None,
     db: DatabaseManager = Depends(get_db),
 ):
-    """Get internship recommendations for a student."""
+    """
+    Get internship recommendations for a student. With `page_size` (and then
+    the returned `next_cursor`) pages through the full cached ranking
+    instead of returning the top_k.
+    """
     start_time = time.time()
     request_id = getattr(request.state, "request_id", create_request_id())
 
@@ -172,18 +282,47 @@ async def get_recommendations(
             )
 
         # Sanitize profile for logging
-        safe_log_profile = sanitize_student_profile(student_data)
-        logger.info("req=%s processing recommend for student=%s", request_id, safe_log_profile.get("id"))
-
-        # Clamp top_k to config
-        max_k = int(config.get("max_recommendations", 5))
-        eff_top_k = max(1, min(int(top_k), max_k))
-
-        # Get recommendations
-        recommendations = recommender.recommend_internships(
-            student_profile=student_data,
-            top_k=eff_top_k,
-        )
+        logger.info("req=%s processing recommend for student=%s", request_id,
+                    LazyStr(lambda d: sanitize_student_profile(d).get("id"), student_data))
+
+        trace = slow_requests.begin()
+        shared = False
+        if page_size is not None or cursor:
+            # Cursor pagination over the cached full ranking
+            max_page = int(config.get("max_page_size", 50))
+            eff_page_size = max(1, min(int(page_size or config.get("max_recommendations", 5)), max_page))
+            try:
+                recommendations = await run_in_threadpool(
+                    recommender.recommend_page,
+                    student_profile=student_data,
+                    page_size=eff_page_size,
+                    cursor=cursor,
+                )
+            except CursorExpiredError as e:
+                raise HTTPException(
+                    status_code=410,
+                    detail={"error": "Cursor expired", "details": {"cursor": str(e)}, "request_id": request_id},
+                )
+            except ValueError as e:
+                raise HTTPException(
+                    status_code=400,
+                    detail={"error": "Invalid cursor", "details": {"cursor": str(e)}, "request_id": request_id},
+                )
+        else:
+            # Clamp top_k to config
+            max_k = int(config.get("max_recommendations", 5))
+            eff_top_k = max(1, min(int(top_k), max_k))
+
+            # Get recommendations (off the event loop; identical in-flight requests coalesce)
+            def _compute():
+                return run_in_threadpool(recommender.recommend_internships, student_profile=student_data, top_k=eff_top_k)
+
+            if config.get("coalesce_requests"):
+                recommendations, shared = await recommend_flight.do(profile_fingerprint(student_data, eff_top_k), _compute)
+                if shared:
+                    logger.info("req=%s coalesced with an identical in-flight request", request_id)
+            else:
+                recommendations = await _compute()
 
         processing_time_ms = (time.time() - start_time) * 1000.0
         logger.info(
@@ -194,6 +333,17 @@ async def get_recommendations(
             recommendations.get("search_radius_used"),
             recommendations.get("total_found"),
         )
+        if not shared:  # a coalesced request is captured by the one that computed it
+            slow_requests.finish(
+                trace,
+                processing_time_ms,
+                request_id=request_id,
+                endpoint="/recommend",
+                profile=student_data,
+                params={"top_k": top_k, "page_size": page_size, "cursor": cursor},
+                result=recommendations,
+                recommender=recommender,
+            )
 
         return RecommendationResponse(**recommendations)
 
@@ -349,20 +499,61 @@ def _update_comparison_row(compare_rows: Dict[str, Dict[str, Any]], iid: str, si
         "distance_km": rec.get("distance_km", 0.0),
     })
 
-def _calculate_batch_statistics(legacy_results: Dict[str, Any], total_time_ms: float, num_students: int) -> Tuple[int, int, float]:
+def _calculate_batch_statistics(students_out: List[Dict[str, Any]], total_time_ms: float, num_students: int) -> Tuple[int, int, float]:
     """Calculate batch processing statistics."""
-    successful = sum(1 for r in legacy_results.values() if "recommendations" in r)
-    failed = sum(1 for r in legacy_results.values() if "error" in r)
+    successful = sum(1 for s in students_out if "recommendations" in s)
+    failed = sum(1 for s in students_out if "error" in s)
     avg_time = (total_time_ms / num_students) if num_students else 0.0
     return successful, failed, avg_time
 
-@app.post("/recommend/batch", response_model=Dict[str, Any], tags=["Recommendations"])
+# Columns of the batch comparison table; keys are compare row fields
+COMPARE_FIELDS = [
+    {"key": "title", "label": "Title"},
+    {"key": "job_role", "label": "Role"},
+    {"key": "sector", "label": "Sector"},
+    {"key": "work_mode", "label": "Mode"},
+    {"key": "location_city", "label": "City"},
+    {"key": "duration_months", "label": "Duration (mo)"},
+    {"key": "expected_salary", "label": "Expected Salary"},
+    {"key": "stipend", "label": "Stipend"},
+    {"key": "compensation_monthly", "label": "Comp (Monthly)"},
+    {"key": "skills", "label": "Key Skills"},
+]
+
+# format=lean: keys resolve against the `internships` table (dotted = nested)
+LEAN_COMPARE_FIELDS = [
+    {**f, "key": "location.city"} if f["key"] == "location_city" else f for f in COMPARE_FIELDS
+]
+
+def _lean_batch_body(students_out: List[Dict[str, Any]], internships_by_id: Dict[str, Dict[str, Any]],
+                     compare_rows: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    format=lean: each internship appears once, in `internships`; compare rows
+    only carry the per-student scores and refer to it by id. The full legacy
+    `results` (complete internship documents per student) are left out.
+    """
+    rows = sorted(compare_rows.values(), key=lambda x: (x.get("title") or "", x.get("id") or ""))
+    return {
+        "students": students_out,
+        "internships": internships_by_id,
+        "compare": {
+            "rows": [{"internship_id": row["id"], "by_student": row["by_student"]} for row in rows],
+            "fields": LEAN_COMPARE_FIELDS,
+        },
+    }
+
+@app.post("/recommend/batch", response_model=Dict[str, Any], tags=["Recommendations"], dependencies=[Depends(_lane(BULK))])
 async def get_batch_recommendations(
     student_profiles: List[StudentProfile],
     request: Request,
     top_k: int = 5,
+    response_format: Literal["full", "lean"] = Query("full", alias="format"),
 ):
-    """Get recommendations for multiple students + a comparison-ready structure."""
+    """
+    Get recommendations for multiple students + a comparison-ready structure.
+    `format=lean` drops the legacy per-student payloads and repeated
+    internship fields (see _lean_batch_body).
+    """
     start_time = time.time()
     request_id = getattr(request.state, "request_id", create_request_id())
 
@@ -378,47 +569,52 @@ async def get_batch_recommendations(
         max_k = int(config.get("max_recommendations", 5))
         eff_top_k = max(1, min(int(top_k), max_k))
 
-        # Process each student
+        # Process each student off the event loop, pausing for interactive traffic in between
         for sp in student_profiles:
-            legacy_result, student_out, elapsed = _process_single_student(
-                sp, eff_top_k, internships_by_id, compare_rows
+            await admission.defer()
+            legacy_result, student_out, elapsed = await run_in_threadpool(
+                _process_single_student, sp, eff_top_k, internships_by_id, compare_rows
             )
-            legacy_results[sp.id] = legacy_result
+            # lean: skip the full per-student results (complete internship documents)
+            if response_format == "full":
+                legacy_results[sp.id] = legacy_result
             students_out.append(student_out)
             total_processing_time += elapsed
 
         total_time_ms = (time.time() - start_time) * 1000.0
-        successful, failed, avg_time = _calculate_batch_statistics(legacy_results, total_processing_time, len(student_profiles))
-
-        # Finalize comparison data
-        compare_internships = list(compare_rows.values())
-        compare_internships.sort(key=lambda x: (x.get("title") or "", x.get("id") or ""))
+        successful, failed, avg_time = _calculate_batch_statistics(students_out, total_processing_time, len(student_profiles))
 
         logger.info(
-            "req=%s batch completed in %s (ok=%d, fail=%d)",
+            "req=%s batch completed in %s (ok=%d, fail=%d, format=%s)",
             request_id,
             format_processing_time(total_time_ms),
             successful,
             failed,
+            response_format,
         )
 
+        if response_format == "lean":
+            return {
+                "request_id": request_id,
+                "format": "lean",
+                **_lean_batch_body(students_out, internships_by_id, compare_rows),
+                "total_students": len(student_profiles),
+                "successful": successful,
+                "failed": failed,
+                "total_processing_time_ms": total_time_ms,
+                "average_processing_time_ms": avg_time,
+            }
+
+        # Finalize comparison data
+        compare_internships = list(compare_rows.values())
+        compare_internships.sort(key=lambda x: (x.get("title") or "", x.get("id") or ""))
+
         return {
             "request_id": request_id,
             "students": students_out,
             "compare": {
                 "internships": compare_internships,
-                "fields": [
-                    {"key": "title", "label": "Title"},
-                    {"key": "job_role", "label": "Role"},
-                    {"key": "sector", "label": "Sector"},
-                    {"key": "work_mode", "label": "Mode"},
-                    {"key": "location_city", "label": "City"},
-                    {"key": "duration_months", "label": "Duration (mo)"},
-                    {"key": "expected_salary", "label": "Expected Salary"},
-                    {"key": "stipend", "label": "Stipend"},
-                    {"key": "compensation_monthly", "label": "Comp (Monthly)"},
-                    {"key": "skills", "label": "Key Skills"},
-                ],
+                "fields": COMPARE_FIELDS,
             },
             "index": {"internships_by_id": internships_by_id},
             "results": legacy_results,
@@ -441,6 +637,66 @@ async def get_batch_recommendations(
             },
         )
 
+# --------------------------- Admin --------------------------------- #
+
+@app.get("/admin/query-plans", tags=["Admin"], dependencies=[Depends(require_admin)])
+async def query_plans(reset: bool = False):
+    """Recorded DatabaseManager query shapes with explain summaries (needs QUERY_DIAGNOSTICS=1)."""
+    recorder = get_query_recorder()
+    summary = recorder.summary()
+    if reset:
+        recorder.clear()
+    return summary
+
+@app.get("/admin/memory", tags=["Admin"], dependencies=[Depends(require_admin)])
+async def memory_report():
+    """Process RSS history, in-process cache sizes and loaded catalog structures."""
+    return {
+        "rss": memory_monitor.report(),
+        "caches": recommender.cache_stats(),
+        "catalog": catalog_structures(),
+    }
+
+@app.post("/admin/memory/profile", tags=["Admin"], dependencies=[Depends(require_admin)])
+async def memory_profile(student_profiles: List[StudentProfile], top_k: int = 5, top: int = TRACEMALLOC_TOP):
+    """
+    Run one recommend (a single profile) or batch (several) under tracemalloc
+    and report the top allocation sites per stage: preprocess, fetch, score
+    and serialize. Slow; meant for a quiet worker.
+    """
+    if not student_profiles:
+        raise HTTPException(status_code=400, detail={"error": "No student profiles", "details": {}})
+    max_k = int(config.get("max_recommendations", 5))
+    eff_top_k = max(1, min(int(top_k), max_k))
+
+    def _run() -> None:
+        if len(student_profiles) == 1:
+            result = recommender.recommend_internships(student_profile=student_profiles[0].model_dump(), top_k=eff_top_k)
+            with pipeline_stage("serialize"):
+                RecommendationResponse(**result).model_dump_json()
+            return
+        internships_by_id: Dict[str, Dict[str, Any]] = {}
+        compare_rows: Dict[str, Dict[str, Any]] = {}
+        outs = [_process_single_student(sp, eff_top_k, internships_by_id, compare_rows) for sp in student_profiles]
+        with pipeline_stage("serialize"):
+            json.dumps(jsonable_encoder({
+                "students": [out[1] for out in outs],
+                "compare": {"internships": list(compare_rows.values())},
+                "index": {"internships_by_id": internships_by_id},
+                "results": {sp.id: out[0] for sp, out in zip(student_profiles, outs)},
+            }))
+
+    try:
+        _, report = await run_in_threadpool(profile_call, _run, top)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail={"error": "Profile in progress", "details": {"message": str(e)}})
+    return {
+        "mode": "recommend" if len(student_profiles) == 1 else "batch",
+        "students": len(student_profiles),
+        "top_k": eff_top_k,
+        **report,
+    }
+
 # --------------------------- Error Handlers -------------------------- #
 
 @app.exception_handler(HTTPException)
@@ -456,6 +712,7 @@ async def http_exception_handler(request: Request, exc: HTTPException):
             "details": detail.get("details", detail),
             "request_id": request_id,
         },
+        headers=getattr(exc, "headers", None),
     )
 
 @app.exception_handler(Exception)
@@ -483,6 +740,7 @@ async def root():
         "description": "AI-powered internship recommendation system",
         "endpoints": {
             "health": "/health",
+            "ready": "/ready",
             "recommend": "/recommend",
             "batch_recommend": "/recommend/batch",
             "docs": "/docs",
@@ -491,11 +749,12 @@ async def root():
 
 # --------------------------- Entrypoint ------------------------------ #
 
+# Development server (single worker, auto-reload); production: python -m app.server
 if __name__ == "__main__":
     import uvicorn
 
     logger.info(
-        "Starting server on %s:%s with auto-reload enabled",
+        "Starting development server on %s:%s with auto-reload enabled",
         config["api_host"],
         config["api_port"],
     )
@@ -123,6 +123,11 @@ class RecommendationResponse(BaseModel):
     total_found: int = Field(..., ge=0)
     search_radius_used: int = Field(..., ge=0)
     processing_time_ms: float = Field(..., ge=0.0)
+    # True when served from cached candidates because the database was unavailable
+    stale: bool = False
+    # cursor pagination (/recommend?page_size=): cursor for the next page, None on the last
+    next_cursor: Optional[str] = None
+    total_ranked: Optional[int] = None
 
 
 class HealthResponse(BaseModel):
@@ -0,0 +1,293 @@
+import os
+import time
+import logging
+import threading
+from bisect import bisect_right
+from dataclasses import dataclass
+from datetime import datetime
+from functools import lru_cache
+from typing import List, Dict, Any, Optional, Tuple, Callable
+
+from app.preprocessing import preprocess_internship, calculate_distance_km
+from app.database import (
+    DatabaseUnavailableError,
+    MATCH_FIELDS,
+    SCORING_PROJECTION,
+    canonical_match_fields,
+    nearest_filter_predicate,
+)
+from app.tables import CITY_COORDINATES
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------- Config ---------------------------------- #
+
+# Materialized per-city shortlist pools (off by default; started with the API)
+CITY_POOLS = os.getenv("CITY_POOLS", "0").strip().lower() in {"1", "true", "yes", "on"}
+# Largest radius tier a pool answers; bigger tiers go to the live query
+CITY_POOL_RADIUS_KM = int(os.getenv("CITY_POOL_RADIUS_KM", "60") or 60)
+# Students this close to a city centre are served from its pool
+CITY_POOL_SLACK_KM = int(os.getenv("CITY_POOL_SLACK_KM", "15") or 15)
+# Cap per city; a capped pool only covers up to its farthest member
+CITY_POOL_MAX_SIZE = int(os.getenv("CITY_POOL_MAX_SIZE", "3000") or 3000)
+# Incremental refresh (new documents by created_at) and full rebuild periods
+CITY_POOL_REFRESH_SECONDS = float(os.getenv("CITY_POOL_REFRESH_SECONDS", "300") or 300)
+CITY_POOL_FULL_REFRESH_SECONDS = float(os.getenv("CITY_POOL_FULL_REFRESH_SECONDS", "3600") or 3600)
+CITY_POOL_INCREMENTAL_BATCH = int(os.getenv("CITY_POOL_INCREMENTAL_BATCH", "2000") or 2000)
+
+# ----------------------------- Types ---------------------------------- #
+
+# (raw lean document, preprocessed document, geo lat, geo lon)
+_Entry = Tuple[Dict[str, Any], Dict[str, Any], float, float]
+
+@dataclass(frozen=True)
+class _Pool:
+    """One city's members sorted by distance from the centre. Replaced, never mutated."""
+    centre_km: Tuple[float, ...]
+    entries: Tuple[_Entry, ...]
+    covered_km: float  # every matching internship strictly closer than this is a member
+
+def _point(doc: Dict[str, Any], geo_field: str) -> Optional[Tuple[float, float]]:
+    """(lat, lon) of the document's geo field, falling back to location.lat/lon."""
+    point = doc.get(geo_field)
+    coords = point.get("coordinates") if isinstance(point, dict) else None
+    if coords and len(coords) >= 2 and coords[0] is not None and coords[1] is not None:
+        return float(coords[1]), float(coords[0])
+    loc = doc.get("location") or {}
+    if isinstance(loc, dict) and loc.get("lat") is not None and loc.get("lon") is not None:
+        return float(loc["lat"]), float(loc["lon"])
+    return None
+
+# ---------------------------- Manager --------------------------------- #
+
+class CityPoolManager:
+    """
+    Preference-free candidate pools around each CITY_COORDINATES centre,
+    covering `radius_km + slack_km` so any student within `slack_km` of a
+    centre can be answered for tiers up to `radius_km`: everything within
+    r of the student lies within r + slack of the centre. A query is then
+    the live filter (nearest_filter_predicate) plus a distance sort over
+    the pool, with the same results as find_nearest_internships.
+
+    A background thread rebuilds every pool on `full_refresh_seconds` and,
+    in between, merges internships created since the newest `created_at`
+    seen (backends without find_internships_created_since only get full
+    rebuilds). Updates and deletions are picked up by the full rebuild;
+    winners are re-read by id (two-phase fetch) either way.
+    """
+
+    def __init__(
+        self,
+        catalog: Callable[[], Any],
+        geo_field: str = "location_point_exact",
+        radius_km: int = CITY_POOL_RADIUS_KM,
+        slack_km: int = CITY_POOL_SLACK_KM,
+        max_size: int = CITY_POOL_MAX_SIZE,
+        refresh_seconds: float = CITY_POOL_REFRESH_SECONDS,
+        full_refresh_seconds: float = CITY_POOL_FULL_REFRESH_SECONDS,
+    ) -> None:
+        self._catalog = catalog
+        self.geo_field = geo_field
+        self.radius_km = radius_km
+        self.slack_km = slack_km
+        self.max_size = max(1, int(max_size))
+        self.refresh_seconds = refresh_seconds
+        self.full_refresh_seconds = full_refresh_seconds
+        self._pools: Dict[str, _Pool] = {}
+        self._watermark: Any = None  # newest created_at seen (datetime or ISO string)
+        self._refresh_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._built_at = 0.0
+        self._refreshed_at = 0.0
+        self.hits = 0
+        self.misses = 0
+
+    # --------------------------- Building ----------------------------- #
+    def _projection(self) -> Dict[str, Any]:
+        return {**SCORING_PROJECTION, self.geo_field: 1}
+
+    def _entry(self, raw: Dict[str, Any]) -> Optional[_Entry]:
+        point = _point(raw, self.geo_field)
+        if point is None:
+            return None
+        try:
+            doc = preprocess_internship(raw)
+        except Exception as e:
+            logger.warning("Internship preprocess failed (id=%s): %s", raw.get("id"), e)
+            return None
+        if not all(f in raw for f in MATCH_FIELDS):  # not backfilled, or not from MongoDB
+            raw = {**raw, **canonical_match_fields(raw)}
+        return raw, doc, point[0], point[1]
+
+    def _advance_watermark(self, docs: List[Dict[str, Any]]) -> None:
+        for raw in docs:
+            created = raw.get("created_at")
+            if not isinstance(created, (datetime, str)):
+                continue
+            if self._watermark is None or (type(created) is type(self._watermark) and created > self._watermark):
+                self._watermark = created
+
+    def rebuild(self, cities: Optional[List[str]] = None) -> int:
+        """Re-read every city's pool from the catalog. Returns the number of pools built."""
+        pool_km = self.radius_km + self.slack_km
+        catalog = self._catalog()
+        built: Dict[str, _Pool] = {}
+        start = time.perf_counter()
+        with self._refresh_lock:
+            for city in cities or list(CITY_COORDINATES):
+                coords = CITY_COORDINATES.get(city)
+                if coords is None:
+                    continue
+                clat, clon = float(coords["lat"]), float(coords["lon"])
+                docs = catalog.find_nearest_internships(
+                    user_lat=clat,
+                    user_lon=clon,
+                    preference=None,
+                    n=self.max_size,
+                    geo_field=self.geo_field,
+                    max_distance_km=pool_km + 1,  # margin for the server's distance metric
+                    projection=self._projection(),
+                ) or []
+                self._advance_watermark(docs)
+                members = []
+                for raw in docs:
+                    entry = self._entry(raw)
+                    if entry is not None:
+                        members.append((calculate_distance_km(clat, clon, entry[2], entry[3]), entry))
+                members.sort(key=lambda m: m[0])
+                # a full pool is only complete up to its farthest member
+                covered = members[-1][0] if len(docs) >= self.max_size and members else float(pool_km)
+                built[city] = _Pool(tuple(m[0] for m in members), tuple(m[1] for m in members), covered)
+            self._pools = built
+            self._built_at = self._refreshed_at = time.time()
+        logger.info("Built %d city pools (%d memberships) in %.0fms", len(built),
+                    sum(len(p.entries) for p in built.values()), (time.perf_counter() - start) * 1000.0)
+        return len(built)
+
+    def refresh_incremental(self) -> int:
+        """Merge internships created since the watermark into every pool they fall in."""
+        catalog = self._catalog()
+        fetch = getattr(catalog, "find_internships_created_since", None)
+        if fetch is None or self._watermark is None or not self._pools:
+            return 0
+        with self._refresh_lock:
+            docs = fetch(self._watermark, self._projection(), CITY_POOL_INCREMENTAL_BATCH) or []
+            if not docs:
+                self._refreshed_at = time.time()
+                return 0
+            entries = [e for e in (self._entry(raw) for raw in docs) if e is not None]
+            new_ids = {str(e[0].get("id")) for e in entries}
+            pools = dict(self._pools)
+            for city, pool in pools.items():
+                coords = CITY_COORDINATES[city]
+                added = [
+                    (d, e) for d, e in (
+                        (calculate_distance_km(coords["lat"], coords["lon"], e[2], e[3]), e) for e in entries
+                    )
+                    if d < pool.covered_km
+                ]
+                if not added:
+                    continue
+                members = [(d, e) for d, e in zip(pool.centre_km, pool.entries) if str(e[0].get("id")) not in new_ids]
+                members.extend(added)
+                members.sort(key=lambda m: m[0])
+                covered = pool.covered_km
+                if len(members) > self.max_size:
+                    covered = members[self.max_size][0]
+                    members = members[: self.max_size]
+                pools[city] = _Pool(tuple(m[0] for m in members), tuple(m[1] for m in members), covered)
+            self._pools = pools
+            self._advance_watermark(docs)
+            self._refreshed_at = time.time()
+        logger.info("City pools: merged %d new internships", len(entries))
+        return len(entries)
+
+    # --------------------------- Background --------------------------- #
+    def start(self) -> threading.Thread:
+        """Start the refresh thread (its first iteration builds the pools unless already built)."""
+        if self._thread is not None and self._thread.is_alive():
+            return self._thread
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="city-pools", daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run(self) -> None:
+        # pools built before start() (startup warm-up) wait for the next full period
+        next_full = time.monotonic() + self.full_refresh_seconds if self._pools else 0.0
+        while not self._stop.is_set():
+            now = time.monotonic()
+            try:
+                if now >= next_full:
+                    self.rebuild()
+                    next_full = now + self.full_refresh_seconds
+                else:
+                    self.refresh_incremental()
+            except DatabaseUnavailableError as e:
+                logger.warning("City pool refresh skipped: %s", e)
+            except Exception as e:
+                logger.exception("City pool refresh failed: %s", e)
+            self._stop.wait(self.refresh_seconds)
+
+    # ----------------------------- Query ------------------------------ #
+    @staticmethod
+    @lru_cache(maxsize=4096)
+    def _nearest_centre(lat: float, lon: float) -> Tuple[str, float]:
+        return min(
+            ((c, calculate_distance_km(lat, lon, v["lat"], v["lon"])) for c, v in CITY_COORDINATES.items()),
+            key=lambda cd: cd[1],
+        )
+
+    def nearest(
+        self,
+        lat: float,
+        lon: float,
+        preference: Optional[Dict[str, Any]],
+        radius_km: int,
+        n: int,
+    ) -> Optional[List[Dict[str, Any]]]:
+        """
+        Preprocessed nearest `n` internships matching `preference` within
+        `radius_km`, closest first, or None when the pools cannot answer
+        (not near a city centre, radius beyond the pool, pools not built).
+        """
+        if not self._pools:
+            return None
+        city, offset_km = self._nearest_centre(round(float(lat), 4), round(float(lon), 4))
+        pool = self._pools.get(city)
+        reach = offset_km + float(radius_km)
+        if pool is None or offset_km > self.slack_km or reach >= pool.covered_km:
+            self.misses += 1
+            return None
+        self.hits += 1
+
+        accept = nearest_filter_predicate(preference)
+        hits: List[Tuple[float, int, Dict[str, Any]]] = []
+        for pos in range(bisect_right(pool.centre_km, reach)):
+            raw, doc, plat, plon = pool.entries[pos]
+            if not accept(raw):
+                continue
+            d = calculate_distance_km(float(lat), float(lon), plat, plon)
+            if d <= radius_km:
+                hits.append((d, pos, doc))
+        hits.sort(key=lambda h: (h[0], h[1]))
+        return [doc for _, _, doc in hits[: max(0, int(n))]]
+
+    def stats(self) -> Dict[str, Any]:
+        pools = self._pools
+        return {
+            "cities": len(pools),
+            "memberships": sum(len(p.entries) for p in pools.values()),
+            "capped": sum(1 for p in pools.values() if len(p.entries) >= self.max_size),
+            "radius_km": self.radius_km,
+            "slack_km": self.slack_km,
+            "hits": self.hits,
+            "misses": self.misses,
+            "built_at": self._built_at or None,
+            "refreshed_at": self._refreshed_at or None,
+            "watermark": str(self._watermark) if self._watermark is not None else None,
+        }
@@ -1,6 +1,5 @@
 import re
-from typing import List, Dict, Any, Iterable
-from haversine import haversine
+from typing import List, Dict, Any, Iterable, Callable, Optional
 
 # ----------------------------- Synonyms -------------------------------- #
 
@@ -156,8 +155,41 @@ def normalize_job_roles(roles: List[str]) -> List[str]:
 def normalize_sectors(sectors: List[str]) -> List[str]:
     return [normalize_text(s) for s in (sectors or []) if s is not None]
 
+# ----------------------------- Match text ------------------------------ #
+
+def internship_text(internship: Dict[str, Any]) -> str:
+    """Free text describing an internship for TF-IDF / embedding matchers."""
+    parts = [
+        internship.get("title", ""),
+        internship.get("job_role", ""),
+        internship.get("sector", ""),
+        " ".join(str(s) for s in (internship.get("skills") or []) if s),
+        internship.get("description", ""),
+    ]
+    return normalize_text(" ".join(str(p) for p in parts if p))
+
+def student_text(student: Dict[str, Any]) -> str:
+    """Free text describing a (scoring) student profile for the same matchers."""
+    parts = [
+        student.get("job_role", ""),
+        student.get("sector", ""),
+        " ".join(str(s) for s in (student.get("skills") or []) if s),
+        " ".join(str(s) for s in (student.get("interests") or []) if s),
+    ]
+    return normalize_text(" ".join(str(p) for p in parts if p))
+
 # ------------------------------ Geo ------------------------------------ #
 
+# haversine pulls in numpy at import time; resolve it on first distance call
+_haversine: Optional[Callable[..., float]] = None
+
+def _get_haversine() -> Callable[..., float]:
+    global _haversine
+    if _haversine is None:
+        from haversine import haversine
+        _haversine = haversine
+    return _haversine
+
 def calculate_distance_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
     """
     Calculate great-circle distance using haversine; safe against None/NaN.
@@ -168,7 +200,7 @@ def calculate_distance_km(lat1: float, lon1: float, lat2: float, lon2: float) ->
         p2 = (float(lat2), float(lon2))
         if p1 == p2:
             return 0.0
-        return float(haversine(p1, p2))
+        return float((_haversine or _get_haversine())(p1, p2))
     except Exception:
         return 0.0
 
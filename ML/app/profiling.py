@@ -0,0 +1,272 @@
+import os
+import sys
+import time
+import logging
+import sysconfig
+import threading
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Any, Optional, Tuple, Callable, Iterator
+
+from app.slowlog import current_trace
+from app.utils import get_memory_usage
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------- Config ---------------------------------- #
+
+# RSS sampling period for the memory history (0 disables the sampler)
+MEMORY_SAMPLE_SECONDS = float(os.getenv("MEMORY_SAMPLE_SECONDS", "30") or 0)
+# Samples kept (240 x 30s = 2 hours)
+MEMORY_HISTORY_SIZE = int(os.getenv("MEMORY_HISTORY_SIZE", "240") or 240)
+# Allocation sites reported per stage by a tracemalloc profile
+TRACEMALLOC_TOP = int(os.getenv("TRACEMALLOC_TOP", "10") or 10)
+# Frames stored per allocation while a profile runs (more is slower and bigger)
+TRACEMALLOC_FRAMES = int(os.getenv("TRACEMALLOC_FRAMES", "1") or 1)
+
+_MB = 1024.0 * 1024.0
+
+# --------------------------- RSS history ------------------------------ #
+
+class MemoryMonitor:
+    """Samples process RSS on a daemon thread into a bounded history."""
+
+    def __init__(self, interval_seconds: float = MEMORY_SAMPLE_SECONDS, size: int = MEMORY_HISTORY_SIZE) -> None:
+        self.interval_seconds = interval_seconds
+        self._samples: "deque[Tuple[float, float]]" = deque(maxlen=max(2, int(size)))
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.peak_rss_mb = 0.0
+
+    def sample(self) -> Optional[float]:
+        rss = get_memory_usage().get("rss_mb")
+        if rss is None:
+            return None
+        with self._lock:
+            self._samples.append((time.time(), float(rss)))
+            self.peak_rss_mb = max(self.peak_rss_mb, float(rss))
+        return float(rss)
+
+    def start(self) -> None:
+        if self.interval_seconds <= 0 or (self._thread is not None and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="memory-monitor", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.sample()
+            except Exception as e:
+                logger.warning("RSS sample failed: %s", e)
+            self._stop.wait(self.interval_seconds)
+
+    def report(self) -> Dict[str, Any]:
+        """Current usage, peak, samples and the RSS growth rate over the window."""
+        current = get_memory_usage()
+        with self._lock:
+            samples = list(self._samples)
+        growth = None
+        if len(samples) >= 2 and samples[-1][0] - samples[0][0] >= 60.0:
+            hours = (samples[-1][0] - samples[0][0]) / 3600.0
+            growth = round((samples[-1][1] - samples[0][1]) / hours, 2)
+        return {
+            "current": current,
+            "peak_rss_mb": round(max(self.peak_rss_mb, float(current.get("rss_mb") or 0.0)), 1),
+            "growth_mb_per_hour": growth,
+            "interval_seconds": self.interval_seconds,
+            "history": [{"t": round(t, 1), "rss_mb": round(rss, 1)} for t, rss in samples],
+        }
+
+# ------------------------ Catalog structures -------------------------- #
+
+def _nbytes(*arrays: Any) -> int:
+    return int(sum(getattr(a, "nbytes", 0) for a in arrays))
+
+def catalog_structures() -> Dict[str, Any]:
+    """
+    Sizes of the loaded catalog snapshot and TF-IDF / embedding / ANN
+    indexes. Only inspects what is already loaded; never triggers a load.
+    Memory-mapped arrays are reported separately: their pages are shared
+    and only count towards RSS once touched.
+    """
+    out: Dict[str, Any] = {}
+    snapshot = getattr(sys.modules.get("app.snapshot"), "_snapshot", None)
+    if snapshot is not None:
+        out["snapshot"] = {
+            "version": snapshot.version,
+            "count": snapshot.count,
+            "mapped_mb": round(snapshot.mapped_bytes() / _MB, 2),
+        }
+    tfidf = getattr(sys.modules.get("app.semantic"), "_index", None)
+    if tfidf is not None:
+        m = tfidf.matrix
+        out["tfidf"] = {
+            "rows": m.shape[0],
+            "terms": m.shape[1],
+            "nnz": int(m.nnz),
+            "heap_mb": round(_nbytes(m.data, m.indices, m.indptr) / _MB, 2),
+        }
+    matcher = getattr(sys.modules.get("app.embeddings"), "_matcher", None)
+    if matcher is not None:
+        out["embeddings"] = {
+            "count": matcher.store.count,
+            "dim": matcher.store.dim,
+            "mapped_mb": round(_nbytes(matcher.store.vectors) / _MB, 2),
+            "profile_cache": {"entries": len(matcher.cache), "maxsize": matcher.cache.maxsize},
+        }
+    ann = getattr(sys.modules.get("app.ann"), "_index", None)
+    if ann is not None:
+        out["ann"] = {
+            "tables": ann.tables,
+            "bits": ann.bits,
+            "heap_mb": round(_nbytes(ann.planes, ann.keys, ann.rows) / _MB, 2),
+        }
+    return out
+
+# ------------------------ Per-stage tracemalloc ----------------------- #
+
+_active: ContextVar[Optional["StageProfile"]] = ContextVar("memory_stage_profile", default=None)
+_profile_lock = threading.Lock()
+
+# longest first, so site-packages wins over the stdlib directory containing it
+_PATH_PREFIXES = sorted(
+    {p for p in (sysconfig.get_paths().get(k) for k in ("purelib", "platlib", "stdlib", "platstdlib")) if p}
+    | {os.path.dirname(os.path.dirname(os.path.abspath(__file__)))},
+    key=len,
+    reverse=True,
+)
+
+def _site(frame: tracemalloc.Frame) -> str:
+    """`file:line` relative to site-packages, the stdlib or the project root."""
+    path = frame.filename
+    for prefix in _PATH_PREFIXES:
+        if path.startswith(prefix + os.sep):
+            path = path[len(prefix) + 1:]
+            break
+    return f"{path}:{frame.lineno}"
+
+class StageProfile:
+    """
+    tracemalloc snapshots taken around each pipeline stage of one call.
+    Per stage: calls, time, net traced memory retained (allocated and not
+    freed by the end of the stage), the highest transient peak, and the
+    allocation sites that grew most. Stages entered several times (one per
+    student in a batch) accumulate.
+    """
+
+    _FILTERS = (
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, __file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+    )
+
+    def __init__(self, top: int = TRACEMALLOC_TOP) -> None:
+        self.top = max(1, int(top))
+        self._stages: Dict[str, Dict[str, Any]] = {}
+        self._current: Optional[str] = None
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        if self._current is not None:  # nested stages count towards the outer one
+            yield
+            return
+        self._current = name
+        before = tracemalloc.take_snapshot().filter_traces(self._FILTERS)
+        base, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000.0
+            current, peak = tracemalloc.get_traced_memory()
+            after = tracemalloc.take_snapshot().filter_traces(self._FILTERS)
+            self._current = None
+            entry = self._stages.setdefault(name, {"calls": 0, "ms": 0.0, "net_kb": 0.0, "peak_kb": 0.0, "sites": {}})
+            entry["calls"] += 1
+            entry["ms"] += elapsed_ms
+            entry["net_kb"] += (current - base) / 1024.0
+            entry["peak_kb"] = max(entry["peak_kb"], (peak - base) / 1024.0)
+            for diff in after.compare_to(before, "lineno"):
+                if diff.size_diff == 0:
+                    continue
+                site = entry["sites"].setdefault(_site(diff.traceback[0]), [0, 0])
+                site[0] += diff.size_diff
+                site[1] += diff.count_diff
+
+    def report(self) -> Dict[str, Any]:
+        out: Dict[str, Any] = {}
+        for name, entry in self._stages.items():
+            sites = sorted(entry["sites"].items(), key=lambda kv: kv[1][0], reverse=True)[: self.top]
+            out[name] = {
+                "calls": entry["calls"],
+                "ms": round(entry["ms"], 2),
+                "net_kb": round(entry["net_kb"], 1),
+                "peak_kb": round(entry["peak_kb"], 1),
+                "top_sites": [{"site": s, "size_kb": round(v[0] / 1024.0, 1), "blocks": v[1]} for s, v in sites],
+            }
+        return out
+
+@contextmanager
+def pipeline_stage(name: str) -> Iterator[None]:
+    """
+    Marks a pipeline stage: timed into the request trace (slow-request
+    capture) and profiled when a profile_call() runs in this context.
+    A no-op when neither is active.
+    """
+    profile = _active.get()
+    trace = current_trace()
+    if profile is None and trace is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        if profile is None:
+            yield
+        else:
+            with profile.stage(name):
+                yield
+    finally:
+        if trace is not None:
+            trace.add_stage(name, (time.perf_counter() - start) * 1000.0)
+
+def profile_call(fn: Callable[[], Any], top: int = TRACEMALLOC_TOP) -> Tuple[Any, Dict[str, Any]]:
+    """
+    Run `fn` with tracemalloc on and a StageProfile active; returns its
+    result and the report. One profile at a time (RuntimeError if busy).
+    tracemalloc is process-wide, so allocations by concurrent requests in
+    the same stage window are included; profile on a quiet worker.
+    """
+    if not _profile_lock.acquire(blocking=False):
+        raise RuntimeError("a memory profile is already running")
+    started = not tracemalloc.is_tracing()
+    try:
+        if started:
+            tracemalloc.start(max(1, TRACEMALLOC_FRAMES))
+        profile = StageProfile(top)
+        token = _active.set(profile)
+        start = time.perf_counter()
+        try:
+            result = fn()
+        finally:
+            _active.reset(token)
+        total_ms = (time.perf_counter() - start) * 1000.0
+        current, _ = tracemalloc.get_traced_memory()
+        report = {
+            "total_ms": round(total_ms, 2),
+            "traced_kb_after": round(current / 1024.0, 1),
+            "stages": profile.report(),
+        }
+    finally:
+        if started:
+            tracemalloc.stop()
+        _profile_lock.release()
+    return result, report
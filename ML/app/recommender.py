@@ -1,9 +1,14 @@
 import os
+import math
 import time
+import heapq
 import logging
-from dataclasses import dataclass, field
+import secrets
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field, replace
 from functools import lru_cache
-from typing import List, Dict, Any, Set, Optional, Tuple
+from typing import List, Dict, Any, Set, Optional, Tuple, FrozenSet
 
 from app.preprocessing import (
     preprocess_student_profile,
@@ -11,9 +16,23 @@ from app.preprocessing import (
     calculate_distance_km,
     normalize_text,
 )
-from app.database import get_database
+from app.database import (
+    get_database,
+    DatabaseManager,
+    nearest_filter_predicate,
+    DatabaseUnavailableError,
+    DOCUMENT_PROJECTION,
+    SCORING_PROJECTION,
+)
+from app.pools import CityPoolManager, CITY_POOLS
+from app.profiling import pipeline_stage
+from app.slowlog import current_trace
+from app.tables import RELATED_JOBS, CITY_COORDINATES
+from app.utils import LRUCache, profile_fingerprint
 
 logger = logging.getLogger(__name__)
+# per-request radius tier lines; sampled by default (config "log_sampling")
+tier_logger = logging.getLogger(f"{__name__}.tiers")
 
 # ---------------------------- Config ---------------------------------- #
 _SEED = os.getenv("RECOMMENDER_SEED")
@@ -24,182 +43,65 @@ if _SEED is not None:
 # Primary geospatial field to use in DB nearest search
 DEFAULT_GEO_FIELD = os.getenv("GEO_NEAR_FIELD", "location_point_exact")
 
-# Related job roles mapping for expanded recommendations
-RELATED_JOBS = {
-    "data scientist": ["ml engineer", "data analyst", "data engineer", "ai engineer"],
-    "ml engineer": ["data scientist", "ai engineer", "data analyst", "machine learning engineer"],
-    "community intern": ["outreach intern", "social work intern", "volunteer coordinator", "community outreach intern"],
-    "software engineer": ["full stack developer", "backend developer", "frontend developer", "web developer"],
-    "marketing intern": ["digital marketing intern", "content marketing intern", "social media intern"],
-    "business analyst": ["data analyst", "financial analyst", "market research analyst"],
-    "graphic designer": ["ui/ux designer", "visual designer", "creative designer"],
-    "sales intern": ["business development intern", "customer service intern", "account manager intern"],
-    "hr intern": ["recruitment intern", "talent acquisition intern", "employee relations intern"],
-    "finance intern": ["accounting intern", "financial analyst intern", "investment banking intern"],
-    "operations intern": ["logistics intern", "supply chain intern", "project coordinator intern"],
-    "research intern": ["research assistant", "lab assistant", "academic intern"],
-    "teaching intern": ["education intern", "tutor intern", "training intern"],
-    "legal intern": ["law intern", "compliance intern", "paralegal intern"],
-    "medical intern": ["healthcare intern", "nursing intern", "pharmacy intern"],
-    "engineering intern": ["mechanical engineer intern", "electrical engineer intern", "civil engineer intern"],
-    "product manager intern": ["product development intern", "project manager intern", "business analyst intern"],
-    "content writer": ["copywriter", "blogger", "technical writer", "journalist intern"],
-    "photographer": ["videographer", "media intern", "creative intern"],
-    "event planner": ["event coordinator", "wedding planner intern", "conference organizer intern"],
-    "consultant intern": ["strategy intern", "management consultant intern", "business consultant intern"],
-    "analyst intern": ["data analyst", "financial analyst", "market analyst intern"],
-    "developer intern": ["software developer intern", "web developer intern", "app developer intern"],
-    "designer intern": ["graphic designer intern", "ui designer intern", "ux designer intern"],
-    "manager intern": ["project manager intern", "team leader intern", "operations manager intern"],
-    "coordinator intern": ["project coordinator intern", "event coordinator intern", "office coordinator intern"],
-    "specialist intern": ["hr specialist intern", "marketing specialist intern", "sales specialist intern"],
-    "associate intern": ["business associate intern", "research associate intern", "sales associate intern"],
-    "executive intern": ["account executive intern", "marketing executive intern", "sales executive intern"],
-    "officer intern": ["compliance officer intern", "loan officer intern", "security officer intern"],
-    "technician intern": ["it technician intern", "lab technician intern", "maintenance technician intern"],
-    "support intern": ["customer support intern", "technical support intern", "administrative support intern"],
-    "advisor intern": ["financial advisor intern", "career advisor intern", "academic advisor intern"],
-    "trainer intern": ["corporate trainer intern", "fitness trainer intern", "sales trainer intern"],
-    "auditor intern": ["internal auditor intern", "external auditor intern", "compliance auditor intern"],
-    "broker intern": ["real estate broker intern", "insurance broker intern", "stock broker intern"],
-    "buyer intern": ["procurement intern", "purchasing intern", "sourcing intern"],
-    "chef intern": ["cook intern", "kitchen intern", "culinary intern"],
-    "driver intern": ["delivery driver intern", "truck driver intern", "chauffeur intern"],
-    "editor intern": ["content editor intern", "video editor intern", "copy editor intern"],
-    "farmer intern": ["agriculture intern", "farm manager intern", "horticulture intern"],
-    "guide intern": ["tour guide intern", "museum guide intern", "nature guide intern"],
-    "host intern": ["event host intern", "tv host intern", "radio host intern"],
-    "inspector intern": ["quality inspector intern", "safety inspector intern", "building inspector intern"],
-    "investigator intern": ["private investigator intern", "research investigator intern", "fraud investigator intern"],
-    "judge intern": ["law clerk intern", "legal assistant intern", "court intern"],
-    "librarian intern": ["library assistant intern", "archivist intern", "information specialist intern"],
-    "mechanic intern": ["auto mechanic intern", "maintenance mechanic intern", "industrial mechanic intern"],
-    "nurse intern": ["registered nurse intern", "practical nurse intern", "nursing assistant intern"],
-    "operator intern": ["machine operator intern", "equipment operator intern", "control room operator intern"],
-    "pilot intern": ["flight attendant intern", "air traffic controller intern", "aviation intern"],
-    "police intern": ["law enforcement intern", "security intern", "detective intern"],
-    "reporter intern": ["journalist intern", "news reporter intern", "broadcast reporter intern"],
-    "scientist intern": ["research scientist intern", "lab scientist intern", "environmental scientist intern"],
-    "secretary intern": ["administrative assistant intern", "office assistant intern", "executive assistant intern"],
-    "teacher intern": ["professor intern", "instructor intern", "educator intern"],
-    "therapist intern": ["physical therapist intern", "occupational therapist intern", "speech therapist intern"],
-    "translator intern": ["interpreter intern", "language specialist intern", "localization intern"],
-    "veterinarian intern": ["animal care intern", "vet assistant intern", "wildlife intern"],
-    "waiter intern": ["server intern", "bartender intern", "hostess intern"],
-    "writer intern": ["author intern", "blogger intern", "content creator intern"],
-    "zoologist intern": ["wildlife biologist intern", "marine biologist intern", "conservation intern"],
-}
-
-# City coordinates mapping for the ML algorithm workflow
-CITY_COORDINATES: Dict[str, Dict[str, float]] = {
-    "Mumbai": {"lat": 19.0760, "lon": 72.8777},
-    "Delhi": {"lat": 28.7041, "lon": 77.1025},
-    "Bangalore": {"lat": 12.9716, "lon": 77.5946},
-    "Pune": {"lat": 18.5204, "lon": 73.8567},
-    "Chennai": {"lat": 13.0827, "lon": 80.2707},
-    "Hyderabad": {"lat": 17.3850, "lon": 78.4867},
-    "Kolkata": {"lat": 22.5726, "lon": 88.3639},
-    "Ahmedabad": {"lat": 23.0225, "lon": 72.5714},
-    "Jaipur": {"lat": 26.9124, "lon": 75.7873},
-    "Lucknow": {"lat": 26.8467, "lon": 80.9462},
-    "Surat": {"lat": 21.1702, "lon": 72.8311},
-    "Kanpur": {"lat": 26.4499, "lon": 80.3319},
-    "Nagpur": {"lat": 21.1458, "lon": 79.0882},
-    "Indore": {"lat": 22.7196, "lon": 75.8577},
-    "Thane": {"lat": 19.2183, "lon": 72.9781},
-    "Bhopal": {"lat": 23.2599, "lon": 77.4126},
-    "Visakhapatnam": {"lat": 17.6868, "lon": 83.2185},
-    "Patna": {"lat": 25.5941, "lon": 85.1376},
-    "Vadodara": {"lat": 22.3072, "lon": 73.1812},
-    "Ghaziabad": {"lat": 28.6692, "lon": 77.4538},
-    "Ludhiana": {"lat": 30.9010, "lon": 75.8573},
-    "Agra": {"lat": 27.1767, "lon": 78.0081},
-    "Nashik": {"lat": 19.9975, "lon": 73.7898},
-    "Faridabad": {"lat": 28.4089, "lon": 77.3178},
-    "Meerut": {"lat": 28.9845, "lon": 77.7064},
-    "Rajkot": {"lat": 22.3039, "lon": 70.8022},
-    "Kalyan-Dombivli": {"lat": 19.2350, "lon": 73.1300},
-    "Vasai-Virar": {"lat": 19.3919, "lon": 72.8397},
-    "Varanasi": {"lat": 25.3176, "lon": 82.9739},
-    "Srinagar": {"lat": 34.0837, "lon": 74.7973},
-    "Aurangabad": {"lat": 19.8762, "lon": 75.3433},
-    "Dhanbad": {"lat": 23.7957, "lon": 86.4304},
-    "Amritsar": {"lat": 31.6340, "lon": 74.8723},
-    "Navi Mumbai": {"lat": 19.0330, "lon": 73.0297},
-    "Allahabad": {"lat": 25.4358, "lon": 81.8463},
-    "Ranchi": {"lat": 23.3441, "lon": 85.3096},
-    "Howrah": {"lat": 22.5958, "lon": 88.2636},
-    "Coimbatore": {"lat": 11.0168, "lon": 76.9558},
-    "Jabalpur": {"lat": 23.1815, "lon": 79.9864},
-    "Gwalior": {"lat": 26.2183, "lon": 78.1828},
-    "Vijayawada": {"lat": 16.5062, "lon": 80.6480},
-    "Jodhpur": {"lat": 26.2389, "lon": 73.0243},
-    "Madurai": {"lat": 9.9252, "lon": 78.1198},
-    "Raipur": {"lat": 21.2514, "lon": 81.6296},
-    "Kota": {"lat": 25.2138, "lon": 75.8648},
-    "Guwahati": {"lat": 26.1445, "lon": 91.7362},
-    "Chandigarh": {"lat": 30.7333, "lon": 76.7794},
-    "Solapur": {"lat": 17.6599, "lon": 75.9064},
-    "Hubli-Dharwad": {"lat": 15.3647, "lon": 75.1240},
-    "Bareilly": {"lat": 28.3670, "lon": 79.4304},
-    "Moradabad": {"lat": 28.8386, "lon": 78.7733},
-    "Mysore": {"lat": 12.2958, "lon": 76.6394},
-    "Gurgaon": {"lat": 28.4595, "lon": 77.0266},
-    "Aligarh": {"lat": 27.8974, "lon": 78.0880},
-    "Jalandhar": {"lat": 31.3260, "lon": 75.5762},
-    "Tiruchirappalli": {"lat": 10.7905, "lon": 78.7047},
-    "Bhubaneswar": {"lat": 20.2961, "lon": 85.8245},
-    "Salem": {"lat": 11.6643, "lon": 78.1460},
-    "Mira-Bhayandar": {"lat": 19.2952, "lon": 72.8544},
-    "Warangal": {"lat": 17.9784, "lon": 79.5941},
-    "Thiruvananthapuram": {"lat": 8.5241, "lon": 76.9366},
-    "Guntur": {"lat": 16.3067, "lon": 80.4365},
-    "Bhiwandi": {"lat": 19.2967, "lon": 73.0631},
-    "Saharanpur": {"lat": 29.9679, "lon": 77.5510},
-    "Gorakhpur": {"lat": 26.7606, "lon": 83.3732},
-    "Bikaner": {"lat": 28.0229, "lon": 73.3119},
-    "Amravati": {"lat": 20.9374, "lon": 77.7796},
-    "Noida": {"lat": 28.5355, "lon": 77.3910},
-    "Jamshedpur": {"lat": 22.8046, "lon": 86.2029},
-    "Bhilai": {"lat": 21.1938, "lon": 81.3509},
-    "Cuttack": {"lat": 20.4625, "lon": 85.8828},
-    "Firozabad": {"lat": 27.1591, "lon": 78.3957},
-    "Kochi": {"lat": 9.9312, "lon": 76.2673},
-    "Nellore": {"lat": 14.4426, "lon": 79.9865},
-    "Bhavnagar": {"lat": 21.7645, "lon": 72.1519},
-    "Dehradun": {"lat": 30.3165, "lon": 78.0322},
-    "Durgapur": {"lat": 23.5204, "lon": 87.3119},
-    "Asansol": {"lat": 23.6833, "lon": 86.9833},
-    "Nanded": {"lat": 19.1383, "lon": 77.3210},
-    "Kolhapur": {"lat": 16.6913, "lon": 74.2447},
-    "Ajmer": {"lat": 26.4499, "lon": 74.6399},
-    "Gulbarga": {"lat": 17.3297, "lon": 76.8343},
-    "Jamnagar": {"lat": 22.4722, "lon": 70.0577},
-    "Ujjain": {"lat": 23.1765, "lon": 75.7885},
-    "Loni": {"lat": 28.7500, "lon": 77.2833},
-    "Siliguri": {"lat": 26.7271, "lon": 88.3953},
-    "Jhansi": {"lat": 25.4484, "lon": 78.5685},
-    "Ulhasnagar": {"lat": 19.2215, "lon": 73.1645},
-    "Sangli": {"lat": 16.8524, "lon": 74.5815},
-    "Jammu": {"lat": 32.7266, "lon": 74.8570},
-    "Mangalore": {"lat": 12.9141, "lon": 74.8560},
-    "Erode": {"lat": 11.3410, "lon": 77.7172},
-    "Belgaum": {"lat": 15.8497, "lon": 74.4977},
-    "Ambattur": {"lat": 13.1143, "lon": 80.1481},
-    "Tirunelveli": {"lat": 8.7139, "lon": 77.7567},
-    "Malegaon": {"lat": 20.5544, "lon": 74.5286},
-    "Gaya": {"lat": 24.7955, "lon": 85.0077},
-    "Jalgaon": {"lat": 21.0077, "lon": 75.5626},
-    "Udaipur": {"lat": 24.5854, "lon": 73.7125},
-    "Maheshtala": {"lat": 22.5086, "lon": 88.3253},
-}
+# Snapshot root; app.snapshot (and numpy) is only imported when this is set
+CATALOG_SNAPSHOT_DIR = os.getenv("CATALOG_SNAPSHOT_DIR", "")
+
+# "mongo" or "sqlite" (see app.storage); app.storage is only imported when not mongo
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "mongo").strip().lower()
+
+# Stale-serving while the database circuit is open: last-known-good
+# shortlists per (rounded location, preferences) as id lists, the shortlist
+# documents they point to (shared, bounded by count) and per-city regional pools
+STALE_CACHE_SIZE = int(os.getenv("STALE_CACHE_SIZE", "2048"))
+STALE_DOCUMENT_CACHE_SIZE = int(os.getenv("STALE_DOCUMENT_CACHE_SIZE", "20000"))
+REGIONAL_FALLBACK_SIZE = int(os.getenv("REGIONAL_FALLBACK_SIZE", "300"))
+STALE_FALLBACK_NOTE = "Database temporarily unavailable; showing recently cached recommendations."
+
+# Cursor pagination: full rankings (ids, scores, distances, tags) kept per
+# cursor for RANKING_TTL_SECONDS, plus the full documents they point to
+RANKING_CACHE_SIZE = int(os.getenv("RANKING_CACHE_SIZE", "1000"))
+RANKING_TTL_SECONDS = float(os.getenv("RANKING_TTL_SECONDS", "600") or 600)
+RANKING_MAX_RESULTS = int(os.getenv("RANKING_MAX_RESULTS", "200"))
+DOCUMENT_CACHE_SIZE = int(os.getenv("DOCUMENT_CACHE_SIZE", "5000"))
+
+# Role -> itself + related roles, in both directions, normalized once at import
+def _build_role_expansions(related_jobs: Dict[str, List[str]]) -> Dict[str, FrozenSet[str]]:
+    expansions: Dict[str, Set[str]] = {}
+    for role, related in related_jobs.items():
+        base = normalize_text(role)
+        expansions.setdefault(base, {base})
+        for other in related:
+            rel = normalize_text(other)
+            expansions[base].add(rel)
+            expansions.setdefault(rel, {rel}).add(base)
+    return {role: frozenset(roles) for role, roles in expansions.items()}
+
+ROLE_EXPANSIONS: Dict[str, FrozenSet[str]] = _build_role_expansions(RELATED_JOBS)
+
+def expand_job_roles(roles: List[str]) -> List[str]:
+    """Normalized preferred roles plus related roles (sorted for a stable query shape)."""
+    out: Set[str] = set()
+    for role in roles or []:
+        r = normalize_text(role)
+        if r:
+            out |= ROLE_EXPANSIONS.get(r, frozenset((r,)))
+    return sorted(out)
 
 # ----------------------------- Types ---------------------------------- #
 Number = float
 
+class CursorExpiredError(LookupError):
+    """A pagination cursor whose cached ranking has expired or been evicted."""
+
+# Optional score components, weighted on top of the base ones
+OPTIONAL_WEIGHTS: Tuple[str, ...] = ("semantic", "embedding")
+
 @dataclass(frozen=True)
 class Weights:
-    """Relative weights should roughly sum to 1.0."""
+    """
+    Relative weights should roughly sum to 1.0. Turning on an optional
+    component (OPTIONAL_WEIGHTS) adds to that; see rebalanced().
+    """
     skills: float = 0.30
     role: float = 0.20
     sector: float = 0.12
@@ -208,6 +110,25 @@ class Weights:
     salary: float = 0.10
     duration: float = 0.08
     support: float = 0.06
+    # optional TF-IDF title/description similarity; needs TFIDF_INDEX_DIR
+    semantic: float = float(os.getenv("SEMANTIC_WEIGHT", "0") or 0)
+    # optional dense-embedding relevance; needs EMBEDDING_INDEX_DIR
+    embedding: float = float(os.getenv("EMBEDDING_WEIGHT", "0") or 0)
+
+    def rebalanced(self) -> "Weights":
+        """
+        Copy whose base weights are scaled, keeping their proportions, to
+        fill what the optional weights leave of 1.0. Unchanged when no
+        optional weight is set or they already sum to 1.0 or more.
+        """
+        values = vars(self)
+        extra = sum(values[k] for k in OPTIONAL_WEIGHTS)
+        base = {k: v for k, v in values.items() if k not in OPTIONAL_WEIGHTS}
+        base_total = sum(base.values())
+        if extra <= 0 or extra >= 1.0 or base_total <= 0 or math.isclose(base_total + extra, 1.0):
+            return self
+        scale = (1.0 - extra) / base_total
+        return replace(self, **{k: v * scale for k, v in base.items()})
 
 @dataclass
 class DistanceConfig:
@@ -220,6 +141,10 @@ class RecommenderConfig:
     distance: DistanceConfig = field(default_factory=DistanceConfig)
     radius_tiers_km: Tuple[int, ...] = (30, 60, 120, 240)
     prefer_recent_days: int = 90  # not strictly needed given created_at tie-break
+    # skip full scoring of candidates whose score upper bound can't reach the top-k
+    prune_ranking: bool = os.getenv("RANK_PRUNING", "1").strip().lower() in {"1", "true", "yes", "on"}
+    # shortlist with SCORING_PROJECTION, then re-read full documents for the top_k only
+    two_phase_fetch: bool = os.getenv("TWO_PHASE_FETCH", "1").strip().lower() in {"1", "true", "yes", "on"}
 
 # ------------------------ Core Recommender ---------------------------- #
 class Recommender:
@@ -232,8 +157,20 @@ class Recommender:
       - Deterministic tie-breaking (score desc, created_at desc, stipend desc, distance asc)
     """
 
-    def __init__(self, config: Optional[RecommenderConfig] = None) -> None:
+    def __init__(self, config: Optional[RecommenderConfig] = None, backend: Optional[Any] = None) -> None:
         self.cfg = config or RecommenderConfig()
+        # explicit StorageBackend (app.storage); None -> snapshot / STORAGE_BACKEND
+        self.backend = backend
+        self._last_good = LRUCache(STALE_CACHE_SIZE)
+        self._stale_documents = LRUCache(STALE_DOCUMENT_CACHE_SIZE)
+        self._regional: Dict[str, "OrderedDict[str, Dict[str, Any]]"] = {}
+        self._regional_lock = threading.Lock()
+        self._rankings = LRUCache(RANKING_CACHE_SIZE, ttl_seconds=RANKING_TTL_SECONDS)
+        self._documents = LRUCache(DOCUMENT_CACHE_SIZE)
+        # per-city shortlist pools (lean documents, so only with two-phase fetch); started by the API
+        self.pools = CityPoolManager(self._catalog, DEFAULT_GEO_FIELD) if CITY_POOLS and self.cfg.two_phase_fetch else None
+        # optional components take their share from the base weights
+        self.cfg.weights = self.cfg.weights.rebalanced()
         total_w = sum(vars(self.cfg.weights).values())
         if not (0.95 <= total_w <= 1.05):
             logger.warning("Weights sum to %.3f (expected ~1.0)", total_w)
@@ -330,18 +267,8 @@ class Recommender:
         return min(base, self.cfg.distance.max_penalty)
 
     # --------------------------- Scoring ------------------------------ #
-    def score_internship(self, student: Dict[str, Any], internship: Dict[str, Any]) -> Dict[str, Any]:
-        """Compute a composite score and attach explanation + distance."""
-        w = self.cfg.weights
-
-        student_skills = {normalize_text(s) for s in (student.get("skills") or []) if s}
-        internship_skills = {normalize_text(s) for s in (internship.get("skills") or []) if s}
-        student_interests = {normalize_text(s) for s in (student.get("interests") or []) if s}
-        internship_interests = {normalize_text(s) for s in (internship.get("interests") or []) if s}
-
-        skills_score = self.calculate_jaccard_similarity(student_skills, internship_skills)
-        interests_score = self.calculate_jaccard_similarity(student_interests, internship_interests)
-
+    def _cheap_components(self, student: Dict[str, Any], internship: Dict[str, Any]) -> Dict[str, float]:
+        """Components that cost a few comparisons each (no set algebra, no geo)."""
         role_score = 1.0 if normalize_text(student.get("job_role", "")) == normalize_text(str(internship.get("job_role", ""))) else 0.0
         sector_score = 1.0 if normalize_text(student.get("sector", "")) == normalize_text(str(internship.get("sector", ""))) else 0.0
 
@@ -359,51 +286,155 @@ class Recommender:
 
         support_score = self.calculate_support_bonus(internship.get("additional_support", []) or [], student.get("additional_preferences", []) or [])
 
-        # Distance
+        return {
+            "role": role_score,
+            "sector": sector_score,
+            "qualification": qual_score,
+            "salary": salary_score,
+            "duration": duration_score,
+            "support": support_score,
+            "duration_months": float(i_duration or 0),
+        }
+
+    def score_upper_bound(
+        self,
+        student: Dict[str, Any],
+        internship: Dict[str, Any],
+        cheap: Dict[str, float],
+        semantic_score: float = 0.0,
+        embedding_score: float = 0.0,
+    ) -> float:
+        """
+        Best score `internship` can reach given its cheap components: skills and
+        interests Jaccard count as 1.0 when both sides are non-empty, and the
+        distance penalty as 0.
+        """
+        w = self.cfg.weights
+        skills_ub = 1.0 if student.get("skills") and internship.get("skills") else 0.0
+        interests_ub = 1.0 if student.get("interests") and internship.get("interests") else 0.0
+        bound = (
+            w.skills * skills_ub
+            + w.role * cheap["role"]
+            + w.sector * cheap["sector"]
+            + w.interests * interests_ub
+            + w.qualification * cheap["qualification"]
+            + w.salary * cheap["salary"]
+            + w.duration * cheap["duration"]
+            + w.support * cheap["support"]
+            + w.semantic * semantic_score
+            + w.embedding * embedding_score
+        )
+        return max(0.0, min(1.0, bound))
+
+    def _student_features(self, student: Dict[str, Any]) -> Dict[str, Any]:
+        """Normalized student sets and location, computed once per request."""
         s_loc = student.get("location", {}) or {}
-        s_lat = float(s_loc.get("lat") or 0.0)
-        s_lon = float(s_loc.get("lon") or 0.0)
+        return {
+            "skills": {normalize_text(s) for s in (student.get("skills") or []) if s},
+            "interests": {normalize_text(s) for s in (student.get("interests") or []) if s},
+            "lat": float(s_loc.get("lat") or 0.0),
+            "lon": float(s_loc.get("lon") or 0.0),
+            "max_pref_km": float(s_loc.get("max_distance_km", 50) or 50),
+        }
+
+    def score_components(
+        self,
+        student: Dict[str, Any],
+        internship: Dict[str, Any],
+        semantic_score: float = 0.0,
+        embedding_score: float = 0.0,
+        cheap: Optional[Dict[str, float]] = None,
+        features: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Numeric stage: composite score, distance and component values.
+        The internship is referenced, not copied; tags come from `explain`.
+        """
+        w = self.cfg.weights
+        features = features or self._student_features(student)
+
+        internship_skills = {normalize_text(s) for s in (internship.get("skills") or []) if s}
+        internship_interests = {normalize_text(s) for s in (internship.get("interests") or []) if s}
+
+        skills_score = self.calculate_jaccard_similarity(features["skills"], internship_skills)
+        interests_score = self.calculate_jaccard_similarity(features["interests"], internship_interests)
+
+        cheap = cheap or self._cheap_components(student, internship)
+
+        # Distance
         i_loc = internship.get("location", {}) or {}
         i_lat = float(i_loc.get("lat") or 0.0)
         i_lon = float(i_loc.get("lon") or 0.0)
-        distance_km = calculate_distance_km(s_lat, s_lon, i_lat, i_lon)
+        distance_km = calculate_distance_km(features["lat"], features["lon"], i_lat, i_lon)
 
         work_mode = normalize_text(internship.get("work_mode", "") or internship.get("mode", ""))
-        max_pref_km = float(s_loc.get("max_distance_km", 50) or 50)
-        distance_penalty = self.calculate_distance_penalty(distance_km, max_pref_km, work_mode)
+        distance_penalty = self.calculate_distance_penalty(distance_km, features["max_pref_km"], work_mode)
 
         total = (
             w.skills * skills_score
-            + w.role * role_score
-            + w.sector * sector_score
+            + w.role * cheap["role"]
+            + w.sector * cheap["sector"]
             + w.interests * interests_score
-            + w.qualification * qual_score
-            + w.salary * salary_score
-            + w.duration * duration_score
-            + w.support * support_score
+            + w.qualification * cheap["qualification"]
+            + w.salary * cheap["salary"]
+            + w.duration * cheap["duration"]
+            + w.support * cheap["support"]
+            + w.semantic * semantic_score
+            + w.embedding * embedding_score
             - distance_penalty
         )
         total = max(0.0, min(1.0, total))  # clamp to [0,1]
 
-        # Explanations
+        return {
+            "internship": internship,
+            "score": float(total),
+            "distance_km": float(distance_km),
+            "components": {
+                **cheap,
+                "skills": skills_score,
+                "interests": interests_score,
+                "semantic": semantic_score,
+                "embedding": embedding_score,
+                "work_mode": work_mode,
+            },
+        }
+
+    def explain(
+        self,
+        student: Dict[str, Any],
+        scored: Dict[str, Any],
+        features: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """Presentation stage: explanation tags + defaulted internship for one scored result."""
+        w = self.cfg.weights
+        features = features or self._student_features(student)
+        internship = scored["internship"]
+        c = scored["components"]
+        distance_km = scored["distance_km"]
+        max_pref_km = features["max_pref_km"]
+
         tags: List[str] = []
-        if skills_score >= 0.3 and student_skills & internship_skills:
-            ms = list(student_skills & internship_skills)[:3]
-            tags.append(f"Matched skills: {', '.join(ms)}")
-        if sector_score >= 0.5:
+        if c["skills"] >= 0.3:
+            internship_skills = {normalize_text(s) for s in (internship.get("skills") or []) if s}
+            if features["skills"] & internship_skills:
+                ms = list(features["skills"] & internship_skills)[:3]
+                tags.append(f"Matched skills: {', '.join(ms)}")
+        if c["sector"] >= 0.5:
             tags.append(f"Sector match: {internship.get('sector', 'N/A')}")
-        if role_score >= 0.5:
+        if c["role"] >= 0.5:
             tags.append(f"Role match: {internship.get('job_role', 'N/A')}")
-        if salary_score >= 0.8:
+        if c["salary"] >= 0.8:
             tags.append("Salary meets expectation")
-        if duration_score >= 1.0:
-            tags.append(f"Duration fits ({int(i_duration or 0)} months)")
-        if support_score > 0:
+        if c["duration"] >= 1.0:
+            tags.append(f"Duration fits ({int(c['duration_months'] or 0)} months)")
+        if c["support"] > 0:
             tags.append("Valuable support offered")
+        if (w.semantic > 0 and c["semantic"] >= 0.3) or (w.embedding > 0 and c["embedding"] >= 0.5):
+            tags.append("Similar to your profile")
 
-        if work_mode == "remote":
+        if c["work_mode"] == "remote":
             tags.append("Remote-friendly (no distance penalty)")
-        elif work_mode == "hybrid":
+        elif c["work_mode"] == "hybrid":
             tags.append("Hybrid (reduced distance penalty)")
 
         if distance_km <= max_pref_km:
@@ -411,25 +442,316 @@ class Recommender:
         else:
             tags.append(f"{distance_km:.0f} km (beyond preference)")
 
-        # Ensure required fields for UI/model consumers
+        return {
+            "internship": self._with_defaults(internship),
+            "score": scored["score"],
+            "distance_km": distance_km,
+            "explanation_tags": tags,
+        }
+
+    @staticmethod
+    def _with_defaults(internship: Dict[str, Any]) -> Dict[str, Any]:
+        """Copy of `internship` with the fields UI/model consumers require."""
         internship_with_defaults = dict(internship)
         if "description" not in internship_with_defaults:
             internship_with_defaults["description"] = f"{internship.get('title', 'Internship')} opportunity in {internship.get('sector', 'Technology')}"
         if "geo" not in internship_with_defaults:
+            i_loc = internship.get("location", {}) or {}
             lat = i_loc.get("lat", 0.0)
             lon = i_loc.get("lon", 0.0)
             internship_with_defaults["geo"] = {"type": "Point", "coordinates": [lon, lat]}
+        return internship_with_defaults
+
+    def score_internship(
+        self,
+        student: Dict[str, Any],
+        internship: Dict[str, Any],
+        semantic_score: float = 0.0,
+        embedding_score: float = 0.0,
+        cheap: Optional[Dict[str, float]] = None,
+    ) -> Dict[str, Any]:
+        """Compute a composite score and attach explanation + distance."""
+        features = self._student_features(student)
+        scored = self.score_components(student, internship, semantic_score, embedding_score, cheap, features)
+        return self.explain(student, scored, features)
+
+    def _shortlist(
+        self,
+        lat: float,
+        lon: float,
+        pref_payload: Dict[str, Any],
+        expanded_roles: List[str],
+    ) -> Tuple[List[Dict[str, Any]], int, str]:
+        """
+        Progressive-radius shortlist with relaxed fallbacks.
+        Returns (candidates, radius used, fallback note).
+        """
+        fallback_note = ""
+        # 3) shortlist with progressive radius
+        radius_used = 0
+        all_candidates: List[Dict[str, Any]] = []
+        for r in self.cfg.radius_tiers_km:
+            all_candidates = self._nearest(lat=lat, lon=lon, preference=pref_payload, radius_km=r)
+            tier_logger.info("Radius %skm: found %s candidates", r, len(all_candidates))
+            if all_candidates:
+                radius_used = r
+                break
+
+        # 4) relax if nothing found; keep the related-role filter for one more try
+        if not all_candidates:
+            fallback_note = "No exact matches found; expanded search with relaxed preferences."
+            relaxed = {
+                "sector": None,
+                "skills": None,
+                "work_mode": None,
+                "min_duration_months": 0,
+                "preferred_job_roles": expanded_roles,
+                "preferred_sectors": [],
+            }
+            max_r = self.cfg.radius_tiers_km[-1] if self.cfg.radius_tiers_km else 240
+            all_candidates = self._nearest(lat=lat, lon=lon, preference=relaxed, radius_km=max_r, n=300)
+            if not all_candidates and expanded_roles:
+                fallback_note = "No exact or related job role matches found; falling back to broader recommendations."
+                relaxed["preferred_job_roles"] = []
+                all_candidates = self._nearest(lat=lat, lon=lon, preference=relaxed, radius_km=max_r, n=300)
+            radius_used = max_r
+        return all_candidates, radius_used, fallback_note
+
+    # ------------------------ Stale fallbacks ------------------------- #
+    @staticmethod
+    def _shortlist_key(lat: float, lon: float, pref_payload: Dict[str, Any]) -> Tuple[Any, ...]:
+        # ~11 km cells: nearby students with the same preferences share an entry
+        prefs = tuple(sorted((k, tuple(v) if isinstance(v, list) else v) for k, v in pref_payload.items()))
+        return round(lat, 1), round(lon, 1), prefs
+
+    @staticmethod
+    @lru_cache(maxsize=4096)
+    def _nearest_city(lat: float, lon: float) -> str:
+        return min(
+            CITY_COORDINATES,
+            key=lambda c: calculate_distance_km(lat, lon, CITY_COORDINATES[c]["lat"], CITY_COORDINATES[c]["lon"]),
+        )
+
+    def _remember_shortlist(
+        self,
+        lat: float,
+        lon: float,
+        pref_payload: Dict[str, Any],
+        candidates: List[Dict[str, Any]],
+        radius_used: int,
+        fallback_note: str,
+    ) -> None:
+        """
+        Keep a successful shortlist as last-known-good (its ids; documents go
+        to the shared stale document cache) and feed the city's regional
+        pool. A repeat of the entry's current shortlist changes nothing.
+        """
+        if not candidates:
+            return
+        key = self._shortlist_key(lat, lon, pref_payload)
+        ids = tuple(str(c.get("id")) for c in candidates)
+        previous = self._last_good.get(key)
+        if previous is not None and previous[0] == ids and previous[1] == radius_used:
+            return
+        for iid, c in zip(ids, candidates):
+            self._stale_documents.put(iid, c)
+        self._last_good.put(key, (ids, radius_used, fallback_note))
+        self._add_regional(self._nearest_city(round(lat, 2), round(lon, 2)), candidates)
+
+    def _add_regional(self, city: str, candidates: List[Dict[str, Any]]) -> None:
+        """Merge `candidates` into the city's pool as its most recent; the least recently seen fall out."""
+        with self._regional_lock:
+            pool = self._regional.setdefault(city, OrderedDict())
+            for c in candidates:
+                iid = str(c.get("id"))
+                pool[iid] = c
+                pool.move_to_end(iid)
+            while len(pool) > REGIONAL_FALLBACK_SIZE:
+                pool.popitem(last=False)
+
+    def precompute_regional_fallbacks(self, cities: Optional[List[str]] = None, n: int = REGIONAL_FALLBACK_SIZE) -> int:
+        """
+        Fill the regional pools with a preference-free shortlist around each
+        city centre (max radius tier). Returns the number of cities filled.
+        """
+        max_r = self.cfg.radius_tiers_km[-1] if self.cfg.radius_tiers_km else 240
+        relaxed = {"sector": None, "skills": None, "work_mode": None, "min_duration_months": 0,
+                   "preferred_job_roles": [], "preferred_sectors": []}
+        filled = 0
+        for city in cities or list(CITY_COORDINATES):
+            coords = CITY_COORDINATES.get(city)
+            if coords is None:
+                continue
+            try:
+                items = self._nearest(lat=coords["lat"], lon=coords["lon"], preference=relaxed, radius_km=max_r, n=n)
+            except DatabaseUnavailableError as e:
+                logger.warning("Regional fallback precompute stopped: %s", e)
+                break
+            if items:
+                self._add_regional(city, items)
+                filled += 1
+        return filled
+
+    def _stale_shortlist(self, lat: float, lon: float, pref_payload: Dict[str, Any]) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Last-known-good shortlist for this query (the documents still in the
+        stale document cache), else the nearest city's regional pool.
+        """
+        hit = self._last_good.get(self._shortlist_key(lat, lon, pref_payload))
+        if hit is not None:
+            ids, radius_used, _ = hit
+            candidates = [doc for doc in (self._stale_documents.get(iid) for iid in ids) if doc is not None]
+            if candidates:
+                return candidates, radius_used
+        max_r = self.cfg.radius_tiers_km[-1] if self.cfg.radius_tiers_km else 240
+        with self._regional_lock:
+            pooled = [
+                (calculate_distance_km(lat, lon, CITY_COORDINATES[c]["lat"], CITY_COORDINATES[c]["lon"]), c)
+                for c in self._regional
+            ]
+            # closest city with a pool within the widest radius tier
+            for distance, city in sorted(pooled):
+                if distance <= max_r:
+                    return list(self._regional[city].values()), max_r
+        return [], 0
+
+    # --------------------------- Warm-up ------------------------------ #
+    def preload(self, qualifications: Optional[List[str]] = None, catalog: bool = True) -> Dict[str, Any]:
+        """
+        Load what the first requests would otherwise load lazily: the
+        catalog backend (snapshot mmap / SQLite file), the TF-IDF, embedding
+        and ANN indexes when their components are on, and the qualification
+        category cache. Returns what was loaded. `catalog=False` skips the
+        backend (a pre-fork preload must not open connections).
+        """
+        loaded: Dict[str, Any] = {}
+        if catalog:
+            loaded["catalog"] = type(self._catalog()).__name__
+        if self.cfg.weights.semantic > 0:
+            from app.semantic import get_tfidf_index
+
+            loaded["tfidf"] = get_tfidf_index() is not None
+        if self.cfg.weights.embedding > 0:
+            from app.embeddings import get_embedding_matcher
+
+            loaded["embeddings"] = get_embedding_matcher() is not None
+        from app.ann import ANN_INDEX_DIR
 
+        if ANN_INDEX_DIR:
+            from app.ann import get_ann_index
+
+            loaded["ann"] = get_ann_index() is not None
+        for q in qualifications or []:
+            self._qual_category(q)
+        loaded["qualification_cache"] = self._qual_category_cached.cache_info().currsize
+        return loaded
+
+    def catalog_info(self) -> Dict[str, Any]:
+        """Backend, snapshot version (when there is one) and geo field the shortlist reads."""
+        catalog = self._catalog()
         return {
-            "internship": internship_with_defaults,
-            "score": float(total),
-            "distance_km": float(distance_km),
-            "explanation_tags": tags,
+            "backend": type(catalog).__name__,
+            "version": getattr(catalog, "version", None),
+            "geo_field": DEFAULT_GEO_FIELD,
+            "city_pools": self.pools is not None,
+        }
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """Entries held by each in-process cache (for /admin/memory)."""
+        def _lru(cache: LRUCache) -> Dict[str, Any]:
+            return {"entries": len(cache), "maxsize": cache.maxsize, "hits": cache.hits, "misses": cache.misses}
+
+        with self._regional_lock:
+            regional = {"cities": len(self._regional), "documents": sum(len(v) for v in self._regional.values())}
+        qual = self._qual_category_cached.cache_info()
+        near = self._nearest_city.cache_info()
+        return {
+            "stale_shortlists": _lru(self._last_good),
+            "stale_documents": _lru(self._stale_documents),
+            "rankings": _lru(self._rankings),
+            "documents": _lru(self._documents),
+            "regional_fallbacks": regional,
+            "qualification_categories": {"entries": qual.currsize, "maxsize": qual.maxsize},
+            "nearest_city": {"entries": near.currsize, "maxsize": near.maxsize},
+            "city_pools": ({k: v for k, v in self.pools.stats().items() if k in ("cities", "memberships", "capped")}
+                           if self.pools is not None else None),
         }
 
     # ------------------------- Data Access ---------------------------- #
+    @property
+    def backend(self) -> Optional[Any]:
+        return self._backend
+
+    @backend.setter
+    def backend(self, value: Optional[Any]) -> None:
+        self._backend = value
+        self._uses_mongo: Optional[bool] = None
+
+    @property
+    def uses_mongo(self) -> bool:
+        """Whether the shortlist reads MongoDB; resolved once per backend."""
+        if self._uses_mongo is None:
+            self._uses_mongo = isinstance(self._catalog(), DatabaseManager)
+        return self._uses_mongo
+
+    def _catalog(self):
+        """
+        Explicit backend if given, else the memory-mapped catalog snapshot when
+        configured, else the STORAGE_BACKEND store (MongoDB by default).
+        """
+        if self.backend is not None:
+            return self.backend
+        if CATALOG_SNAPSHOT_DIR:
+            from app.snapshot import get_catalog_snapshot
+
+            snapshot = get_catalog_snapshot()
+            if snapshot is not None:
+                return snapshot
+        if STORAGE_BACKEND != "mongo":
+            from app.storage import get_storage_backend
+
+            return get_storage_backend()
+        return get_database()
+
+    def _shortlist_projection(self) -> Dict[str, Any]:
+        return SCORING_PROJECTION if self.cfg.two_phase_fetch else DOCUMENT_PROJECTION
+
+    def _full_documents(self, results: List[Dict[str, Any]]) -> None:
+        """
+        Second fetch phase: swap the lean shortlist documents of `results`
+        for full, preprocessed ones (one id-keyed $in query). Documents
+        that can't be re-read keep their lean version.
+        """
+        if not self.cfg.two_phase_fetch or not results:
+            return
+        ids = [str(r["internship"].get("id")) for r in results if r["internship"].get("id") is not None]
+        try:
+            docs = self._catalog().find_internships_by_ids(ids, DOCUMENT_PROJECTION) if ids else []
+        except Exception as e:
+            logger.warning("Full document fetch failed; returning shortlist documents: %s", e)
+            return
+        by_id: Dict[str, Dict[str, Any]] = {}
+        for raw in docs:
+            try:
+                by_id[str(raw.get("id"))] = preprocess_internship(raw)
+            except Exception as e:
+                logger.warning("Internship preprocess failed (id=%s): %s", raw.get("id"), e)
+        for r in results:
+            full = by_id.get(str(r["internship"].get("id")))
+            if full is not None:
+                r["internship"] = full
+
     def _nearest(self, *, lat: float, lon: float, preference: Dict[str, Any], radius_km: int, n: int = 200) -> List[Dict[str, Any]]:
-        db = get_database()
+        trace = current_trace()
+        start = time.perf_counter()
+        if self.pools is not None:
+            pooled = self.pools.nearest(lat, lon, preference, radius_km, n)
+            if pooled is not None:
+                if trace is not None:
+                    trace.add_tier(lat, lon, radius_km, preference, n, len(pooled),
+                                   (time.perf_counter() - start) * 1000.0, "city_pool")
+                return pooled
+        db = self._catalog()
         try:
             items = db.find_nearest_internships(
                 user_lat=lat,
@@ -438,10 +760,13 @@ class Recommender:
                 n=n,
                 geo_field=DEFAULT_GEO_FIELD,
                 max_distance_km=radius_km,
+                projection=self._shortlist_projection(),
             ) or []
+        except DatabaseUnavailableError:
+            raise
         except Exception as e:
             logger.exception("DB nearest failed: %s", e)
-            return []
+            items = []
 
         # Preprocess each internship record for consistent fields downstream
         processed: List[Dict[str, Any]] = []
@@ -450,23 +775,170 @@ class Recommender:
                 processed.append(preprocess_internship(raw))
             except Exception as e:
                 logger.warning("Internship preprocess failed (id=%s): %s", raw.get("id"), e)
+        if trace is not None:
+            trace.add_tier(lat, lon, radius_km, preference, n, len(processed),
+                           (time.perf_counter() - start) * 1000.0, type(db).__name__)
+        return processed
+
+    def _semantic_scores(self, student: Dict[str, Any], candidates: List[Dict[str, Any]]) -> List[float]:
+        """TF-IDF similarity for the whole shortlist (zeros when the component is off)."""
+        if self.cfg.weights.semantic <= 0 or not candidates:
+            return [0.0] * len(candidates)
+        from app.semantic import get_tfidf_index
+
+        index = get_tfidf_index()
+        if index is None:
+            return [0.0] * len(candidates)
+        try:
+            return index.similarities(student, candidates)
+        except Exception as e:
+            logger.warning("Semantic similarity failed; scoring without it: %s", e)
+            return [0.0] * len(candidates)
+
+    def _embedding_scores(self, student: Dict[str, Any], candidates: List[Dict[str, Any]]) -> List[float]:
+        """Dense-embedding relevance for the whole shortlist (zeros when the component is off)."""
+        if self.cfg.weights.embedding <= 0 or not candidates:
+            return [0.0] * len(candidates)
+        from app.embeddings import get_embedding_matcher
+
+        matcher = get_embedding_matcher()
+        if matcher is None:
+            return [0.0] * len(candidates)
+        try:
+            return matcher.similarities(student, candidates)
+        except Exception as e:
+            logger.warning("Embedding relevance failed; scoring without it: %s", e)
+            return [0.0] * len(candidates)
+
+    def _remote_candidates(
+        self,
+        student: Dict[str, Any],
+        exclude_ids: Set[str],
+        preference: Optional[Dict[str, Any]] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Second candidate generator: nationwide remote/hybrid internships from
+        the ANN index over internship embeddings (empty when not configured),
+        held to the same hard filters as the geo shortlist (`preference`).
+        """
+        from app.ann import ANN_INDEX_DIR, ANN_CANDIDATES
+
+        if not ANN_INDEX_DIR:
+            return []
+        from app.ann import get_ann_index
+        from app.embeddings import get_embedding_matcher
+
+        index = get_ann_index()
+        matcher = get_embedding_matcher()
+        if index is None or matcher is None:
+            return []
+        try:
+            exclude_rows = {r for r in (matcher.store.row(i) for i in exclude_ids) if r is not None}
+            rows = index.query(matcher.profile_embedding(student), ANN_CANDIDATES, exclude_rows=exclude_rows)
+            ids = [matcher.store.ids[r] for r in rows]
+            items = self._catalog().find_internships_by_ids(ids, self._shortlist_projection()) if ids else []
+        except Exception as e:
+            logger.warning("ANN candidate generation failed: %s", e)
+            return []
+
+        accept = nearest_filter_predicate(preference)
+        processed: List[Dict[str, Any]] = []
+        for raw in filter(accept, items):
+            try:
+                processed.append(preprocess_internship(raw))
+            except Exception as e:
+                logger.warning("Internship preprocess failed (id=%s): %s", raw.get("id"), e)
         return processed
 
+    def _score_candidates(
+        self,
+        student: Dict[str, Any],
+        candidates: List[Dict[str, Any]],
+        top_k: int,
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Score the shortlist. With prune_ranking, candidates are visited in
+        descending upper-bound order while a min-heap tracks the current k-th
+        best score; once a bound falls strictly below it, no remaining
+        candidate can enter the top_k and the rest are skipped.
+        Results are numeric only (see `score_components`); `explain` is
+        applied to the final top_k by the caller.
+        Returns (scored results, number of candidates pruned).
+        """
+        semantic_scores = self._semantic_scores(student, candidates)
+        embedding_scores = self._embedding_scores(student, candidates)
+        features = self._student_features(student)
+        k = max(0, int(top_k))
+        scored: List[Dict[str, Any]] = []
+
+        if not self.cfg.prune_ranking or k == 0:
+            for internship, semantic_score, embedding_score in zip(candidates, semantic_scores, embedding_scores):
+                try:
+                    scored.append(self.score_components(
+                        student,
+                        internship,
+                        semantic_score=semantic_score,
+                        embedding_score=embedding_score,
+                        features=features,
+                    ))
+                except Exception as e:
+                    logger.exception("Scoring failed for internship id=%s: %s", internship.get("id"), e)
+            return scored, 0
+
+        bounded: List[Tuple[float, int, Dict[str, float]]] = []
+        for pos, internship in enumerate(candidates):
+            try:
+                cheap = self._cheap_components(student, internship)
+            except Exception as e:
+                logger.exception("Scoring failed for internship id=%s: %s", internship.get("id"), e)
+                continue
+            ub = self.score_upper_bound(student, internship, cheap, semantic_scores[pos], embedding_scores[pos])
+            bounded.append((ub, pos, cheap))
+        bounded.sort(key=lambda b: (-b[0], b[1]))
+
+        threshold: List[float] = []  # min-heap of the best k full scores so far
+        pruned = 0
+        for visited, (ub, pos, cheap) in enumerate(bounded):
+            if len(threshold) >= k and ub < threshold[0]:
+                pruned = len(bounded) - visited
+                break
+            internship = candidates[pos]
+            try:
+                result = self.score_components(
+                    student,
+                    internship,
+                    semantic_score=semantic_scores[pos],
+                    embedding_score=embedding_scores[pos],
+                    cheap=cheap,
+                    features=features,
+                )
+            except Exception as e:
+                logger.exception("Scoring failed for internship id=%s: %s", internship.get("id"), e)
+                continue
+            scored.append(result)
+            if len(threshold) < k:
+                heapq.heappush(threshold, result["score"])
+            elif result["score"] > threshold[0]:
+                heapq.heapreplace(threshold, result["score"])
+
+        logger.debug("Scored %d of %d candidates (pruned=%d)", len(scored), len(candidates), pruned)
+        return scored, pruned
+
     # ----------------------- Orchestration ---------------------------- #
-    def recommend_internships(self, student_profile: Dict[str, Any], top_k: int = 5) -> Dict[str, Any]:
+    def _rank(self, student_profile: Dict[str, Any], top_k: Optional[int]) -> Optional[Dict[str, Any]]:
         """
-        End-to-end recommend: geo shortlist -> content scoring -> top_k.
-        Fallback logic expands radius & relaxes preferences if needed.
-        Deterministic tie-break: score desc, created_at desc, stipend desc, distance asc.
+        Steps 0-8 of the pipeline: shortlist, score and sort. With `top_k`
+        pruning may skip candidates that can't reach it; None scores the
+        whole shortlist. Returns None when the student has no location.
         """
-        start_time = time.time()
         fallback_note = ""
 
         # 0) preprocess student (normalize skills, edu, location, etc.)
-        try:
-            student_profile = preprocess_student_profile(student_profile)
-        except Exception as e:
-            logger.warning("Student preprocess failed; continuing with raw profile: %s", e)
+        with pipeline_stage("preprocess"):
+            try:
+                student_profile = preprocess_student_profile(student_profile)
+            except Exception as e:
+                logger.warning("Student preprocess failed; continuing with raw profile: %s", e)
 
         # 1) resolve coordinates (preprocess should help; city mapping as fallback)
         loc = (student_profile.get("location") or {})
@@ -476,13 +948,14 @@ class Recommender:
         lon = (loc.get("lon") if loc.get("lon") is not None else (coords or {}).get("lon"))
         if lat is None or lon is None:
             logger.warning("Student location missing; cannot recommend internships.")
-            return {"recommendations": [], "total_found": 0, "search_radius_used": 0, "processing_time_ms": 0.0, "fallback_note": "Missing location"}
+            return None
 
         # 2) extract preferences
         preference = student_profile.get("preference") or {}
         preferred_sectors = preference.get("preferred_sectors") or []
         sector_primary = preferred_sectors[0] if preferred_sectors else preference.get("sector")
         preferred_job_roles = preference.get("preferred_job_roles") or []
+        expanded_roles = expand_job_roles(preferred_job_roles)
         skills = student_profile.get("skills") or []
         preferred_work_mode = preference.get("work_mode") or None
         min_duration_months = int(preference.get("duration_min_months", 1) or 1)
@@ -492,51 +965,21 @@ class Recommender:
             "skills": skills,
             "work_mode": preferred_work_mode,
             "min_duration_months": min_duration_months,
-            "preferred_job_roles": preferred_job_roles,
+            "preferred_job_roles": expanded_roles,
             "preferred_sectors": preferred_sectors,
         }
 
-        # 3) shortlist with progressive radius
-        radius_used = 0
-        all_candidates: List[Dict[str, Any]] = []
-        for r in self.cfg.radius_tiers_km:
-            all_candidates = self._nearest(lat=float(lat), lon=float(lon), preference=pref_payload, radius_km=r)
-            logger.info("Radius %skm: found %s candidates", r, len(all_candidates))
-            if all_candidates:
-                radius_used = r
-                break
-
-        # 4) relax if nothing found
-        if not all_candidates:
-            fallback_note = "No exact matches found; expanded search with relaxed preferences."
-            relaxed = {
-                "sector": None,
-                "skills": None,
-                "work_mode": None,
-                "min_duration_months": 0,
-                "preferred_job_roles": [],
-                "preferred_sectors": [],
-            }
-            max_r = self.cfg.radius_tiers_km[-1] if self.cfg.radius_tiers_km else 240
-            all_candidates = self._nearest(lat=float(lat), lon=float(lon), preference=relaxed, radius_km=max_r, n=300)
-            radius_used = max_r
-
-        # 5) Filter by exact job role if specified; fallback to broader if empty
-        original_candidates = list(all_candidates)
-        if preferred_job_roles:
-            # Expand preferred roles with related jobs
-            preferred_roles = set(preferred_job_roles)
-            for role in preferred_job_roles:
-                related = RELATED_JOBS.get(normalize_text(role), [])
-                preferred_roles.update(related)
-            normalized_roles = {normalize_text(role) for role in preferred_roles}
-            all_candidates = [
-                i for i in all_candidates
-                if normalize_text(str(i.get("job_role", ""))) in normalized_roles
-            ]
-            if not all_candidates:
-                fallback_note = "No exact or related job role matches found; falling back to broader recommendations."
-                all_candidates = original_candidates
+        # 3-4) shortlist; serve stale candidates if the database is unavailable
+        stale = False
+        with pipeline_stage("fetch"):
+            try:
+                all_candidates, radius_used, fallback_note = self._shortlist(float(lat), float(lon), pref_payload, expanded_roles)
+                self._remember_shortlist(float(lat), float(lon), pref_payload, all_candidates, radius_used, fallback_note)
+            except DatabaseUnavailableError as e:
+                logger.warning("Database unavailable; serving stale candidates: %s", e)
+                stale = True
+                all_candidates, radius_used = self._stale_shortlist(float(lat), float(lon), pref_payload)
+                fallback_note = STALE_FALLBACK_NOTE
 
         # 6) build student vector for scoring (normalized)
         student_for_scoring = {
@@ -555,13 +998,21 @@ class Recommender:
             },
         }
 
-        # 7) score
-        scored: List[Dict[str, Any]] = []
-        for internship in all_candidates:
-            try:
-                scored.append(self.score_internship(student_for_scoring, internship))
-            except Exception as e:
-                logger.exception("Scoring failed for internship id=%s: %s", internship.get("id"), e)
+        # 6b) merge nationwide remote/hybrid matches from the ANN generator
+        with pipeline_stage("fetch"):
+            # the shortlist's hard filters, unless it had to relax them
+            relaxed = bool(fallback_note) and not stale
+            remote = self._remote_candidates(
+                student_for_scoring,
+                {str(i.get("id")) for i in all_candidates if i.get("id") is not None},
+                None if relaxed else pref_payload,
+            )
+        if remote:
+            all_candidates = all_candidates + remote
+
+        # 7) score (upper-bound pruning keeps only what can reach the top_k)
+        with pipeline_stage("score"):
+            scored, pruned = self._score_candidates(student_for_scoring, all_candidates, 0 if top_k is None else top_k)
 
         # 8) rank with deterministic tie-breakers
         def _created_at_ts(it: Dict[str, Any]) -> float:
@@ -588,25 +1039,190 @@ class Recommender:
                 or 0.0
             )
 
-        scored.sort(
-            key=lambda x: (
-                -x["score"],
-                -_created_at_ts(x),
-                -_stipend_val(x),
-                x["distance_km"],
+        with pipeline_stage("score"):
+            scored.sort(
+                key=lambda x: (
+                    -x["score"],
+                    -_created_at_ts(x),
+                    -_stipend_val(x),
+                    x["distance_km"],
+                )
             )
-        )
-
-        top_recommendations = scored[: max(0, int(top_k))]
-        elapsed_ms = (time.time() - start_time) * 1000.0
 
         return {
             "student_id": student_profile.get("id", ""),
-            "recommendations": top_recommendations,
+            "student": student_for_scoring,
+            "scored": scored,
             "total_found": len(all_candidates),
             "search_radius_used": radius_used,
-            "processing_time_ms": elapsed_ms,
             "fallback_note": fallback_note,
+            "pruned_candidates": pruned,
+            "stale": stale,
+        }
+
+    def recommend_internships(self, student_profile: Dict[str, Any], top_k: int = 5) -> Dict[str, Any]:
+        """
+        End-to-end recommend: geo shortlist -> content scoring -> top_k.
+        Fallback logic expands radius & relaxes preferences if needed.
+        Deterministic tie-break: score desc, created_at desc, stipend desc, distance asc.
+        """
+        start_time = time.time()
+        ranked = self._rank(student_profile, top_k)
+        if ranked is None:
+            return {"recommendations": [], "total_found": 0, "search_radius_used": 0, "processing_time_ms": 0.0, "fallback_note": "Missing location"}
+
+        # 9) full documents, tags and defaults for the winners only
+        winners = ranked.pop("scored")[: max(0, int(top_k))]
+        with pipeline_stage("fetch"):
+            self._full_documents(winners)
+        student_for_scoring = ranked.pop("student")
+        with pipeline_stage("serialize"):
+            ranked["recommendations"] = [self.explain(student_for_scoring, r) for r in winners]
+        ranked["processing_time_ms"] = (time.time() - start_time) * 1000.0
+        return ranked
+
+    # -------------------------- Pagination ---------------------------- #
+    @staticmethod
+    def _parse_cursor(cursor: str) -> Tuple[str, int]:
+        """`<ranking token>.<offset>`; raises ValueError if malformed."""
+        token, _, offset = (cursor or "").rpartition(".")
+        if not token or not offset.isdigit():
+            raise ValueError("malformed cursor")
+        return token, int(offset)
+
+    def _page_documents(self, ids: List[str]) -> Tuple[Dict[str, Dict[str, Any]], bool]:
+        """
+        Full preprocessed documents for `ids`: document cache first, one id
+        query for the rest. While the database is unavailable the rest come
+        from the stale shortlist documents instead; the flag says so.
+        """
+        found: Dict[str, Dict[str, Any]] = {}
+        missing: List[str] = []
+        for iid in ids:
+            doc = self._documents.get(iid)
+            if doc is None:
+                missing.append(iid)
+            else:
+                found[iid] = doc
+        if not missing:
+            return found, False
+        try:
+            raws = self._catalog().find_internships_by_ids(missing, DOCUMENT_PROJECTION)
+        except DatabaseUnavailableError as e:
+            logger.warning("Database unavailable; serving cached page documents: %s", e)
+            for iid in missing:
+                doc = self._stale_documents.get(iid)
+                if doc is not None:
+                    found[iid] = doc
+            return found, True
+        for raw in raws:
+            try:
+                doc = preprocess_internship(raw)
+            except Exception as e:
+                logger.warning("Internship preprocess failed (id=%s): %s", raw.get("id"), e)
+                continue
+            found[str(doc.get("id"))] = doc
+            self._documents.put(str(doc.get("id")), doc)
+        return found, False
+
+    def _store_ranking(self, token: str, fingerprint: str, ranked: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Keep the full ranking compactly (ids, scores, distances, tags) under
+        `token`; the full documents go to the shared document cache, fetched
+        in one id query so later pages need no database round trip.
+        """
+        results = ranked["scored"][: max(0, RANKING_MAX_RESULTS)]
+        if self.cfg.two_phase_fetch:
+            self._full_documents(results)
+        student = ranked["student"]
+        features = self._student_features(student)
+        ids: List[str] = []
+        scores: List[float] = []
+        distances: List[float] = []
+        tags: List[List[str]] = []
+        for r in results:
+            iid = r["internship"].get("id")
+            if iid is None:
+                continue
+            self._documents.put(str(iid), r["internship"])
+            ids.append(str(iid))
+            scores.append(r["score"])
+            distances.append(r["distance_km"])
+            tags.append(self.explain(student, r, features)["explanation_tags"])
+        entry = {
+            "fingerprint": fingerprint,
+            "student_id": ranked["student_id"],
+            "ids": ids,
+            "scores": scores,
+            "distances": distances,
+            "tags": tags,
+            "total_found": ranked["total_found"],
+            "search_radius_used": ranked["search_radius_used"],
+            "fallback_note": ranked["fallback_note"],
+            "stale": ranked["stale"],
+        }
+        self._rankings.put(token, entry)
+        return entry
+
+    def recommend_page(
+        self,
+        student_profile: Dict[str, Any],
+        page_size: int = 5,
+        cursor: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        One page of the full ranking. The first call (no cursor) ranks the
+        whole shortlist once and caches it; `next_cursor` then slices later
+        pages from that cached order without re-scoring. Raises ValueError
+        for a malformed cursor or one issued for a different profile, and
+        CursorExpiredError once the cursor's ranking has expired or been
+        evicted (the client starts again from the first page).
+        """
+        start_time = time.time()
+        fingerprint = profile_fingerprint(student_profile)
+        if cursor:
+            token, offset = self._parse_cursor(cursor)
+        else:
+            token, offset = secrets.token_urlsafe(12), 0
+
+        entry = self._rankings.get(token)
+        if entry is not None and entry["fingerprint"] != fingerprint:
+            raise ValueError("cursor was issued for a different profile")
+        if entry is None and cursor:
+            raise CursorExpiredError("ranking expired; request the first page again without a cursor")
+        if entry is None:
+            ranked = self._rank(student_profile, None)
+            if ranked is None:
+                return {"recommendations": [], "total_found": 0, "search_radius_used": 0, "processing_time_ms": 0.0,
+                        "fallback_note": "Missing location", "next_cursor": None, "total_ranked": 0}
+            entry = self._store_ranking(token, fingerprint, ranked)
+
+        size = max(1, int(page_size))
+        page_ids = entry["ids"][offset: offset + size]
+        docs, page_stale = self._page_documents(page_ids)
+        recommendations = []
+        for pos, iid in enumerate(page_ids, start=offset):
+            doc = docs.get(iid)
+            if doc is None:
+                logger.warning("Ranked internship %s is no longer available", iid)
+                continue
+            recommendations.append({
+                "internship": self._with_defaults(doc),
+                "score": entry["scores"][pos],
+                "distance_km": entry["distances"][pos],
+                "explanation_tags": entry["tags"][pos],
+            })
+        end = offset + size
+        return {
+            "student_id": entry["student_id"],
+            "recommendations": recommendations,
+            "total_found": entry["total_found"],
+            "search_radius_used": entry["search_radius_used"],
+            "processing_time_ms": (time.time() - start_time) * 1000.0,
+            "fallback_note": STALE_FALLBACK_NOTE if page_stale and not entry["stale"] else entry["fallback_note"],
+            "stale": entry["stale"] or page_stale,
+            "next_cursor": f"{token}.{end}" if end < len(entry["ids"]) else None,
+            "total_ranked": len(entry["ids"]),
         }
 
 # Create a global recommender instance
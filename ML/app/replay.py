@@ -0,0 +1,164 @@
+import os
+import json
+import time
+import logging
+import argparse
+import contextvars
+from typing import List, Dict, Any, Optional, Tuple
+
+from app.recommender import Recommender, RecommenderConfig, Weights, DistanceConfig
+from app.slowlog import SLOW_REQUEST_DIR, list_bundles, load_bundle, start_trace
+from app.utils import get_config
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------- Replay ---------------------------------- #
+
+def config_from_bundle(cfg: Dict[str, Any]) -> RecommenderConfig:
+    """The RecommenderConfig the captured request ran with."""
+    return RecommenderConfig(
+        weights=Weights(**cfg.get("weights", {})),
+        distance=DistanceConfig(**cfg.get("distance", {})),
+        radius_tiers_km=tuple(cfg.get("radius_tiers_km") or RecommenderConfig().radius_tiers_km),
+        prefer_recent_days=int(cfg.get("prefer_recent_days", 90)),
+        prune_ranking=bool(cfg.get("prune_ranking", True)),
+        two_phase_fetch=bool(cfg.get("two_phase_fetch", True)),
+    )
+
+def open_snapshot(root: str, version: Optional[str]) -> Tuple[Any, bool]:
+    """
+    The snapshot the bundle was captured against when `root` still has it
+    (v<version>/), else the current one. Returns (snapshot, exact match).
+    """
+    from app.snapshot import CatalogSnapshot, CURRENT_FILE
+
+    if version and os.path.isdir(os.path.join(root, f"v{version}")):
+        return CatalogSnapshot(os.path.join(root, f"v{version}")), True
+    with open(os.path.join(root, CURRENT_FILE), "r", encoding="utf-8") as f:
+        snapshot = CatalogSnapshot(os.path.join(root, f.read().strip()))
+    return snapshot, snapshot.version == version
+
+def replay(bundle: Dict[str, Any], backend: Any, runs: int = 3) -> List[Dict[str, Any]]:
+    """
+    Re-run the bundle's request `runs` times against `backend` with the
+    captured config (city pools off: every tier goes to the backend).
+    The first run is cold; later ones show the warm path.
+    """
+    recommender = Recommender(config_from_bundle(bundle.get("config") or {}), backend)
+    recommender.pools = None
+    params = bundle.get("params") or {}
+    max_k = int(get_config().get("max_recommendations", 5))
+
+    def _once() -> Dict[str, Any]:
+        trace = start_trace()
+        start = time.perf_counter()
+        if params.get("page_size") or params.get("cursor"):
+            # cursors don't survive the process; replay the first page of the ranking
+            result = recommender.recommend_page(bundle["profile"], page_size=int(params.get("page_size") or max_k))
+        else:
+            top_k = max(1, min(int(params.get("top_k") or max_k), max_k))
+            result = recommender.recommend_internships(bundle["profile"], top_k=top_k)
+        return {
+            "latency_ms": round((time.perf_counter() - start) * 1000.0, 2),
+            "stages_ms": {k: round(v, 2) for k, v in trace.stages.items()},
+            "tiers": trace.tiers,
+            "total_found": result.get("total_found"),
+            "search_radius_used": result.get("search_radius_used"),
+        }
+
+    # each run gets its own context so traces never mix
+    return [contextvars.copy_context().run(_once) for _ in range(max(1, int(runs)))]
+
+def same_path(bundle: Dict[str, Any], run: Dict[str, Any]) -> bool:
+    """Whether the replay queried the same radius tiers and found the same candidate counts."""
+    captured = [(t["radius_km"], t["found"]) for t in bundle.get("tiers") or []]
+    replayed = [(t["radius_km"], t["found"]) for t in run["tiers"]]
+    return captured == replayed
+
+def format_replay(bundle: Dict[str, Any], runs: List[Dict[str, Any]], catalog: str) -> str:
+    cat = bundle.get("catalog") or {}
+    lines = [
+        f"request {bundle.get('request_id')} {bundle.get('endpoint')} {bundle.get('latency_ms')}ms "
+        f"(threshold {bundle.get('threshold_ms')}ms) captured {bundle.get('captured_at')}",
+        f"captured on {cat.get('backend')} {cat.get('version') or ''} (city pools {'on' if cat.get('city_pools') else 'off'}); "
+        f"replayed on {catalog}",
+        "",
+        f"{'stage':<12}{'captured':>10}" + "".join(f"{'run ' + str(i + 1):>10}" for i in range(len(runs))),
+    ]
+    stages = list(bundle.get("stages_ms") or {})
+    for run in runs:
+        stages.extend(s for s in run["stages_ms"] if s not in stages)
+    for stage in stages + ["total"]:
+        orig = bundle.get("latency_ms") if stage == "total" else (bundle.get("stages_ms") or {}).get(stage)
+        vals = [r["latency_ms"] if stage == "total" else r["stages_ms"].get(stage) for r in runs]
+        lines.append(f"{stage:<12}" + "".join(f"{v if v is not None else '-':>10}" for v in [orig] + vals))
+    lines += ["", f"{'tier km':<10}{'source':<18}{'found':>7}{'ms':>10}   replay found/ms (run 1)"]
+    replayed = runs[0]["tiers"]
+    for i, tier in enumerate(bundle.get("tiers") or []):
+        again = replayed[i] if i < len(replayed) else None
+        tail = f"{again['found']}/{again['ms']}" if again else "-"
+        lines.append(f"{tier['radius_km']:<10}{tier['source']:<18}{tier['found']:>7}{tier['ms']:>10}   {tail}")
+    lines.append("")
+    lines.append("path: identical" if same_path(bundle, runs[0]) else "path: DIVERGED (different tiers or candidate counts)")
+    return "\n".join(lines)
+
+# ------------------------------ CLI ----------------------------------- #
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.replay", description="Inspect and replay slow-request bundles")
+    sub = parser.add_subparsers(dest="command", required=True)
+    ls = sub.add_parser("list", help="List captured bundles, oldest first")
+    ls.add_argument("--dir", default=SLOW_REQUEST_DIR, help="Bundle directory (default: $SLOW_REQUEST_DIR)")
+    run = sub.add_parser("run", help="Replay one bundle against a local catalog")
+    run.add_argument("bundle", help="Bundle file, or 'latest' for the newest in --dir")
+    run.add_argument("--dir", default=SLOW_REQUEST_DIR)
+    run.add_argument("--snapshot", default=os.getenv("CATALOG_SNAPSHOT_DIR", ""),
+                     help="Snapshot root (default: $CATALOG_SNAPSHOT_DIR); the captured version is used when present")
+    run.add_argument("--sqlite", default=None, help="Replay against a SQLite catalog instead of a snapshot")
+    run.add_argument("--runs", type=int, default=3, help="Repetitions (the first one is cold)")
+    run.add_argument("--json", action="store_true", help="Print the replay runs as JSON")
+    args = parser.parse_args(argv)
+
+    if args.command == "list":
+        for path in list_bundles(args.dir):
+            try:
+                b = load_bundle(path)
+            except (OSError, ValueError) as e:
+                print(f"{os.path.basename(path)}  unreadable: {e}")
+                continue
+            cat = b.get("catalog") or {}
+            print(f"{os.path.basename(path)}  {b.get('latency_ms'):>9}ms  {b.get('endpoint')}  "
+                  f"tiers={len(b.get('tiers') or [])}  radius={b['result'].get('search_radius_used')}  "
+                  f"{cat.get('backend')} {cat.get('version') or ''}")
+        return 0
+
+    path = args.bundle
+    if path == "latest":
+        bundles = list_bundles(args.dir)
+        if not bundles:
+            print(f"no bundles in {args.dir}")
+            return 2
+        path = bundles[-1]
+    bundle = load_bundle(path)
+
+    if args.sqlite:
+        from app.storage import SQLiteBackend
+
+        backend, catalog = SQLiteBackend(args.sqlite), f"SQLite {args.sqlite}"
+    elif args.snapshot:
+        backend, exact = open_snapshot(args.snapshot, (bundle.get("catalog") or {}).get("version"))
+        catalog = f"CatalogSnapshot {backend.version}" + ("" if exact else " (not the captured version)")
+    else:
+        print("replay needs a local catalog: --snapshot ROOT or --sqlite PATH")
+        return 2
+
+    runs = replay(bundle, backend, args.runs)
+    if args.json:
+        print(json.dumps({"bundle": path, "catalog": catalog, "runs": runs}, indent=2, default=str))
+    else:
+        print(format_replay(bundle, runs, catalog))
+    return 0 if same_path(bundle, runs[0]) else 1
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    raise SystemExit(main())
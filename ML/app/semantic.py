@@ -0,0 +1,154 @@
+import os
+import json
+import pickle
+import logging
+import argparse
+import threading
+from typing import List, Dict, Any, Optional, Iterable
+
+import numpy as np
+from scipy import sparse
+
+from app.preprocessing import internship_text, student_text
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------- Config ---------------------------------- #
+
+# Directory written by `python -m app.semantic fit`
+TFIDF_INDEX_DIR = os.getenv("TFIDF_INDEX_DIR", "")
+
+VECTORIZER_FILE = "vectorizer.pkl"
+MATRIX_FILE = "matrix.npz"
+IDS_FILE = "ids.json"
+
+# ----------------------------- Index ---------------------------------- #
+
+class TfidfIndex:
+    """
+    TF-IDF vectorizer fitted offline on the catalog plus the L2-normalized
+    internship matrix (CSR, one row per internship id).
+    """
+
+    def __init__(self, vectorizer: Any, matrix: sparse.csr_matrix, ids: List[str]) -> None:
+        self.vectorizer = vectorizer
+        self.matrix = matrix.tocsr()
+        self.ids = ids
+        self._rows: Dict[str, int] = {iid: i for i, iid in enumerate(ids)}
+
+    @classmethod
+    def fit(cls, internships: Iterable[Dict[str, Any]], max_features: int = 50000) -> "TfidfIndex":
+        from sklearn.feature_extraction.text import TfidfVectorizer
+
+        ids: List[str] = []
+        texts: List[str] = []
+        for it in internships:
+            iid = it.get("id")
+            if iid is None:
+                continue
+            ids.append(str(iid))
+            texts.append(internship_text(it))
+        vectorizer = TfidfVectorizer(
+            ngram_range=(1, 2),
+            sublinear_tf=True,
+            min_df=1,
+            max_features=max_features,
+            dtype=np.float32,
+        )
+        matrix = vectorizer.fit_transform(texts)
+        logger.info("Fitted TF-IDF on %d internships (%d terms)", len(ids), len(vectorizer.vocabulary_))
+        return cls(vectorizer, matrix, ids)
+
+    def save(self, path: str) -> None:
+        os.makedirs(path, exist_ok=True)
+        with open(os.path.join(path, VECTORIZER_FILE), "wb") as f:
+            pickle.dump(self.vectorizer, f, protocol=pickle.HIGHEST_PROTOCOL)
+        sparse.save_npz(os.path.join(path, MATRIX_FILE), self.matrix)
+        with open(os.path.join(path, IDS_FILE), "w", encoding="utf-8") as f:
+            json.dump(self.ids, f)
+
+    @classmethod
+    def load(cls, path: str) -> "TfidfIndex":
+        with open(os.path.join(path, VECTORIZER_FILE), "rb") as f:
+            vectorizer = pickle.load(f)
+        matrix = sparse.load_npz(os.path.join(path, MATRIX_FILE))
+        with open(os.path.join(path, IDS_FILE), "r", encoding="utf-8") as f:
+            ids = json.load(f)
+        return cls(vectorizer, matrix, ids)
+
+    def similarities(self, student: Dict[str, Any], internships: List[Dict[str, Any]]) -> List[float]:
+        """
+        Cosine similarity of the student against every shortlisted internship
+        as one sparse matrix-vector product. Internships missing from the
+        fitted matrix are vectorized together in a single transform call.
+        """
+        if not internships:
+            return []
+        query = self.vectorizer.transform([student_text(student)])
+        if query.nnz == 0:
+            return [0.0] * len(internships)
+
+        known_pos: List[int] = []
+        known_rows: List[int] = []
+        missing_pos: List[int] = []
+        for pos, it in enumerate(internships):
+            row = self._rows.get(str(it.get("id")))
+            if row is None:
+                missing_pos.append(pos)
+            else:
+                known_pos.append(pos)
+                known_rows.append(row)
+
+        shortlist = self.matrix[known_rows]
+        if missing_pos:
+            extra = self.vectorizer.transform([internship_text(internships[p]) for p in missing_pos])
+            shortlist = sparse.vstack([shortlist, extra], format="csr")
+
+        sims = np.zeros(len(internships), dtype=np.float32)
+        sims[known_pos + missing_pos] = np.asarray((shortlist @ query.T).todense()).ravel()
+        return np.clip(sims, 0.0, 1.0).tolist()
+
+# --------------------------- Global access ---------------------------- #
+
+_index_lock = threading.Lock()
+_index: Optional[TfidfIndex] = None
+_index_failed = False
+
+def get_tfidf_index() -> Optional[TfidfIndex]:
+    """Process-wide TF-IDF index loaded from TFIDF_INDEX_DIR (None if unavailable)."""
+    global _index, _index_failed
+    if _index is not None or _index_failed or not TFIDF_INDEX_DIR:
+        return _index
+    with _index_lock:
+        if _index is None and not _index_failed:
+            try:
+                _index = TfidfIndex.load(TFIDF_INDEX_DIR)
+                logger.info("Loaded TF-IDF index from %s (%d internships)", TFIDF_INDEX_DIR, len(_index.ids))
+            except Exception as e:
+                _index_failed = True
+                logger.error("Failed to load TF-IDF index from %s: %s", TFIDF_INDEX_DIR, e)
+    return _index
+
+# ------------------------------ CLI ----------------------------------- #
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from app.snapshot import iter_catalog_documents
+
+    parser = argparse.ArgumentParser(prog="python -m app.semantic", description="TF-IDF semantic index tools")
+    sub = parser.add_subparsers(dest="command", required=True)
+    fit = sub.add_parser("fit", help="Fit TF-IDF on the catalog and write the index")
+    fit.add_argument("--out", default=TFIDF_INDEX_DIR, help="Output dir (default: $TFIDF_INDEX_DIR)")
+    fit.add_argument("--snapshot", default=None, help="Read the catalog from a snapshot root instead of MongoDB")
+    fit.add_argument("--max-features", type=int, default=50000)
+    args = parser.parse_args(argv)
+
+    if not args.out:
+        parser.error("--out or TFIDF_INDEX_DIR is required")
+    index = TfidfIndex.fit(iter_catalog_documents(args.snapshot), max_features=args.max_features)
+    index.save(args.out)
+    print(f"wrote {len(index.ids)} internships to {args.out}")
+    return 0
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    raise SystemExit(main())
@@ -0,0 +1,165 @@
+import gc
+import os
+import time
+import logging
+import argparse
+from typing import List, Dict, Any, Optional
+
+from app.utils import get_config, setup_logging
+
+logger = logging.getLogger("pm_internship_ai.server")  # also when run as __main__
+
+APP_IMPORT = "app.main:app"
+
+# ---------------------------- Settings -------------------------------- #
+
+def worker_count(config: Dict[str, Any]) -> int:
+    """`server_workers`, or one per CPU core available to this process (cgroup/affinity aware)."""
+    workers = int(config.get("server_workers") or 0)
+    if workers > 0:
+        return workers
+    try:
+        return max(1, len(os.sched_getaffinity(0)))
+    except AttributeError:  # not on Linux
+        return max(1, os.cpu_count() or 1)
+
+def gunicorn_options(config: Dict[str, Any]) -> Dict[str, Any]:
+    """Gunicorn settings from the app config (all server_* keys, api_host/api_port, log_level)."""
+    return {
+        "bind": f"{config['api_host']}:{config['api_port']}",
+        "workers": worker_count(config),
+        "preload_app": bool(config.get("server_preload")),
+        "max_requests": int(config.get("server_max_requests") or 0),
+        "max_requests_jitter": int(config.get("server_max_requests_jitter") or 0),
+        "graceful_timeout": int(config.get("server_graceful_timeout_seconds") or 30),
+        "timeout": int(config.get("server_timeout_seconds") or 120),
+        "keepalive": int(config.get("server_keepalive_seconds") or 5),
+        "loglevel": str(config.get("log_level", "INFO")).lower(),
+        "accesslog": None,  # requests are logged by the app middleware
+        "errorlog": "-",
+        "pre_fork": _pre_fork,
+        "post_fork": _post_fork,
+        "child_exit": _child_exit,
+    }
+
+# ------------------------- Pre-fork preload --------------------------- #
+
+def preload_shared_data() -> Dict[str, Any]:
+    """
+    Load read-only data in the master so workers share its pages
+    copy-on-write: the catalog snapshot mmap and the TF-IDF, embedding and
+    ANN indexes that are enabled. No connections or threads are started
+    here (neither survives fork); each worker connects and runs its own
+    warm-up in the app lifespan.
+    """
+    from app import main
+    from app.recommender import CATALOG_SNAPSHOT_DIR
+
+    start = time.perf_counter()
+    loaded = main.recommender.preload(catalog=False)
+    if CATALOG_SNAPSHOT_DIR:
+        from app.snapshot import get_catalog_snapshot
+
+        snapshot = get_catalog_snapshot()
+        loaded["snapshot"] = snapshot.version if snapshot is not None else None
+    logger.info("Preloaded shared data before fork in %.0fms: %s", (time.perf_counter() - start) * 1000.0, loaded)
+    return loaded
+
+def _pre_fork(server: Any, worker: Any) -> None:
+    # keep preloaded objects out of the workers' GC passes, which would
+    # otherwise write to (and un-share) every page holding them
+    gc.freeze()
+
+def _post_fork(server: Any, worker: Any) -> None:
+    # the log listener thread does not survive fork; start the worker's own
+    setup_logging(get_config())
+
+def _child_exit(server: Any, worker: Any) -> None:
+    logger.info("Worker %s exited (recycled after max_requests, or on shutdown)", worker.pid)
+
+# ------------------------------ Runners ------------------------------- #
+
+try:
+    from uvicorn.workers import UvicornWorker
+except ImportError:  # needs gunicorn; run_uvicorn() is used without it
+    UvicornWorker = None
+
+if UvicornWorker is not None:
+    class DrainingUvicornWorker(UvicornWorker):
+        """UvicornWorker that stops waiting on open connections when graceful_timeout is up."""
+
+        def __init__(self, *args: Any, **kwargs: Any) -> None:
+            super().__init__(*args, **kwargs)
+            self.config.timeout_graceful_shutdown = self.cfg.graceful_timeout
+
+def run_gunicorn(config: Dict[str, Any]) -> None:
+    """Pre-fork master with uvicorn workers; SIGTERM drains in-flight requests for graceful_timeout."""
+    from gunicorn.app.base import BaseApplication
+
+    class Application(BaseApplication):
+        def __init__(self, options: Dict[str, Any]) -> None:
+            self.options = options
+            super().__init__()
+
+        def load_config(self) -> None:
+            for key, value in self.options.items():
+                self.cfg.set(key, value)
+            self.cfg.set("worker_class", "app.server.DrainingUvicornWorker")
+
+        def load(self) -> Any:
+            if self.cfg.preload_app:
+                preload_shared_data()
+            from app.main import app
+
+            return app
+
+    options = gunicorn_options(config)
+    logger.info("Starting gunicorn on %s with %d workers (preload=%s, max_requests=%d)",
+                options["bind"], options["workers"], options["preload_app"], options["max_requests"])
+    Application(options).run()
+
+def run_uvicorn(config: Dict[str, Any]) -> None:
+    """
+    Fallback without gunicorn (e.g. not installed, or not on POSIX):
+    uvicorn's own process manager. Workers import the app separately (no
+    shared preload) and are not recycled, since uvicorn does not replace
+    workers that exit.
+    """
+    import uvicorn
+
+    workers = worker_count(config)
+    logger.warning("Running %d uvicorn workers without gunicorn: no shared preload or worker recycling", workers)
+    uvicorn.run(
+        APP_IMPORT,
+        host=config["api_host"],
+        port=config["api_port"],
+        workers=workers,
+        log_level=str(config.get("log_level", "INFO")).lower(),
+        access_log=False,
+        timeout_keep_alive=int(config.get("server_keepalive_seconds") or 5),
+        timeout_graceful_shutdown=int(config.get("server_graceful_timeout_seconds") or 30),
+    )
+
+# ------------------------------ CLI ----------------------------------- #
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.server", description="Production API server")
+    parser.add_argument("--uvicorn", action="store_true", help="Use uvicorn's process manager even if gunicorn is installed")
+    parser.add_argument("--print-config", action="store_true", help="Print the resolved server settings and exit")
+    args = parser.parse_args(argv)
+
+    config = get_config()
+    setup_logging(config)
+    if args.print_config:
+        options = {k: v for k, v in gunicorn_options(config).items() if not callable(v)}
+        for key, value in options.items():
+            print(f"{key} = {value}")
+        return 0
+    if args.uvicorn or UvicornWorker is None:
+        run_uvicorn(config)
+    else:
+        run_gunicorn(config)
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,59 @@
+import asyncio
+import logging
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+logger = logging.getLogger(__name__)
+
+# -------------------------- Single flight ----------------------------- #
+
+class SingleFlight:
+    """
+    In-flight de-duplication for coroutines: concurrent `do()` calls with the
+    same key share one execution and its result (or exception). The
+    execution runs as its own task, so a caller that is cancelled (client
+    disconnect) neither cancels it for the others nor leaves them waiting.
+    Nothing is cached once the execution finishes.
+    """
+
+    def __init__(self, name: str = "singleflight") -> None:
+        self.name = name
+        self._inflight: Dict[Hashable, "asyncio.Future[Any]"] = {}
+        self._lock = threading.Lock()  # counters are read from other threads
+        self.executions = 0
+        self.coalesced = 0
+        self.max_waiters = 0
+        self._waiters: Dict[Hashable, int] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """Result of `fn()` for `key`, and whether it was shared with an earlier caller."""
+        task = self._inflight.get(key)
+        shared = task is not None
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _t, k=key: self._done(k))
+            with self._lock:
+                self.executions += 1
+                self._waiters[key] = 1
+        else:
+            with self._lock:
+                self.coalesced += 1
+                self._waiters[key] = self._waiters.get(key, 1) + 1
+                self.max_waiters = max(self.max_waiters, self._waiters[key])
+            logger.debug("%s: coalesced request for in-flight key %s", self.name, key)
+        return await asyncio.shield(task), shared
+
+    def _done(self, key: Hashable) -> None:
+        self._inflight.pop(key, None)
+        with self._lock:
+            self._waiters.pop(key, None)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "in_flight": len(self._inflight),
+                "executions": self.executions,
+                "coalesced": self.coalesced,
+                "max_waiters": self.max_waiters,
+            }
@@ -0,0 +1,218 @@
+import os
+import re
+import json
+import queue
+import logging
+import threading
+from contextvars import ContextVar
+from dataclasses import asdict
+from datetime import datetime
+from typing import List, Dict, Any, Optional
+
+from app.database import build_nearest_filter
+from app.utils import sanitize_student_profile
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------- Config ---------------------------------- #
+
+# /recommend calls at least this slow are saved as replayable bundles (0 disables)
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", "1000") or 0)
+# Ring buffer directory (shared by all workers) and how many bundles it keeps
+SLOW_REQUEST_DIR = os.getenv("SLOW_REQUEST_DIR", "slow_requests")
+SLOW_REQUEST_KEEP = int(os.getenv("SLOW_REQUEST_KEEP", "200") or 200)
+
+BUNDLE_FORMAT = 1
+_SUFFIX = ".json"
+# request ids may come from a client header; only these characters reach a file name
+_UNSAFE_NAME_CHARS = re.compile(r"[^A-Za-z0-9_-]")
+
+# ----------------------------- Trace ---------------------------------- #
+
+class RequestTrace:
+    """What one request did: time per pipeline stage and every shortlist query (radius tier)."""
+
+    __slots__ = ("stages", "tiers")
+
+    def __init__(self) -> None:
+        self.stages: Dict[str, float] = {}
+        self.tiers: List[Dict[str, Any]] = []
+
+    def add_stage(self, name: str, ms: float) -> None:
+        self.stages[name] = self.stages.get(name, 0.0) + ms
+
+    def add_tier(
+        self,
+        lat: float,
+        lon: float,
+        radius_km: int,
+        preference: Optional[Dict[str, Any]],
+        n: int,
+        found: int,
+        ms: float,
+        source: str,
+    ) -> None:
+        self.tiers.append({
+            "lat": lat,
+            "lon": lon,
+            "radius_km": radius_km,
+            "n": n,
+            "found": found,
+            "ms": round(ms, 2),
+            "source": source,
+            "preference": dict(preference or {}),
+        })
+
+_trace: ContextVar[Optional[RequestTrace]] = ContextVar("request_trace", default=None)
+
+def current_trace() -> Optional[RequestTrace]:
+    """The trace of the request running in this context, if it is being traced."""
+    return _trace.get()
+
+def start_trace() -> RequestTrace:
+    """Trace whatever runs next in this context (and threads it is copied into)."""
+    trace = RequestTrace()
+    _trace.set(trace)
+    return trace
+
+# ------------------------- Ring buffer -------------------------------- #
+
+def list_bundles(directory: str = SLOW_REQUEST_DIR) -> List[str]:
+    """Bundle paths, oldest first (names start with the capture time)."""
+    try:
+        names = sorted(n for n in os.listdir(directory) if n.endswith(_SUFFIX) and not n.startswith("."))
+    except FileNotFoundError:
+        return []
+    return [os.path.join(directory, n) for n in names]
+
+def load_bundle(path: str) -> Dict[str, Any]:
+    with open(path, "r", encoding="utf-8") as f:
+        bundle = json.load(f)
+    if bundle.get("format") != BUNDLE_FORMAT:
+        raise ValueError(f"unsupported bundle format: {bundle.get('format')}")
+    return bundle
+
+class SlowRequestRecorder:
+    """
+    Saves a bundle for every traced request slower than `threshold_ms`:
+    the sanitized profile, request parameters, stage timings, each radius
+    tier's query (with the MongoDB filter it generates) and candidate
+    count, the catalog backend/version and the recommender config. A
+    writer thread stores bundles in `directory` and prunes all but the
+    newest `keep`, so the request never waits on the disk.
+    """
+
+    def __init__(self, threshold_ms: float = SLOW_REQUEST_MS, directory: str = SLOW_REQUEST_DIR,
+                 keep: int = SLOW_REQUEST_KEEP) -> None:
+        self.threshold_ms = threshold_ms
+        self.directory = directory
+        self.keep = max(1, int(keep))
+        self._queue: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize=64)
+        self._writer: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.captured = 0
+        self.dropped = 0
+        self.write_errors = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.threshold_ms > 0 and bool(self.directory)
+
+    def begin(self) -> Optional[RequestTrace]:
+        """Start tracing the current request (None when capture is off)."""
+        return start_trace() if self.enabled else None
+
+    def finish(
+        self,
+        trace: Optional[RequestTrace],
+        latency_ms: float,
+        *,
+        request_id: str,
+        endpoint: str,
+        profile: Dict[str, Any],
+        params: Dict[str, Any],
+        result: Dict[str, Any],
+        recommender: Any,
+    ) -> bool:
+        """Queue a bundle if the request was slow. Returns whether one was queued."""
+        if trace is None or latency_ms < self.threshold_ms:
+            return False
+        bundle = {
+            "format": BUNDLE_FORMAT,
+            "request_id": request_id,
+            "captured_at": datetime.now().isoformat(timespec="milliseconds"),
+            "endpoint": endpoint,
+            "latency_ms": round(latency_ms, 2),
+            "threshold_ms": self.threshold_ms,
+            "params": params,
+            "profile": sanitize_student_profile(profile),
+            "catalog": recommender.catalog_info(),
+            "config": asdict(recommender.cfg),
+            "stages_ms": {k: round(v, 2) for k, v in trace.stages.items()},
+            "tiers": trace.tiers,
+            "result": {
+                "returned": len(result.get("recommendations") or []),
+                "total_found": result.get("total_found"),
+                "search_radius_used": result.get("search_radius_used"),
+                "fallback_note": result.get("fallback_note"),
+                "stale": bool(result.get("stale")),
+            },
+        }
+        self._ensure_writer()
+        try:
+            self._queue.put_nowait(bundle)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return False
+        return True
+
+    def _ensure_writer(self) -> None:
+        if self._writer is not None and self._writer.is_alive():
+            return
+        with self._lock:
+            if self._writer is None or not self._writer.is_alive():
+                self._writer = threading.Thread(target=self._run, name="slow-requests", daemon=True)
+                self._writer.start()
+
+    def _run(self) -> None:
+        while True:
+            bundle = self._queue.get()
+            try:
+                self._write(bundle)
+                with self._lock:
+                    self.captured += 1
+            except Exception as e:
+                with self._lock:
+                    self.write_errors += 1
+                logger.warning("Could not save slow-request bundle %s: %s", bundle.get("request_id"), e)
+
+    def _write(self, bundle: Dict[str, Any]) -> str:
+        geo_field = bundle["catalog"].get("geo_field") or "location_point_exact"
+        for tier in bundle["tiers"]:
+            tier["filter"] = build_nearest_filter(tier["lat"], tier["lon"], tier["preference"], geo_field, tier["radius_km"])
+        os.makedirs(self.directory, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%dT%H%M%S%f")
+        name = _UNSAFE_NAME_CHARS.sub("_", str(bundle.get("request_id") or "unknown"))[:64]
+        path = os.path.join(self.directory, f"{stamp}-{name}{_SUFFIX}")
+        tmp = os.path.join(self.directory, f".{os.path.basename(path)}.{os.getpid()}")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(bundle, f, default=str)
+        os.replace(tmp, path)
+        for old in list_bundles(self.directory)[: -self.keep]:
+            try:
+                os.remove(old)
+            except FileNotFoundError:
+                pass  # pruned by another worker
+        logger.info("Saved slow-request bundle %s (%.0fms)", path, bundle["latency_ms"])
+        return path
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "threshold_ms": self.threshold_ms,
+                "captured": self.captured,
+                "dropped": self.dropped,
+                "write_errors": self.write_errors,
+            }
@@ -0,0 +1,505 @@
+import os
+import json
+import time
+import hashlib
+import logging
+import argparse
+import threading
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Iterable
+
+import numpy as np
+
+from app.database import canonical_match_fields, preference_match_values
+from app.preprocessing import preprocess_internship
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------- Config ---------------------------------- #
+
+# Root directory holding versioned snapshots ("v<version>/") and the CURRENT pointer
+SNAPSHOT_ROOT = os.getenv("CATALOG_SNAPSHOT_DIR", "")
+# How often (seconds) workers check CURRENT for a newer version
+SNAPSHOT_CHECK_SECONDS = float(os.getenv("CATALOG_SNAPSHOT_CHECK_SECONDS", "30"))
+# Geo grid cell size (degrees) for the cell -> rows index
+GRID_CELL_DEG = 0.5
+
+CURRENT_FILE = "CURRENT"
+META_FILE = "meta.json"
+FORMAT_VERSION = 1
+
+_EARTH_RADIUS_KM = 6371.0088
+_WORK_MODES = ("", "onsite", "hybrid", "remote")
+
+# Same fields the live nearest query projects
+SNAPSHOT_PROJECTION = {
+    "_id": 0,
+    "id": 1,
+    "title": 1,
+    "description": 1,
+    "sector": 1,
+    "skills": 1,
+    "interests": 1,
+    "job_role": 1,
+    "qualification": 1,
+    "location": 1,
+    "location_point_exact": 1,
+    "location_point_city": 1,
+    "duration": 1,
+    "duration_months": 1,
+    "expected_salary": 1,
+    "stipend": 1,
+    "compensation": 1,
+    "additional_support": 1,
+    "work_mode": 1,
+    "preference.work_mode": 1,
+    "geo": 1,
+    "created_at": 1,
+    "posted_at": 1,
+    "createdAt": 1,
+}
+
+# --------------------------- Encoding --------------------------------- #
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"$date": value.isoformat()}
+    return str(value)
+
+def _json_hook(obj: Dict[str, Any]) -> Any:
+    if len(obj) == 1 and "$date" in obj:
+        try:
+            return datetime.fromisoformat(obj["$date"])
+        except (TypeError, ValueError):
+            return obj["$date"]
+    return obj
+
+def _id_hash(internship_id: Any) -> int:
+    digest = hashlib.blake2b(str(internship_id).encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little", signed=False)
+
+def _point_coords(point: Any) -> Optional[List[float]]:
+    """Return [lon, lat] from a GeoJSON point, or None."""
+    if isinstance(point, dict):
+        coords = point.get("coordinates")
+        if isinstance(coords, (list, tuple)) and len(coords) == 2:
+            try:
+                return [float(coords[0]), float(coords[1])]
+            except (TypeError, ValueError):
+                return None
+    return None
+
+def _cell_key(lat: np.ndarray, lon: np.ndarray) -> np.ndarray:
+    row = np.floor((lat + 90.0) / GRID_CELL_DEG).astype(np.int64)
+    col = np.floor((lon + 180.0) / GRID_CELL_DEG).astype(np.int64)
+    return row * 100000 + col
+
+def _grouped_index(keys: np.ndarray) -> Dict[str, np.ndarray]:
+    """Posting lists as (sorted unique keys, offsets, rows) arrays."""
+    order = np.argsort(keys, kind="stable")
+    sorted_keys = keys[order]
+    uniq, starts = np.unique(sorted_keys, return_index=True)
+    offsets = np.append(starts, len(sorted_keys)).astype(np.int64)
+    return {"keys": uniq, "offsets": offsets, "rows": order.astype(np.int64)}
+
+def haversine_km(lat: float, lon: float, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    """Vectorized great-circle distance from one point to many (km)."""
+    p1 = np.radians(lat)
+    p2 = np.radians(lats)
+    dphi = p2 - p1
+    dlmb = np.radians(lons - lon)
+    a = np.sin(dphi / 2.0) ** 2 + np.cos(p1) * np.cos(p2) * np.sin(dlmb / 2.0) ** 2
+    return 2.0 * _EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+# ---------------------------- Builder --------------------------------- #
+
+def build_snapshot(
+    documents: Iterable[Dict[str, Any]],
+    root: str,
+    version: Optional[str] = None,
+    keep: int = 3,
+) -> str:
+    """
+    Write a columnar snapshot of the catalog under root/v<version> and
+    atomically point CURRENT at it. Returns the version written.
+    """
+    version = version or datetime.now().strftime("%Y%m%d%H%M%S")
+    os.makedirs(root, exist_ok=True)
+    final_dir = os.path.join(root, f"v{version}")
+    tmp_dir = os.path.join(root, f".tmp-v{version}-{os.getpid()}")
+    if os.path.exists(final_dir):
+        raise FileExistsError(f"snapshot version already exists: {final_dir}")
+    os.makedirs(tmp_dir)
+
+    vocab: Dict[str, Dict[str, int]] = {"sector": {}, "job_role": {}, "skills": {}}
+
+    def _code(kind: str, value: str) -> int:
+        if not value:
+            return -1
+        table = vocab[kind]
+        if value not in table:
+            table[value] = len(table)
+        return table[value]
+
+    exact_lat: List[float] = []
+    exact_lon: List[float] = []
+    city_lat: List[float] = []
+    city_lon: List[float] = []
+    sector: List[int] = []
+    job_role: List[int] = []
+    work_mode: List[int] = []
+    duration: List[int] = []
+    skill_codes: List[int] = []
+    skill_offsets: List[int] = [0]
+    id_hashes: List[int] = []
+    doc_chunks: List[bytes] = []
+    doc_offsets: List[int] = [0]
+
+    for raw in documents:
+        try:
+            doc = preprocess_internship(raw)
+        except Exception as e:
+            logger.warning("Snapshot preprocess failed (id=%s): %s", (raw or {}).get("id"), e)
+            continue
+
+        exact = _point_coords(doc.get("location_point_exact")) or [np.nan, np.nan]
+        city = _point_coords(doc.get("location_point_city")) or exact
+        exact_lon.append(exact[0])
+        exact_lat.append(exact[1])
+        city_lon.append(city[0])
+        city_lat.append(city[1])
+
+        sector.append(_code("sector", doc.get("sector", "")))
+        job_role.append(_code("job_role", doc.get("job_role", "")))
+        wm = canonical_match_fields(raw)["work_mode_norm"]
+        work_mode.append(_WORK_MODES.index(wm) if wm in _WORK_MODES else 0)
+        duration.append(int(doc.get("duration_months") or 0))
+
+        for s in doc.get("skills") or []:
+            skill_codes.append(_code("skills", s))
+        skill_offsets.append(len(skill_codes))
+
+        id_hashes.append(_id_hash(raw.get("id")))
+        blob = json.dumps(raw, default=_json_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        doc_chunks.append(blob)
+        doc_offsets.append(doc_offsets[-1] + len(blob))
+
+    count = len(id_hashes)
+    columns: Dict[str, np.ndarray] = {
+        "exact_lat": np.asarray(exact_lat, dtype=np.float64),
+        "exact_lon": np.asarray(exact_lon, dtype=np.float64),
+        "city_lat": np.asarray(city_lat, dtype=np.float64),
+        "city_lon": np.asarray(city_lon, dtype=np.float64),
+        "sector": np.asarray(sector, dtype=np.int32),
+        "job_role": np.asarray(job_role, dtype=np.int32),
+        "work_mode": np.asarray(work_mode, dtype=np.int8),
+        "duration_months": np.asarray(duration, dtype=np.int32),
+        "skills_codes": np.asarray(skill_codes, dtype=np.int32),
+        "skills_offsets": np.asarray(skill_offsets, dtype=np.int64),
+        "docs": np.frombuffer(b"".join(doc_chunks), dtype=np.uint8),
+        "docs_offsets": np.asarray(doc_offsets, dtype=np.int64),
+    }
+
+    # Indexes: id hash -> row, skill posting lists, geo grid cells
+    hashes = np.asarray(id_hashes, dtype=np.uint64)
+    id_order = np.argsort(hashes, kind="stable")
+    columns["id_hash"] = hashes[id_order]
+    columns["id_rows"] = id_order.astype(np.int64)
+
+    skill_rows = np.repeat(np.arange(count, dtype=np.int64), np.diff(columns["skills_offsets"]))
+    idx = _grouped_index(columns["skills_codes"].astype(np.int64))
+    columns["skills_idx_keys"] = idx["keys"]
+    columns["skills_idx_offsets"] = idx["offsets"]
+    columns["skills_idx_rows"] = skill_rows[idx["rows"]]
+
+    for geo in ("exact", "city"):
+        lat = columns[f"{geo}_lat"]
+        lon = columns[f"{geo}_lon"]
+        valid = np.flatnonzero(~(np.isnan(lat) | np.isnan(lon)))
+        idx = _grouped_index(_cell_key(lat[valid], lon[valid]))
+        columns[f"grid_{geo}_keys"] = idx["keys"]
+        columns[f"grid_{geo}_offsets"] = idx["offsets"]
+        columns[f"grid_{geo}_rows"] = valid[idx["rows"]].astype(np.int64)
+
+    for name, arr in columns.items():
+        np.save(os.path.join(tmp_dir, f"{name}.npy"), arr, allow_pickle=False)
+
+    meta = {
+        "format": FORMAT_VERSION,
+        "version": version,
+        "created_at": datetime.now().isoformat(),
+        "count": count,
+        "grid_cell_deg": GRID_CELL_DEG,
+        "work_modes": list(_WORK_MODES),
+        "vocab": {kind: sorted(table, key=table.get) for kind, table in vocab.items()},
+    }
+    with open(os.path.join(tmp_dir, META_FILE), "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+
+    os.rename(tmp_dir, final_dir)
+    _write_current(root, f"v{version}")
+    logger.info("Wrote catalog snapshot %s (%d internships) to %s", version, count, final_dir)
+    _prune_versions(root, keep)
+    return version
+
+def _write_current(root: str, name: str) -> None:
+    tmp = os.path.join(root, f".{CURRENT_FILE}.{os.getpid()}")
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(name)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, os.path.join(root, CURRENT_FILE))
+
+def _read_current(root: str) -> Optional[str]:
+    try:
+        with open(os.path.join(root, CURRENT_FILE), "r", encoding="utf-8") as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+def _prune_versions(root: str, keep: int) -> None:
+    """Remove old version dirs (never the current one). Open mmaps stay valid."""
+    current = _read_current(root)
+    versions = sorted(d for d in os.listdir(root) if d.startswith("v") and os.path.isdir(os.path.join(root, d)))
+    stale = [d for d in versions if d != current][: max(0, len(versions) - max(1, keep))]
+    for name in stale:
+        path = os.path.join(root, name)
+        for fname in os.listdir(path):
+            os.remove(os.path.join(path, fname))
+        os.rmdir(path)
+        logger.info("Pruned catalog snapshot %s", name)
+
+# ---------------------------- Reader ---------------------------------- #
+
+class CatalogSnapshot:
+    """
+    Read-only, memory-mapped view of one snapshot version.
+    Arrays are opened with mmap so workers share pages via the OS page cache.
+    Implements the subset of DatabaseManager used by the recommender.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        with open(os.path.join(path, META_FILE), "r", encoding="utf-8") as f:
+            self.meta: Dict[str, Any] = json.load(f)
+        if self.meta.get("format") != FORMAT_VERSION:
+            raise ValueError(f"unsupported snapshot format: {self.meta.get('format')}")
+        self.version: str = self.meta["version"]
+        self.count: int = int(self.meta["count"])
+        self._cols: Dict[str, np.ndarray] = {}
+        for fname in os.listdir(path):
+            if fname.endswith(".npy"):
+                self._cols[fname[:-4]] = np.load(os.path.join(path, fname), mmap_mode="r", allow_pickle=False)
+        vocab = self.meta.get("vocab", {})
+        self._codes = {kind: {v: i for i, v in enumerate(values)} for kind, values in vocab.items()}
+        self._work_modes = {m: i for i, m in enumerate(self.meta.get("work_modes", _WORK_MODES))}
+
+    def mapped_bytes(self) -> int:
+        """Total size of the memory-mapped column files."""
+        return int(sum(col.nbytes for col in self._cols.values()))
+
+    # ----------------------- Row access ----------------------------- #
+    def document(self, row: int) -> Dict[str, Any]:
+        offsets = self._cols["docs_offsets"]
+        start, end = int(offsets[row]), int(offsets[row + 1])
+        return json.loads(self._cols["docs"][start:end].tobytes().decode("utf-8"), object_hook=_json_hook)
+
+    def documents(self, rows: Iterable[int]) -> List[Dict[str, Any]]:
+        return [self.document(int(r)) for r in rows]
+
+    def row_for_id(self, internship_id: Any) -> Optional[int]:
+        hashes = self._cols["id_hash"]
+        h = np.uint64(_id_hash(internship_id))
+        pos = int(np.searchsorted(hashes, h))
+        while pos < len(hashes) and hashes[pos] == h:
+            row = int(self._cols["id_rows"][pos])
+            if str(self.document(row).get("id")) == str(internship_id):
+                return row
+            pos += 1
+        return None
+
+    def _posting(self, name: str, code: int) -> np.ndarray:
+        keys = self._cols[f"{name}_idx_keys"]
+        pos = int(np.searchsorted(keys, code))
+        if pos >= len(keys) or int(keys[pos]) != code:
+            return np.empty(0, dtype=np.int64)
+        offsets = self._cols[f"{name}_idx_offsets"]
+        return np.asarray(self._cols[f"{name}_idx_rows"][offsets[pos]:offsets[pos + 1]])
+
+    def _grid_rows(self, geo: str, lat: float, lon: float, radius_km: Optional[float]) -> np.ndarray:
+        """Rows whose grid cell intersects the radius bounding box (all rows if no radius)."""
+        rows = self._cols[f"grid_{geo}_rows"]
+        if radius_km is None:
+            return np.asarray(rows)
+        dlat = radius_km / 111.0
+        dlon = radius_km / max(1e-6, 111.0 * float(np.cos(np.radians(min(89.0, abs(lat))))))
+        cell = float(self.meta.get("grid_cell_deg", GRID_CELL_DEG))
+        r0 = int(np.floor((max(-90.0, lat - dlat) + 90.0) / cell))
+        r1 = int(np.floor((min(90.0, lat + dlat) + 90.0) / cell))
+        c0 = int(np.floor((max(-180.0, lon - dlon) + 180.0) / cell))
+        c1 = int(np.floor((min(180.0, lon + dlon) + 180.0) / cell))
+        keys = self._cols[f"grid_{geo}_keys"]
+        offsets = self._cols[f"grid_{geo}_offsets"]
+        parts: List[np.ndarray] = []
+        for r in range(r0, r1 + 1):
+            lo = int(np.searchsorted(keys, r * 100000 + c0))
+            hi = int(np.searchsorted(keys, r * 100000 + c1, side="right"))
+            if hi > lo:
+                parts.append(np.asarray(rows[offsets[lo]:offsets[hi]]))
+        return np.concatenate(parts) if parts else np.empty(0, dtype=np.int64)
+
+    # --------------------- Query interface -------------------------- #
+    def find_nearest_internships(
+        self,
+        user_lat: float,
+        user_lon: float,
+        preference: Optional[Dict[str, Any]] = None,
+        n: int = 5,
+        geo_field: str = "location_point_exact",
+        max_distance_km: Optional[int] = None,
+        projection: Optional[Dict[str, Any]] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Nearest N internships with the same preference filters as the live query.
+        `projection` is accepted for interface parity and ignored: documents are
+        local and decoded per row anyway.
+        """
+        geo = "city" if geo_field == "location_point_city" else "exact"
+        radius = None if max_distance_km is None else float(max(0, max_distance_km))
+        rows = self._grid_rows(geo, float(user_lat), float(user_lon), radius)
+        if rows.size == 0:
+            return []
+
+        mask = np.ones(rows.size, dtype=bool)
+
+        match = preference_match_values(preference)
+        if match["sectors"]:
+            codes = [self._codes["sector"][s] for s in match["sectors"] if s in self._codes["sector"]]
+            mask &= np.isin(self._cols["sector"][rows], codes)
+
+        if match["roles"]:
+            codes = [self._codes["job_role"][r] for r in match["roles"] if r in self._codes["job_role"]]
+            mask &= np.isin(self._cols["job_role"][rows], codes)
+
+        if match["work_mode"]:
+            mask &= self._cols["work_mode"][rows] == self._work_modes.get(match["work_mode"], -1)
+
+        if match["min_months"]:
+            mask &= self._cols["duration_months"][rows] >= match["min_months"]
+
+        if match["skills"]:
+            postings = [self._posting("skills", self._codes["skills"][s]) for s in match["skills"] if s in self._codes["skills"]]
+            hits = np.concatenate(postings) if postings else np.empty(0, dtype=np.int64)
+            mask &= np.isin(rows, hits)
+
+        rows = rows[mask]
+        if rows.size == 0:
+            return []
+        dist = haversine_km(
+            float(user_lat), float(user_lon),
+            self._cols[f"{geo}_lat"][rows], self._cols[f"{geo}_lon"][rows],
+        )
+        if radius is not None:
+            keep = dist <= radius
+            rows, dist = rows[keep], dist[keep]
+        order = np.argsort(dist, kind="stable")[: int(n)]
+        return self.documents(rows[order])
+
+    def find_internships_by_ids(self, ids: List[str], projection: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """Documents for `ids` in the given order (unknown ids are skipped)."""
+        rows = [self.row_for_id(i) for i in ids or []]
+        return self.documents(r for r in rows if r is not None)
+
+    def get_collection_count(self) -> int:
+        return self.count
+
+# --------------------------- Global access ---------------------------- #
+
+_snapshot_lock = threading.Lock()
+_snapshot: Optional[CatalogSnapshot] = None
+_snapshot_checked_at = 0.0
+
+def open_current(root: str) -> Optional[CatalogSnapshot]:
+    """Open whatever version CURRENT points to (None if no snapshot)."""
+    name = _read_current(root)
+    if not name:
+        return None
+    return CatalogSnapshot(os.path.join(root, name))
+
+def get_catalog_snapshot() -> Optional[CatalogSnapshot]:
+    """
+    Process-wide snapshot, or None when CATALOG_SNAPSHOT_DIR is unset.
+    Re-reads CURRENT at most every CATALOG_SNAPSHOT_CHECK_SECONDS and swaps
+    to a newer version; readers holding the old instance keep a valid mmap.
+    """
+    global _snapshot, _snapshot_checked_at
+    if not SNAPSHOT_ROOT:
+        return None
+    now = time.monotonic()
+    if _snapshot is not None and now - _snapshot_checked_at < SNAPSHOT_CHECK_SECONDS:
+        return _snapshot
+    with _snapshot_lock:
+        if _snapshot is not None and now - _snapshot_checked_at < SNAPSHOT_CHECK_SECONDS:
+            return _snapshot
+        _snapshot_checked_at = now
+        try:
+            name = _read_current(SNAPSHOT_ROOT)
+            if name and (_snapshot is None or os.path.basename(_snapshot.path) != name):
+                _snapshot = CatalogSnapshot(os.path.join(SNAPSHOT_ROOT, name))
+                logger.info("Loaded catalog snapshot %s (%d internships)", _snapshot.version, _snapshot.count)
+        except Exception as e:
+            logger.error("Failed to load catalog snapshot from %s: %s", SNAPSHOT_ROOT, e)
+    return _snapshot
+
+# ------------------------------ CLI ----------------------------------- #
+
+def _iter_database_documents(batch_size: int = 1000) -> Iterable[Dict[str, Any]]:
+    from app.database import get_database
+
+    db = get_database()
+    if not db.connect() or db.internships_collection is None:
+        raise RuntimeError("database connection failed")
+    yield from db.internships_collection.find({}, SNAPSHOT_PROJECTION).batch_size(batch_size)
+
+def iter_catalog_documents(snapshot_root: Optional[str] = None) -> Iterable[Dict[str, Any]]:
+    """Raw catalog documents from a snapshot root if given, else from MongoDB."""
+    if snapshot_root:
+        snap = open_current(snapshot_root)
+        if snap is None:
+            raise RuntimeError(f"no snapshot under {snapshot_root}")
+        return (snap.document(r) for r in range(snap.count))
+    return _iter_database_documents()
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.snapshot", description="Catalog snapshot tools")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    build = sub.add_parser("build", help="Export the catalog from MongoDB into a new snapshot version")
+    build.add_argument("--root", default=SNAPSHOT_ROOT, help="Snapshot root dir (default: $CATALOG_SNAPSHOT_DIR)")
+    build.add_argument("--version", default=None, help="Version label (default: timestamp)")
+    build.add_argument("--keep", type=int, default=3, help="Number of versions to keep")
+
+    info = sub.add_parser("info", help="Show the current snapshot")
+    info.add_argument("--root", default=SNAPSHOT_ROOT)
+
+    args = parser.parse_args(argv)
+    if not args.root:
+        parser.error("--root or CATALOG_SNAPSHOT_DIR is required")
+
+    if args.command == "build":
+        version = build_snapshot(_iter_database_documents(), args.root, version=args.version, keep=args.keep)
+        print(version)
+        return 0
+
+    snap = open_current(args.root)
+    if snap is None:
+        print("no snapshot")
+        return 1
+    print(json.dumps({k: v for k, v in snap.meta.items() if k != "vocab"}, indent=2))
+    return 0
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    raise SystemExit(main())
@@ -0,0 +1,235 @@
+import os
+import re
+import sys
+import time
+import logging
+import argparse
+import threading
+import subprocess
+from collections import defaultdict
+from typing import List, Dict, Any, Optional, Callable
+
+from app.utils import get_config
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------- Config ---------------------------------- #
+
+# Cities used for the synthetic warm-up recommends
+WARMUP_CITIES = [c.strip() for c in os.getenv("WARMUP_CITIES", "Delhi,Mumbai,Bangalore").split(",") if c.strip()]
+# Synthetic rounds to run at most; warm-up stops early once a round meets the budget
+WARMUP_ROUNDS = int(os.getenv("WARMUP_ROUNDS", "3") or 3)
+# Slowest synthetic recommend allowed in a round for the SLO to count as met
+READY_LATENCY_BUDGET_MS = float(os.getenv("READY_LATENCY_BUDGET_MS", "500") or 500)
+# Delay between database connect attempts while warming up
+WARMUP_CONNECT_RETRY_SECONDS = float(os.getenv("WARMUP_CONNECT_RETRY_SECONDS", "5") or 5)
+
+# Common education strings; primes the qualification category cache
+_WARMUP_QUALIFICATIONS = (
+    "B.Tech", "B.E", "BSc", "BCom", "BA", "BCA", "BBA",
+    "M.Tech", "MSc", "MCom", "MA", "MBA", "MCA", "Diploma", "ITI", "Polytechnic", "12th",
+)
+
+# ------------------------- Import-time report -------------------------- #
+
+_IMPORT_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s+)(\S+)\s*$")
+
+def measure_import_times(module: str = "app.main") -> Dict[str, Any]:
+    """
+    Import `module` in a fresh interpreter with -X importtime and summarize.
+    Returns total_ms (cumulative for the module) and a per-package breakdown
+    of self time, so each package is charged only for its own modules.
+    """
+    app_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=app_root,
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import of {module} failed:\n{proc.stderr.strip()[-2000:]}")
+
+    by_package: Dict[str, float] = defaultdict(float)
+    total_us = 0
+    for line in proc.stderr.splitlines():
+        m = _IMPORT_LINE.match(line)
+        if not m:
+            continue
+        self_us, cumulative_us, _indent, name = int(m.group(1)), int(m.group(2)), m.group(3), m.group(4)
+        by_package[name.split(".")[0]] += self_us / 1000.0
+        if name == module:
+            total_us = cumulative_us
+
+    breakdown = sorted(by_package.items(), key=lambda kv: kv[1], reverse=True)
+    return {
+        "module": module,
+        "total_ms": total_us / 1000.0,
+        "packages": [{"package": pkg, "self_ms": round(ms, 2)} for pkg, ms in breakdown],
+    }
+
+def format_import_report(report: Dict[str, Any], budget_ms: float, top: int = 15) -> str:
+    lines = [f"Import time for {report['module']}: {report['total_ms']:.1f}ms (budget {budget_ms:.0f}ms)"]
+    for row in report["packages"][:top]:
+        lines.append(f"  {row['package']:<28} {row['self_ms']:>9.1f}ms")
+    return "\n".join(lines)
+
+# ----------------------------- Warm-up --------------------------------- #
+
+class WarmUp:
+    """
+    Startup warm-up for one worker; `ready` flips once it completes.
+
+    Steps: connect to MongoDB (retrying until it answers or `stop()`),
+    verify indexes and build missing ones when configured (both skipped
+    when the recommender reads a SQLite catalog or a snapshot), preload the
+    recommender's lazily loaded resources, build the city pools and
+    regional fallbacks, then run synthetic recommends for WARMUP_CITIES
+    until a round's slowest call fits READY_LATENCY_BUDGET_MS (or
+    WARMUP_ROUNDS run out; the worker is then ready with slo_met False).
+    """
+
+    def __init__(self) -> None:
+        self.state = "pending"  # pending | running | ready
+        self.steps: List[Dict[str, Any]] = []
+        self.slo_met: Optional[bool] = None
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def ready(self) -> bool:
+        return self.state == "ready"
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _step(self, name: str, fn: Callable[[], Any]) -> Any:
+        start = time.perf_counter()
+        entry: Dict[str, Any] = {"step": name}
+        try:
+            result = fn()
+            entry.update(ok=True, detail=result)
+            return result
+        except Exception as e:
+            logger.warning("Warm-up step %s failed: %s", name, e)
+            entry.update(ok=False, error=str(e))
+            return None
+        finally:
+            entry["ms"] = round((time.perf_counter() - start) * 1000.0, 1)
+            with self._lock:
+                self.steps.append(entry)
+
+    def _connect(self, db: Any) -> bool:
+        attempts = 0
+        while not self._stop.is_set():
+            attempts += 1
+            if db.connect():
+                return True
+            logger.warning("Warm-up: database unavailable (attempt %d); retrying in %.0fs",
+                           attempts, WARMUP_CONNECT_RETRY_SECONDS)
+            self._stop.wait(WARMUP_CONNECT_RETRY_SECONDS)
+        return False
+
+    @staticmethod
+    def _indexes(db: Any, config: Dict[str, Any]) -> Dict[str, Any]:
+        if not config.get("verify_indexes_on_startup"):
+            return {"skipped": True}
+        report = db.verify_indexes()
+        if (report.get("missing") or report.get("mismatched")) and config.get("build_indexes_on_startup"):
+            # synchronous here: the worker is not ready until its indexes exist
+            report["built"] = db.ensure_indexes()
+        if report.get("needs_backfill"):
+            logger.warning("Internships lack the canonical match fields; preference filters match nothing "
+                           "until `python -m app.database backfill` runs")
+        return {k: report.get(k) for k in ("ok", "missing", "mismatched", "needs_backfill", "built") if k in report}
+
+    @staticmethod
+    def _synthetic_round(recommender: Any) -> Dict[str, Any]:
+        from app.tables import CITY_COORDINATES
+
+        timings: Dict[str, float] = {}
+        for city in WARMUP_CITIES:
+            coords = CITY_COORDINATES.get(city)
+            if coords is None:
+                continue
+            profile = {
+                "id": f"warmup-{city.lower()}",
+                "location": {"lat": coords["lat"], "lon": coords["lon"], "city": city, "max_distance_km": 50},
+                "skills": ["python", "communication"],
+                "education": "B.Tech",
+                "preference": {"preferred_job_roles": ["software engineer"], "preferred_sectors": ["technology"]},
+            }
+            start = time.perf_counter()
+            recommender.recommend_internships(profile, top_k=5)
+            timings[city] = round((time.perf_counter() - start) * 1000.0, 1)
+        return {"max_ms": max(timings.values()) if timings else 0.0, "by_city": timings}
+
+    def run(self, recommender: Any, config: Dict[str, Any]) -> None:
+        from app.database import get_database
+
+        self.state = "running"
+        self.started_at = time.time()
+        if recommender.uses_mongo:
+            db = get_database()
+            if not self._step("connect", lambda: self._connect(db)):
+                logger.warning("Warm-up stopped before the database connected")
+                return
+            self._step("indexes", lambda: self._indexes(db, config))
+        self._step("preload", lambda: recommender.preload(list(_WARMUP_QUALIFICATIONS)))
+        if recommender.pools is not None:
+            self._step("city_pools", recommender.pools.rebuild)
+            recommender.pools.start()
+        self._step("regional_fallbacks", recommender.precompute_regional_fallbacks)
+        for i in range(max(1, WARMUP_ROUNDS)):
+            result = self._step(f"synthetic_round_{i + 1}", lambda: self._synthetic_round(recommender))
+            if result is not None and result["max_ms"] <= READY_LATENCY_BUDGET_MS:
+                self.slo_met = True
+                break
+        else:
+            self.slo_met = False
+            logger.warning("Warm-up finished without meeting the %.0fms budget; serving anyway", READY_LATENCY_BUDGET_MS)
+        self.finished_at = time.time()
+        self.state = "ready"
+        logger.info("Warm-up complete in %.0fms (slo_met=%s)", (self.finished_at - self.started_at) * 1000.0, self.slo_met)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            steps = list(self.steps)
+        return {
+            "ready": self.ready,
+            "state": self.state,
+            "slo_met": self.slo_met,
+            "latency_budget_ms": READY_LATENCY_BUDGET_MS,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "steps": steps,
+        }
+
+# ------------------------------- CLI ---------------------------------- #
+
+def main(argv: Optional[List[str]] = None) -> int:
+    config = get_config()
+    parser = argparse.ArgumentParser(prog="python -m app.startup", description="Service startup tools")
+    parser.add_argument("--import-report", action="store_true", help="Print an import-time breakdown of the API module")
+    parser.add_argument("--module", default="app.main", help="Module to measure (default: app.main)")
+    parser.add_argument("--budget-ms", type=float, default=float(config["startup_import_budget_ms"]),
+                        help="Fail (exit 1) if total import time exceeds this budget")
+    parser.add_argument("--top", type=int, default=15, help="Number of packages to list")
+    args = parser.parse_args(argv)
+
+    if not args.import_report:
+        parser.print_help()
+        return 0
+
+    report = measure_import_times(args.module)
+    print(format_import_report(report, args.budget_ms, args.top))
+    if report["total_ms"] > args.budget_ms:
+        print(f"OVER BUDGET by {report['total_ms'] - args.budget_ms:.1f}ms")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,470 @@
+import os
+import re
+import json
+import math
+import time
+import sqlite3
+import logging
+import argparse
+import threading
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Tuple
+
+from app.preprocessing import preprocess_internship
+from app.database import DatabaseManager, get_database, normalize_values, canonical_match_fields, preference_match_values
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------- Config ---------------------------------- #
+
+# "mongo" (default) or "sqlite"; a configured CATALOG_SNAPSHOT_DIR still wins for reads
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "mongo").strip().lower()
+SQLITE_CATALOG_PATH = os.getenv("SQLITE_CATALOG_PATH", "catalog.sqlite3")
+
+_KM_PER_DEG_LAT = 111.32
+_EARTH_RADIUS_KM = 6371.0088  # same mean radius as the haversine package
+
+# Great-circle distance from (:lat, :lon) to a row's {geo}_lat/{geo}_lon, in SQL
+_DISTANCE_SQL = (
+    "2 * {r} * asin(sqrt(pow(sin(radians(i.{geo}_lat - :lat) / 2), 2)"
+    " + cos(radians(:lat)) * cos(radians(i.{geo}_lat)) * pow(sin(radians(i.{geo}_lon - :lon) / 2), 2)))"
+)
+
+# --------------------------- Interface -------------------------------- #
+
+class StorageBackend(ABC):
+    """
+    What the recommender needs from an internship store. DatabaseManager
+    (MongoDB) satisfies it as-is and is registered as a virtual subclass;
+    SQLiteBackend implements it here. CatalogSnapshot provides the read
+    side with the same signatures.
+    """
+
+    @abstractmethod
+    def find_nearest_internships(
+        self,
+        user_lat: float,
+        user_lon: float,
+        preference: Optional[Dict[str, Any]] = None,
+        n: int = 5,
+        geo_field: str = "location_point_exact",
+        max_distance_km: Optional[int] = None,
+        projection: Optional[Dict[str, Any]] = None,
+    ) -> List[Dict[str, Any]]:
+        """Nearest `n` internships matching `preference` (see build_nearest_filter), closest first."""
+
+    @abstractmethod
+    def find_internships_by_skills(self, skills: List[str], limit: int = 50) -> List[Dict[str, Any]]:
+        """Internships listing any of `skills`, or naming one in title/description."""
+
+    @abstractmethod
+    def find_internships_by_sector(self, sectors: List[str], limit: int = 50) -> List[Dict[str, Any]]:
+        """Internships in any of `sectors`."""
+
+    @abstractmethod
+    def find_internships_by_ids(self, ids: List[str], projection: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """Internships for `ids`, in the order of `ids` (unknown ids skipped)."""
+
+    @abstractmethod
+    def insert_internships_bulk(self, internships: List[Dict[str, Any]]) -> bool:
+        """Insert documents; True on success."""
+
+    @abstractmethod
+    def get_collection_count(self) -> int:
+        """Number of stored internships."""
+
+StorageBackend.register(DatabaseManager)
+
+# ---------------------------- SQLite ---------------------------------- #
+
+# Narrow row per internship (only what the nearest filter and sort read), the
+# JSON document in its own table so scans never page through it.
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS internships (
+    rowid INTEGER PRIMARY KEY,
+    id TEXT UNIQUE,
+    sector TEXT,
+    job_role TEXT,
+    work_mode TEXT,
+    duration_months INTEGER,
+    exact_lat REAL, exact_lon REAL,
+    city_lat REAL, city_lon REAL
+);
+CREATE INDEX IF NOT EXISTS idx_internships_sector ON internships(sector, job_role);
+CREATE TABLE IF NOT EXISTS internship_docs (
+    internship INTEGER PRIMARY KEY,
+    doc TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS internship_skills (
+    internship INTEGER NOT NULL,
+    skill TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_skills_skill ON internship_skills(skill, internship);
+CREATE VIRTUAL TABLE IF NOT EXISTS geo_exact USING rtree(id, min_lat, max_lat, min_lon, max_lon);
+CREATE VIRTUAL TABLE IF NOT EXISTS geo_city USING rtree(id, min_lat, max_lat, min_lon, max_lon);
+"""
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"$date": value.isoformat()}
+    return str(value)
+
+def _json_hook(obj: Dict[str, Any]) -> Any:
+    if len(obj) == 1 and "$date" in obj:
+        try:
+            return datetime.fromisoformat(obj["$date"])
+        except (TypeError, ValueError):
+            return obj["$date"]
+    return obj
+
+def _point(value: Any) -> Optional[Tuple[float, float]]:
+    """(lat, lon) of a GeoJSON point, if it has usable coordinates."""
+    coords = (value or {}).get("coordinates") if isinstance(value, dict) else None
+    if not coords or len(coords) < 2 or coords[0] is None or coords[1] is None:
+        return None
+    return float(coords[1]), float(coords[0])
+
+def _regexp(pattern: str, value: Any) -> bool:
+    return value is not None and re.search(pattern, str(value), re.IGNORECASE) is not None
+
+def _bbox(lat: float, lon: float, radius_km: float) -> Tuple[float, float, float, float]:
+    dlat = radius_km / _KM_PER_DEG_LAT
+    dlon = radius_km / (_KM_PER_DEG_LAT * max(0.01, math.cos(math.radians(lat))))
+    return lat - dlat, lat + dlat, lon - dlon, lon + dlon
+
+def _in(column: str, prefix: str, values: List[str], params: Dict[str, Any]) -> str:
+    """`column IN (:prefix0, ...)`, adding the values to `params`."""
+    names = []
+    for k, v in enumerate(values):
+        params[f"{prefix}{k}"] = v
+        names.append(f":{prefix}{k}")
+    return f"{column} IN ({','.join(names)})"
+
+class SQLiteBackend(StorageBackend):
+    """
+    Single-file internship store for offline use. The fields the nearest
+    query filters on are denormalized into narrow columns from the
+    preprocessed document (so legacy `preference.work_mode` and
+    `duration.months` are already folded in), skills go to a side table,
+    both geo points are indexed in R*Tree tables, and the raw document is
+    kept as JSON in `internship_docs`. A nearest query is an R*Tree
+    bounding-box probe joined with the column filters, ranked by
+    great-circle distance in SQL; only the winners' documents are read.
+    """
+
+    def __init__(self, path: str = SQLITE_CATALOG_PATH) -> None:
+        self.path = path
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        with self._write_lock:
+            self._conn().executescript(_SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.create_function("regexp", 2, _regexp, deterministic=True)
+            try:
+                conn.execute("SELECT asin(sqrt(pow(sin(radians(1)), 2)))")
+            except sqlite3.OperationalError:
+                # SQLite built without math functions: provide the ones _DISTANCE_SQL uses
+                for name, fn in (("sin", math.sin), ("cos", math.cos), ("asin", math.asin),
+                                 ("sqrt", math.sqrt), ("radians", math.radians)):
+                    conn.create_function(name, 1, fn, deterministic=True)
+                conn.create_function("pow", 2, math.pow, deterministic=True)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _decode(doc: str) -> Dict[str, Any]:
+        return json.loads(doc, object_hook=_json_hook)
+
+    def _docs(self, conn: sqlite3.Connection, rowids: List[int]) -> List[Dict[str, Any]]:
+        """Documents for `rowids`, in that order."""
+        if not rowids:
+            return []
+        params: Dict[str, Any] = {}
+        sql = f"SELECT internship, doc FROM internship_docs WHERE {_in('internship', 'r', rowids, params)}"
+        docs = dict(conn.execute(sql, params))
+        return [self._decode(docs[r]) for r in rowids if r in docs]
+
+    # ---------------------------- Writes ------------------------------ #
+    def insert_internships_bulk(self, internships: List[Dict[str, Any]]) -> bool:
+        if not internships:
+            return True
+        rows = []
+        docs: List[Tuple[str, str]] = []
+        skills: List[Tuple[str, str]] = []
+        for raw in internships:
+            try:
+                doc = preprocess_internship(raw)
+            except Exception as e:
+                logger.warning("SQLite insert preprocess failed (id=%s): %s", (raw or {}).get("id"), e)
+                continue
+            if raw.get("id") is None:
+                logger.warning("SQLite insert skipped a document without an id")
+                continue
+            iid = str(raw.get("id"))
+            exact = _point(doc.get("location_point_exact"))
+            city = _point(doc.get("location_point_city")) or exact
+            match = canonical_match_fields(raw)
+            clean = {k: v for k, v in raw.items() if k != "_id"}
+            rows.append((
+                iid,
+                doc.get("sector") or None,
+                doc.get("job_role") or None,
+                match["work_mode_norm"] or None,
+                match["duration_months"],
+                exact[0] if exact else None, exact[1] if exact else None,
+                city[0] if city else None, city[1] if city else None,
+            ))
+            docs.append((json.dumps(clean, default=_json_default, ensure_ascii=False, separators=(",", ":")), iid))
+            skills.extend((s, iid) for s in match["skills_norm"] if s)
+        try:
+            with self._write_lock:
+                conn = self._conn()
+                with conn:
+                    conn.execute("CREATE TEMP TABLE IF NOT EXISTS _batch_ids (id TEXT PRIMARY KEY)")
+                    conn.execute("DELETE FROM _batch_ids")
+                    conn.executemany("INSERT OR IGNORE INTO _batch_ids (id) VALUES (?)", [(r[0],) for r in rows])
+                    # replace semantics: drop existing rows (and their derived entries) for these ids
+                    replaced = "SELECT i.rowid FROM internships i JOIN _batch_ids b ON b.id = i.id"
+                    conn.execute(f"DELETE FROM internship_skills WHERE internship IN ({replaced})")
+                    conn.execute(f"DELETE FROM internship_docs WHERE internship IN ({replaced})")
+                    conn.execute(f"DELETE FROM geo_exact WHERE id IN ({replaced})")
+                    conn.execute(f"DELETE FROM geo_city WHERE id IN ({replaced})")
+                    conn.execute("DELETE FROM internships WHERE id IN (SELECT id FROM _batch_ids)")
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO internships (id, sector, job_role, work_mode, duration_months,"
+                        " exact_lat, exact_lon, city_lat, city_lon) VALUES (?,?,?,?,?,?,?,?,?)",
+                        rows,
+                    )
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO internship_docs (internship, doc) SELECT rowid, ? FROM internships WHERE id = ?",
+                        docs,
+                    )
+                    conn.executemany(
+                        "INSERT INTO internship_skills (internship, skill) SELECT rowid, ? FROM internships WHERE id = ?",
+                        skills,
+                    )
+                    for geo in ("exact", "city"):
+                        conn.execute(
+                            f"INSERT INTO geo_{geo} SELECT i.rowid, i.{geo}_lat, i.{geo}_lat, i.{geo}_lon, i.{geo}_lon"
+                            f" FROM internships i JOIN _batch_ids b ON b.id = i.id WHERE i.{geo}_lat IS NOT NULL"
+                        )
+            logger.info("Inserted %d internships into %s", len(rows), self.path)
+            return True
+        except sqlite3.Error as e:
+            logger.error("Failed to insert internships into %s: %s", self.path, e)
+            return False
+
+    # ---------------------------- Reads ------------------------------- #
+    def find_nearest_internships(
+        self,
+        user_lat: float,
+        user_lon: float,
+        preference: Optional[Dict[str, Any]] = None,
+        n: int = 5,
+        geo_field: str = "location_point_exact",
+        max_distance_km: Optional[int] = None,
+        projection: Optional[Dict[str, Any]] = None,
+    ) -> List[Dict[str, Any]]:
+        """Same filter semantics as build_nearest_filter; `projection` is ignored."""
+        geo = "city" if geo_field == "location_point_city" else "exact"
+        params: Dict[str, Any] = {"lat": float(user_lat), "lon": float(user_lon), "n": max(0, int(n))}
+        where: List[str] = [f"i.{geo}_lat IS NOT NULL"]
+
+        join = ""
+        if max_distance_km is not None:
+            radius = float(max(0, max_distance_km))
+            params["min_lat"], params["max_lat"], params["min_lon"], params["max_lon"] = _bbox(
+                params["lat"], params["lon"], radius)
+            params["radius"] = radius
+            join = f"JOIN geo_{geo} g ON g.id = i.rowid"
+            where.append("g.max_lat >= :min_lat AND g.min_lat <= :max_lat"
+                         " AND g.max_lon >= :min_lon AND g.min_lon <= :max_lon")
+
+        match = preference_match_values(preference)
+        if match["sectors"]:
+            where.append(_in("i.sector", "sec", match["sectors"], params))
+        if match["roles"]:
+            where.append(_in("i.job_role", "role", match["roles"], params))
+        if match["skills"]:
+            where.append("EXISTS (SELECT 1 FROM internship_skills s WHERE s.internship = i.rowid"
+                         f" AND {_in('s.skill', 'skill', match['skills'], params)})")
+        if match["work_mode"]:
+            where.append("i.work_mode = :work_mode")
+            params["work_mode"] = match["work_mode"]
+        if match["min_months"]:
+            where.append("i.duration_months >= :min_duration")
+            params["min_duration"] = match["min_months"]
+
+        distance = _DISTANCE_SQL.format(r=_EARTH_RADIUS_KM, geo=geo)
+        sql = (f"SELECT rid FROM (SELECT i.rowid AS rid, {distance} AS d FROM internships i {join}"
+               f" WHERE {' AND '.join(where)})"
+               + (" WHERE d <= :radius" if "radius" in params else "")
+               + " ORDER BY d, rid LIMIT :n")
+        try:
+            conn = self._conn()
+            top = [rid for (rid,) in conn.execute(sql, params)]
+            return self._docs(conn, top)
+        except sqlite3.Error as e:
+            logger.error("SQLite nearest query failed: %s", e)
+            return []
+
+    def find_internships_by_skills(self, skills: List[str], limit: int = 50) -> List[Dict[str, Any]]:
+        skills_norm = [str(s).lower() for s in (skills or []) if s]
+        if not skills_norm:
+            return []
+        params: Dict[str, Any] = {
+            "pattern": "|".join([f"\\b{re.escape(r)}\\b" for r in skills_norm]),
+            "limit": int(limit),
+        }
+        sql = (
+            "SELECT d.doc FROM internships i JOIN internship_docs d ON d.internship = i.rowid WHERE"
+            " EXISTS (SELECT 1 FROM internship_skills s WHERE s.internship = i.rowid"
+            f" AND {_in('s.skill', 'skill', skills_norm, params)})"
+            " OR regexp(:pattern, json_extract(d.doc, '$.title'))"
+            " OR regexp(:pattern, json_extract(d.doc, '$.description'))"
+            " ORDER BY i.rowid LIMIT :limit"
+        )
+        try:
+            return [self._decode(doc) for (doc,) in self._conn().execute(sql, params)]
+        except sqlite3.Error as e:
+            logger.error("SQLite skill query failed: %s", e)
+            return []
+
+    def find_internships_by_sector(self, sectors: List[str], limit: int = 50) -> List[Dict[str, Any]]:
+        wanted = normalize_values(sectors)
+        if not wanted:
+            return []
+        params: Dict[str, Any] = {"limit": int(limit)}
+        sql = (f"SELECT rowid FROM internships WHERE {_in('sector', 'sec', wanted, params)}"
+               " ORDER BY rowid LIMIT :limit")
+        try:
+            conn = self._conn()
+            return self._docs(conn, [rid for (rid,) in conn.execute(sql, params)])
+        except sqlite3.Error as e:
+            logger.error("SQLite sector query failed: %s", e)
+            return []
+
+    def find_internships_by_ids(self, ids: List[str], projection: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        wanted = [str(i) for i in (ids or []) if i is not None]
+        if not wanted:
+            return []
+        params: Dict[str, Any] = {}
+        sql = f"SELECT id, rowid FROM internships WHERE {_in('id', 'id', wanted, params)}"
+        try:
+            conn = self._conn()
+            rowids = dict(conn.execute(sql, params))
+            return self._docs(conn, [rowids[i] for i in wanted if i in rowids])
+        except sqlite3.Error as e:
+            logger.error("SQLite id lookup failed: %s", e)
+            return []
+
+    def get_collection_count(self) -> int:
+        try:
+            return int(self._conn().execute("SELECT COUNT(*) FROM internships").fetchone()[0])
+        except sqlite3.Error as e:
+            logger.error("SQLite count failed: %s", e)
+            return 0
+
+# --------------------------- Global access ---------------------------- #
+
+_backend_lock = threading.Lock()
+_sqlite_backend: Optional[SQLiteBackend] = None
+
+def get_storage_backend() -> StorageBackend:
+    """Backend selected by STORAGE_BACKEND (the Mongo DatabaseManager by default)."""
+    global _sqlite_backend
+    if STORAGE_BACKEND != "sqlite":
+        return get_database()
+    if _sqlite_backend is None:
+        with _backend_lock:
+            if _sqlite_backend is None:
+                _sqlite_backend = SQLiteBackend(SQLITE_CATALOG_PATH)
+                logger.info("Using SQLite catalog %s (%d internships)", SQLITE_CATALOG_PATH,
+                            _sqlite_backend.get_collection_count())
+    return _sqlite_backend
+
+# ------------------------------ CLI ----------------------------------- #
+
+def _percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+def benchmark(backend: StorageBackend, queries: int = 200, radius_km: int = 60, n: int = 200) -> Dict[str, Any]:
+    """Nearest-with-filters latency over city-centred queries with rotating preferences."""
+    from app.tables import CITY_COORDINATES
+
+    cities = list(CITY_COORDINATES.values())
+    preferences = [
+        {},
+        {"sector": "technology"},
+        {"preferred_job_roles": ["data scientist", "data analyst"], "min_duration_months": 3},
+        {"skills": ["python", "sql"], "work_mode": "hybrid"},
+    ]
+    timings: List[float] = []
+    returned = 0
+    for i in range(queries):
+        c = cities[i % len(cities)]
+        start = time.perf_counter()
+        docs = backend.find_nearest_internships(c["lat"], c["lon"], preferences[i % len(preferences)],
+                                                n=n, max_distance_km=radius_km)
+        timings.append((time.perf_counter() - start) * 1000.0)
+        returned += len(docs)
+    return {
+        "backend": type(backend).__name__,
+        "queries": queries,
+        "avg_returned": round(returned / max(1, queries), 1),
+        "p50_ms": round(_percentile(timings, 0.50), 2),
+        "p95_ms": round(_percentile(timings, 0.95), 2),
+        "max_ms": round(max(timings) if timings else 0.0, 2),
+    }
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from app.snapshot import iter_catalog_documents
+
+    parser = argparse.ArgumentParser(prog="python -m app.storage", description="Storage backend tools")
+    sub = parser.add_subparsers(dest="command", required=True)
+    load = sub.add_parser("load", help="Copy the catalog into a SQLite file")
+    load.add_argument("--sqlite", default=SQLITE_CATALOG_PATH, help="SQLite file (default: $SQLITE_CATALOG_PATH)")
+    load.add_argument("--snapshot", default=None, help="Read the catalog from a snapshot root instead of MongoDB")
+    load.add_argument("--batch-size", type=int, default=5000)
+    bench = sub.add_parser("bench", help="Benchmark nearest queries on SQLite and/or MongoDB")
+    bench.add_argument("--sqlite", default=SQLITE_CATALOG_PATH)
+    bench.add_argument("--mongo", action="store_true", help="Also benchmark the MongoDB backend")
+    bench.add_argument("--queries", type=int, default=200)
+    bench.add_argument("--radius-km", type=int, default=60)
+    args = parser.parse_args(argv)
+
+    if args.command == "load":
+        backend = SQLiteBackend(args.sqlite)
+        batch: List[Dict[str, Any]] = []
+        for doc in iter_catalog_documents(args.snapshot):
+            batch.append(doc)
+            if len(batch) >= args.batch_size:
+                backend.insert_internships_bulk(batch)
+                batch = []
+        backend.insert_internships_bulk(batch)
+        print(f"{args.sqlite}: {backend.get_collection_count()} internships")
+        return 0
+
+    backends: List[StorageBackend] = [SQLiteBackend(args.sqlite)]
+    if args.mongo:
+        db = get_database()
+        if not db.connect():
+            print("could not connect to MongoDB")
+            return 2
+        backends.append(db)
+    for backend in backends:
+        print(json.dumps(benchmark(backend, args.queries, args.radius_km)))
+    return 0
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    raise SystemExit(main())
@@ -0,0 +1,184 @@
+from typing import Dict, List, Tuple
+
+# Static lookup tables used by the recommender.
+# Rows are kept as nested tuple literals: the compiler folds each table into a
+# single constant in the .pyc, so importing this module is an unmarshal rather
+# than a long run of BUILD_MAP/BUILD_LIST ops.
+
+# ------------------------- Related job roles -------------------------- #
+
+_RELATED_JOBS_ROWS: Tuple[Tuple[str, Tuple[str, ...]], ...] = (
+    ("data scientist", ("ml engineer", "data analyst", "data engineer", "ai engineer")),
+    ("ml engineer", ("data scientist", "ai engineer", "data analyst", "machine learning engineer")),
+    ("community intern", ("outreach intern", "social work intern", "volunteer coordinator", "community outreach intern")),
+    ("software engineer", ("full stack developer", "backend developer", "frontend developer", "web developer")),
+    ("marketing intern", ("digital marketing intern", "content marketing intern", "social media intern")),
+    ("business analyst", ("data analyst", "financial analyst", "market research analyst")),
+    ("graphic designer", ("ui/ux designer", "visual designer", "creative designer")),
+    ("sales intern", ("business development intern", "customer service intern", "account manager intern")),
+    ("hr intern", ("recruitment intern", "talent acquisition intern", "employee relations intern")),
+    ("finance intern", ("accounting intern", "financial analyst intern", "investment banking intern")),
+    ("operations intern", ("logistics intern", "supply chain intern", "project coordinator intern")),
+    ("research intern", ("research assistant", "lab assistant", "academic intern")),
+    ("teaching intern", ("education intern", "tutor intern", "training intern")),
+    ("legal intern", ("law intern", "compliance intern", "paralegal intern")),
+    ("medical intern", ("healthcare intern", "nursing intern", "pharmacy intern")),
+    ("engineering intern", ("mechanical engineer intern", "electrical engineer intern", "civil engineer intern")),
+    ("product manager intern", ("product development intern", "project manager intern", "business analyst intern")),
+    ("content writer", ("copywriter", "blogger", "technical writer", "journalist intern")),
+    ("photographer", ("videographer", "media intern", "creative intern")),
+    ("event planner", ("event coordinator", "wedding planner intern", "conference organizer intern")),
+    ("consultant intern", ("strategy intern", "management consultant intern", "business consultant intern")),
+    ("analyst intern", ("data analyst", "financial analyst", "market analyst intern")),
+    ("developer intern", ("software developer intern", "web developer intern", "app developer intern")),
+    ("designer intern", ("graphic designer intern", "ui designer intern", "ux designer intern")),
+    ("manager intern", ("project manager intern", "team leader intern", "operations manager intern")),
+    ("coordinator intern", ("project coordinator intern", "event coordinator intern", "office coordinator intern")),
+    ("specialist intern", ("hr specialist intern", "marketing specialist intern", "sales specialist intern")),
+    ("associate intern", ("business associate intern", "research associate intern", "sales associate intern")),
+    ("executive intern", ("account executive intern", "marketing executive intern", "sales executive intern")),
+    ("officer intern", ("compliance officer intern", "loan officer intern", "security officer intern")),
+    ("technician intern", ("it technician intern", "lab technician intern", "maintenance technician intern")),
+    ("support intern", ("customer support intern", "technical support intern", "administrative support intern")),
+    ("advisor intern", ("financial advisor intern", "career advisor intern", "academic advisor intern")),
+    ("trainer intern", ("corporate trainer intern", "fitness trainer intern", "sales trainer intern")),
+    ("auditor intern", ("internal auditor intern", "external auditor intern", "compliance auditor intern")),
+    ("broker intern", ("real estate broker intern", "insurance broker intern", "stock broker intern")),
+    ("buyer intern", ("procurement intern", "purchasing intern", "sourcing intern")),
+    ("chef intern", ("cook intern", "kitchen intern", "culinary intern")),
+    ("driver intern", ("delivery driver intern", "truck driver intern", "chauffeur intern")),
+    ("editor intern", ("content editor intern", "video editor intern", "copy editor intern")),
+    ("farmer intern", ("agriculture intern", "farm manager intern", "horticulture intern")),
+    ("guide intern", ("tour guide intern", "museum guide intern", "nature guide intern")),
+    ("host intern", ("event host intern", "tv host intern", "radio host intern")),
+    ("inspector intern", ("quality inspector intern", "safety inspector intern", "building inspector intern")),
+    ("investigator intern", ("private investigator intern", "research investigator intern", "fraud investigator intern")),
+    ("judge intern", ("law clerk intern", "legal assistant intern", "court intern")),
+    ("librarian intern", ("library assistant intern", "archivist intern", "information specialist intern")),
+    ("mechanic intern", ("auto mechanic intern", "maintenance mechanic intern", "industrial mechanic intern")),
+    ("nurse intern", ("registered nurse intern", "practical nurse intern", "nursing assistant intern")),
+    ("operator intern", ("machine operator intern", "equipment operator intern", "control room operator intern")),
+    ("pilot intern", ("flight attendant intern", "air traffic controller intern", "aviation intern")),
+    ("police intern", ("law enforcement intern", "security intern", "detective intern")),
+    ("reporter intern", ("journalist intern", "news reporter intern", "broadcast reporter intern")),
+    ("scientist intern", ("research scientist intern", "lab scientist intern", "environmental scientist intern")),
+    ("secretary intern", ("administrative assistant intern", "office assistant intern", "executive assistant intern")),
+    ("teacher intern", ("professor intern", "instructor intern", "educator intern")),
+    ("therapist intern", ("physical therapist intern", "occupational therapist intern", "speech therapist intern")),
+    ("translator intern", ("interpreter intern", "language specialist intern", "localization intern")),
+    ("veterinarian intern", ("animal care intern", "vet assistant intern", "wildlife intern")),
+    ("waiter intern", ("server intern", "bartender intern", "hostess intern")),
+    ("writer intern", ("author intern", "blogger intern", "content creator intern")),
+    ("zoologist intern", ("wildlife biologist intern", "marine biologist intern", "conservation intern")),
+)
+
+# --------------------------- City coordinates ------------------------- #
+
+# (city, lat, lon)
+_CITY_ROWS: Tuple[Tuple[str, float, float], ...] = (
+    ("Mumbai", 19.0760, 72.8777),
+    ("Delhi", 28.7041, 77.1025),
+    ("Bangalore", 12.9716, 77.5946),
+    ("Pune", 18.5204, 73.8567),
+    ("Chennai", 13.0827, 80.2707),
+    ("Hyderabad", 17.3850, 78.4867),
+    ("Kolkata", 22.5726, 88.3639),
+    ("Ahmedabad", 23.0225, 72.5714),
+    ("Jaipur", 26.9124, 75.7873),
+    ("Lucknow", 26.8467, 80.9462),
+    ("Surat", 21.1702, 72.8311),
+    ("Kanpur", 26.4499, 80.3319),
+    ("Nagpur", 21.1458, 79.0882),
+    ("Indore", 22.7196, 75.8577),
+    ("Thane", 19.2183, 72.9781),
+    ("Bhopal", 23.2599, 77.4126),
+    ("Visakhapatnam", 17.6868, 83.2185),
+    ("Patna", 25.5941, 85.1376),
+    ("Vadodara", 22.3072, 73.1812),
+    ("Ghaziabad", 28.6692, 77.4538),
+    ("Ludhiana", 30.9010, 75.8573),
+    ("Agra", 27.1767, 78.0081),
+    ("Nashik", 19.9975, 73.7898),
+    ("Faridabad", 28.4089, 77.3178),
+    ("Meerut", 28.9845, 77.7064),
+    ("Rajkot", 22.3039, 70.8022),
+    ("Kalyan-Dombivli", 19.2350, 73.1300),
+    ("Vasai-Virar", 19.3919, 72.8397),
+    ("Varanasi", 25.3176, 82.9739),
+    ("Srinagar", 34.0837, 74.7973),
+    ("Aurangabad", 19.8762, 75.3433),
+    ("Dhanbad", 23.7957, 86.4304),
+    ("Amritsar", 31.6340, 74.8723),
+    ("Navi Mumbai", 19.0330, 73.0297),
+    ("Allahabad", 25.4358, 81.8463),
+    ("Ranchi", 23.3441, 85.3096),
+    ("Howrah", 22.5958, 88.2636),
+    ("Coimbatore", 11.0168, 76.9558),
+    ("Jabalpur", 23.1815, 79.9864),
+    ("Gwalior", 26.2183, 78.1828),
+    ("Vijayawada", 16.5062, 80.6480),
+    ("Jodhpur", 26.2389, 73.0243),
+    ("Madurai", 9.9252, 78.1198),
+    ("Raipur", 21.2514, 81.6296),
+    ("Kota", 25.2138, 75.8648),
+    ("Guwahati", 26.1445, 91.7362),
+    ("Chandigarh", 30.7333, 76.7794),
+    ("Solapur", 17.6599, 75.9064),
+    ("Hubli-Dharwad", 15.3647, 75.1240),
+    ("Bareilly", 28.3670, 79.4304),
+    ("Moradabad", 28.8386, 78.7733),
+    ("Mysore", 12.2958, 76.6394),
+    ("Gurgaon", 28.4595, 77.0266),
+    ("Aligarh", 27.8974, 78.0880),
+    ("Jalandhar", 31.3260, 75.5762),
+    ("Tiruchirappalli", 10.7905, 78.7047),
+    ("Bhubaneswar", 20.2961, 85.8245),
+    ("Salem", 11.6643, 78.1460),
+    ("Mira-Bhayandar", 19.2952, 72.8544),
+    ("Warangal", 17.9784, 79.5941),
+    ("Thiruvananthapuram", 8.5241, 76.9366),
+    ("Guntur", 16.3067, 80.4365),
+    ("Bhiwandi", 19.2967, 73.0631),
+    ("Saharanpur", 29.9679, 77.5510),
+    ("Gorakhpur", 26.7606, 83.3732),
+    ("Bikaner", 28.0229, 73.3119),
+    ("Amravati", 20.9374, 77.7796),
+    ("Noida", 28.5355, 77.3910),
+    ("Jamshedpur", 22.8046, 86.2029),
+    ("Bhilai", 21.1938, 81.3509),
+    ("Cuttack", 20.4625, 85.8828),
+    ("Firozabad", 27.1591, 78.3957),
+    ("Kochi", 9.9312, 76.2673),
+    ("Nellore", 14.4426, 79.9865),
+    ("Bhavnagar", 21.7645, 72.1519),
+    ("Dehradun", 30.3165, 78.0322),
+    ("Durgapur", 23.5204, 87.3119),
+    ("Asansol", 23.6833, 86.9833),
+    ("Nanded", 19.1383, 77.3210),
+    ("Kolhapur", 16.6913, 74.2447),
+    ("Ajmer", 26.4499, 74.6399),
+    ("Gulbarga", 17.3297, 76.8343),
+    ("Jamnagar", 22.4722, 70.0577),
+    ("Ujjain", 23.1765, 75.7885),
+    ("Loni", 28.7500, 77.2833),
+    ("Siliguri", 26.7271, 88.3953),
+    ("Jhansi", 25.4484, 78.5685),
+    ("Ulhasnagar", 19.2215, 73.1645),
+    ("Sangli", 16.8524, 74.5815),
+    ("Jammu", 32.7266, 74.8570),
+    ("Mangalore", 12.9141, 74.8560),
+    ("Erode", 11.3410, 77.7172),
+    ("Belgaum", 15.8497, 74.4977),
+    ("Ambattur", 13.1143, 80.1481),
+    ("Tirunelveli", 8.7139, 77.7567),
+    ("Malegaon", 20.5544, 74.5286),
+    ("Gaya", 24.7955, 85.0077),
+    ("Jalgaon", 21.0077, 75.5626),
+    ("Udaipur", 24.5854, 73.7125),
+    ("Maheshtala", 22.5086, 88.3253),
+)
+
+# ------------------------------ Lookups -------------------------------- #
+
+RELATED_JOBS: Dict[str, List[str]] = {role: list(related) for role, related in _RELATED_JOBS_ROWS}
+CITY_COORDINATES: Dict[str, Dict[str, float]] = {city: {"lat": lat, "lon": lon} for city, lat, lon in _CITY_ROWS}
@@ -1,9 +1,17 @@
 import os
+import copy
 import json
+import queue
+import random
+import atexit
+import hashlib
 import uuid
 import time
 import logging
-from typing import Dict, Any, Optional, Tuple
+import threading
+from collections import OrderedDict
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Any, Optional, Tuple, Hashable, Callable
 from datetime import datetime
 
 # ----------------------------- Defaults -------------------------------- #
@@ -13,7 +21,9 @@ DEFAULT_CONFIG: Dict[str, Any] = {
     "debug": False,
     "log_level": "INFO",                     # DEBUG|INFO|WARNING|ERROR|CRITICAL
     "log_format": "plain",                   # plain|json
+    "log_sampling": "app.database.query=0.1,app.recommender.tiers=0.1",  # keep rates for per-call INFO/DEBUG records
     "max_recommendations": 5,
+    "max_page_size": 50,                     # /recommend?page_size= (cursor pagination)
     "default_search_radius_km": 50,
     "max_search_radius_km": 500,
     "min_internships_for_recommendation": 10,
@@ -21,7 +31,24 @@ DEFAULT_CONFIG: Dict[str, Any] = {
     "api_port": 8000,
     "request_timeout_seconds": 30,
     "max_concurrent_requests": 10,
+    "coalesce_requests": True,               # share one computation across identical in-flight /recommend bodies
     "request_id_prefix": "req",
+    "startup_import_budget_ms": 1500,
+    "admin_token": "",                       # empty disables /admin/* endpoints
+    "verify_indexes_on_startup": True,
+    "build_indexes_on_startup": False,       # background build of missing INDEX_SPECS
+    "response_compression": True,            # brotli (if brotli-asgi is installed) or gzip, per Accept-Encoding
+    "compression_min_bytes": 1024,           # smaller responses are sent uncompressed
+    "gzip_level": 6,
+    "brotli_quality": 4,                     # 0-11; low levels keep CPU per response small
+    # production launcher (python -m app.server)
+    "server_workers": 0,                     # 0 = one per available CPU core
+    "server_preload": True,                  # import the app and shared read-only data once, before fork
+    "server_max_requests": 20000,            # recycle a worker after this many requests (0 = never)
+    "server_max_requests_jitter": 2000,      # spread recycling so workers don't restart together
+    "server_graceful_timeout_seconds": 30,   # time to drain in-flight requests on shutdown / recycle
+    "server_timeout_seconds": 120,           # kill a worker silent for this long
+    "server_keepalive_seconds": 5,
 }
 
 # ----------------------------- Helpers --------------------------------- #
@@ -63,8 +90,10 @@ def get_config() -> Dict[str, Any]:
     cfg["debug"] = _env_bool("DEBUG", cfg["debug"])
     cfg["log_level"] = _coerce_log_level(_env_str("LOG_LEVEL", cfg["log_level"]))
     cfg["log_format"] = _env_str("LOG_FORMAT", cfg["log_format"]).lower()  # plain|json
+    cfg["log_sampling"] = _env_str("LOG_SAMPLING", cfg["log_sampling"])
 
     cfg["max_recommendations"] = _env_int("MAX_RECOMMENDATIONS", cfg["max_recommendations"])
+    cfg["max_page_size"] = _env_int("MAX_PAGE_SIZE", cfg["max_page_size"])
     cfg["default_search_radius_km"] = _env_int("DEFAULT_SEARCH_RADIUS_KM", cfg["default_search_radius_km"])
     cfg["max_search_radius_km"] = _env_int("MAX_SEARCH_RADIUS_KM", cfg["max_search_radius_km"])
     cfg["min_internships_for_recommendation"] = _env_int(
@@ -75,7 +104,26 @@ def get_config() -> Dict[str, Any]:
     cfg["api_port"] = _env_int("API_PORT", cfg["api_port"])
     cfg["request_timeout_seconds"] = _env_int("REQUEST_TIMEOUT_SECONDS", cfg["request_timeout_seconds"])
     cfg["max_concurrent_requests"] = _env_int("MAX_CONCURRENT_REQUESTS", cfg["max_concurrent_requests"])
+    cfg["coalesce_requests"] = _env_bool("COALESCE_REQUESTS", cfg["coalesce_requests"])
     cfg["request_id_prefix"] = _env_str("REQUEST_ID_PREFIX", cfg["request_id_prefix"])
+    cfg["startup_import_budget_ms"] = _env_int("STARTUP_IMPORT_BUDGET_MS", cfg["startup_import_budget_ms"])
+    cfg["admin_token"] = _env_str("ADMIN_TOKEN", cfg["admin_token"])
+    cfg["verify_indexes_on_startup"] = _env_bool("VERIFY_INDEXES_ON_STARTUP", cfg["verify_indexes_on_startup"])
+    cfg["build_indexes_on_startup"] = _env_bool("BUILD_INDEXES_ON_STARTUP", cfg["build_indexes_on_startup"])
+    cfg["response_compression"] = _env_bool("RESPONSE_COMPRESSION", cfg["response_compression"])
+    cfg["compression_min_bytes"] = _env_int("COMPRESSION_MIN_BYTES", cfg["compression_min_bytes"])
+    cfg["gzip_level"] = _env_int("GZIP_LEVEL", cfg["gzip_level"])
+    cfg["brotli_quality"] = _env_int("BROTLI_QUALITY", cfg["brotli_quality"])
+
+    cfg["server_workers"] = _env_int("SERVER_WORKERS", cfg["server_workers"])
+    cfg["server_preload"] = _env_bool("SERVER_PRELOAD", cfg["server_preload"])
+    cfg["server_max_requests"] = _env_int("SERVER_MAX_REQUESTS", cfg["server_max_requests"])
+    cfg["server_max_requests_jitter"] = _env_int("SERVER_MAX_REQUESTS_JITTER", cfg["server_max_requests_jitter"])
+    cfg["server_graceful_timeout_seconds"] = _env_int(
+        "SERVER_GRACEFUL_TIMEOUT_SECONDS", cfg["server_graceful_timeout_seconds"]
+    )
+    cfg["server_timeout_seconds"] = _env_int("SERVER_TIMEOUT_SECONDS", cfg["server_timeout_seconds"])
+    cfg["server_keepalive_seconds"] = _env_int("SERVER_KEEPALIVE_SECONDS", cfg["server_keepalive_seconds"])
 
     # If DEBUG, force INFO logs unless explicitly overridden to DEBUG
     if cfg["debug"] and cfg["log_level"] == "INFO":
@@ -98,21 +146,98 @@ class _JsonFormatter(logging.Formatter):
         }
         if record.exc_info:
             payload["exc_info"] = self.formatException(record.exc_info)
+        elif record.exc_text:  # rendered before queueing (see _DeferredQueueHandler)
+            payload["exc_info"] = record.exc_text
         # add request_id if attached via LoggerAdapter / extra
         rid = getattr(record, "request_id", None)
         if rid:
             payload["request_id"] = rid
         return json.dumps(payload, ensure_ascii=False)
 
+class LazyStr:
+    """Log argument rendered only if the record is emitted: `logger.info("%s", LazyStr(fn, x))`."""
+
+    __slots__ = ("fn", "args")
+
+    def __init__(self, fn: Callable[..., Any], *args: Any) -> None:
+        self.fn = fn
+        self.args = args
+
+    def __str__(self) -> str:
+        return str(self.fn(*self.args))
+
+    __repr__ = __str__
+
+def _parse_sampling(spec: str) -> Dict[str, float]:
+    """`"app.database.query=0.1,app.recommender.tiers=0.25"` -> {logger prefix: keep rate}; bad entries are ignored."""
+    rates: Dict[str, float] = {}
+    for part in (spec or "").split(","):
+        name, sep, rate = part.partition("=")
+        if not sep or not name.strip():
+            continue
+        try:
+            rates[name.strip()] = min(1.0, max(0.0, float(rate)))
+        except ValueError:
+            continue
+    return rates
+
+class _SamplingFilter(logging.Filter):
+    """
+    Keeps a `rate` share of records below WARNING for loggers under each
+    configured prefix (longest prefix wins); warnings and errors always pass.
+    """
+
+    def __init__(self, rates: Dict[str, float]) -> None:
+        super().__init__()
+        self.rates = rates
+        self._by_logger: Dict[str, float] = {}
+        self.dropped = 0
+
+    def _rate(self, name: str) -> float:
+        rate = self._by_logger.get(name)
+        if rate is None:
+            matches = [p for p in self.rates if name == p or name.startswith(p + ".")]
+            rate = self.rates[max(matches, key=len)] if matches else 1.0
+            self._by_logger[name] = rate
+        return rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self._rate(record.name)
+        if rate >= 1.0 or random.random() < rate:
+            return True
+        self.dropped += 1
+        return False
+
+class _DeferredQueueHandler(QueueHandler):
+    """
+    QueueHandler that leaves message formatting to the listener thread
+    (stdlib's formats in the caller). Tracebacks are rendered here since
+    they reference live frames; other log arguments must not be mutated
+    after the call.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+_listener: Optional[QueueListener] = None
+
 def setup_logging(config: Dict[str, Any]) -> None:
-    """Setup logging configuration with optional JSON output."""
+    """
+    Setup logging with optional JSON output. Records from the service
+    loggers ("pm_internship_ai", "app") go through a queue to a background
+    listener that formats and writes them, after per-logger sampling
+    (config "log_sampling" / LOG_SAMPLING).
+    """
+    global _listener
     log_level = getattr(logging, config.get("log_level", "INFO").upper(), logging.INFO)
     log_format = (config.get("log_format") or "plain").lower()
 
-    logger = logging.getLogger("pm_internship_ai")
-    logger.setLevel(log_level)
-    logger.handlers.clear()
-
     console_handler = logging.StreamHandler()
     console_handler.setLevel(log_level)
 
@@ -124,14 +249,32 @@ def setup_logging(config: Dict[str, Any]) -> None:
             datefmt="%Y-%m-%d %H:%M:%S",
         )
     console_handler.setFormatter(formatter)
-    logger.addHandler(console_handler)
-    logger.propagate = False
+
+    if _listener is not None:
+        _listener.stop()  # flushes what is queued
+    log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    queue_handler = _DeferredQueueHandler(log_queue)
+    queue_handler.addFilter(_SamplingFilter(_parse_sampling(config.get("log_sampling", ""))))
+    _listener = QueueListener(log_queue, console_handler, respect_handler_level=True)
+    _listener.start()
+
+    for name in ("pm_internship_ai", "app"):
+        logger = logging.getLogger(name)
+        logger.setLevel(log_level)
+        logger.handlers.clear()
+        logger.addHandler(queue_handler)
+        logger.propagate = False
 
     # quiet noisy libs
     logging.getLogger("uvicorn").setLevel(logging.WARNING)
     logging.getLogger("uvicorn.access").setLevel(logging.WARNING)
     logging.getLogger("pymongo").setLevel(logging.WARNING)
 
+@atexit.register
+def _stop_logging() -> None:
+    if _listener is not None:
+        _listener.stop()
+
 # --------------------------- Request IDs ------------------------------- #
 
 def create_request_id(prefix: Optional[str] = None) -> str:
@@ -225,6 +368,66 @@ def sanitize_student_profile(student_profile: Dict[str, Any]) -> Dict[str, Any]:
             sanitized.pop(key, None)
     return sanitized
 
+# ------------------------------ Caching -------------------------------- #
+
+def profile_fingerprint(profile: Dict[str, Any], *extra: Any) -> str:
+    """Stable key for a request body (plus e.g. top_k): key order and JSON spacing don't matter."""
+    payload = json.dumps([profile, *extra], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+class LRUCache:
+    """
+    Small thread-safe LRU map for per-process caches. With `ttl_seconds`,
+    entries also expire that long after they were put.
+    get() returns None on a miss, so don't store None values.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl_seconds: Optional[float] = None) -> None:
+        self.maxsize = max(1, int(maxsize))
+        self.ttl_seconds = ttl_seconds
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._expires: Dict[Hashable, float] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Any:
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return None
+            if self.ttl_seconds is not None and self._expires.get(key, 0.0) <= time.monotonic():
+                del self._data[key]
+                self._expires.pop(key, None)
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if self.ttl_seconds is not None:
+                self._expires[key] = time.monotonic() + self.ttl_seconds
+            while len(self._data) > self.maxsize:
+                evicted, _ = self._data.popitem(last=False)
+                self._expires.pop(evicted, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._expires.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, int]:
+        return {"size": len(self._data), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses}
+
 # --------------------------- Time Formatting --------------------------- #
 
 def format_processing_time(processing_time_ms: float) -> str:
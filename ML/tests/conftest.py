@@ -0,0 +1,94 @@
+import httpx
+import pytest
+
+from app.storage import SQLiteBackend
+
+# Mumbai; every document but the last is within ~10 km
+LAT, LON = 19.076, 72.8777
+
+CATALOG = [
+    {"id": "i1", "sector": "Technology", "job_role": "Data Scientist", "work_mode": "Hybrid",
+     "skills": ["Python", "SQL"], "duration": {"months": 3}, "location": {"lat": 19.08, "lon": 72.88, "city": "Mumbai"}},
+    {"id": "i2", "sector": "IT & Software", "job_role": "Software Engineer", "mode": "WFH",
+     "skills": ["Java"], "duration_months": 6, "location": {"lat": 19.10, "lon": 72.85, "city": "Mumbai"}},
+    {"id": "i3", "sector": "finance", "job_role": "data analyst", "preference": {"work_mode": "On-site"},
+     "skills": "Excel", "duration": {"months": 1}, "location": {"lat": 19.05, "lon": 72.90, "city": "Mumbai"}},
+    {"id": "i4", "sector": "TECHNOLOGY", "job_role": "Data Analyst", "work_mode": "remote",
+     "skills": ["sql", "Power BI"], "duration": "2", "location": {"lat": 19.12, "lon": 72.91, "city": "Mumbai"}},
+    {"id": "i5", "sector": "Social Impact", "job_role": "Field Coordinator",
+     "skills": [], "location": {"lat": 19.00, "lon": 72.82, "city": "Mumbai"}},
+    {"id": "i6", "sector": "Technology", "job_role": "Data Scientist", "work_mode": "hybrid",
+     "skills": ["python"], "duration": {"months": 4}, "location": {"lat": 18.52, "lon": 73.86, "city": "Pune"}},
+]
+
+def _ranking_rows():
+    """
+    CATALOG plus a denser neighbourhood for ranking tests: varied skills
+    and stipends, and groups of identical internships at one spot (tied
+    scores and tie-breakers) that straddle a top-k cut-off.
+    """
+    sectors = ["Technology", "Finance", "Technology", "Healthcare"]
+    skill_sets = [["Python", "SQL"], ["Java"], ["Python"], ["Excel", "SQL"], []]
+    rows = [dict(doc) for doc in CATALOG]
+    for i in range(30):
+        rows.append({
+            "id": f"r{i:02d}",
+            "title": f"Internship {i}",
+            "sector": sectors[i % len(sectors)],
+            "job_role": "Data Analyst" if i % 3 else "Data Scientist",
+            "work_mode": ["onsite", "hybrid", "remote"][i % 3],
+            "skills": skill_sets[i % len(skill_sets)],
+            "stipend": 5000 + 1000 * (i % 4),
+            "duration": {"months": 1 + i % 6},
+            "created_at": f"2026-0{1 + i % 9}-15T09:00:00",
+            "location": {"lat": LAT + 0.01 * (i % 7), "lon": LON - 0.01 * (i % 5), "city": "Mumbai"},
+        })
+    for i in range(6):
+        rows.append({
+            "id": f"t{i}",
+            "title": "Same Internship",
+            "sector": "Technology",
+            "job_role": "Data Scientist",
+            "work_mode": "hybrid",
+            "skills": ["Python", "SQL"],
+            "stipend": 8000,
+            "duration": {"months": 3},
+            "created_at": "2026-05-01T09:00:00",
+            "location": {"lat": LAT + 0.02, "lon": LON + 0.02, "city": "Mumbai"},
+        })
+    return rows
+
+RANKING_CATALOG = _ranking_rows()
+
+@pytest.fixture
+def sqlite_ranking_catalog(tmp_path):
+    """SQLite backend over RANKING_CATALOG in a throwaway file."""
+    backend = SQLiteBackend(str(tmp_path / "ranking.sqlite3"))
+    assert backend.insert_internships_bulk([dict(doc) for doc in RANKING_CATALOG])
+    return backend
+
+@pytest.fixture
+def sqlite_catalog(tmp_path):
+    """SQLite backend over CATALOG in a throwaway file."""
+    backend = SQLiteBackend(str(tmp_path / "catalog.sqlite3"))
+    assert backend.insert_internships_bulk([dict(doc) for doc in CATALOG])
+    return backend
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+@pytest.fixture
+def api(monkeypatch, sqlite_ranking_catalog):
+    """
+    (async client, recommender) for the API over the SQLite ranking
+    catalog; MongoDB is never touched and startup warm-up is not run.
+    """
+    from app import main
+    from app.recommender import Recommender
+
+    recommender = Recommender(backend=sqlite_ranking_catalog)
+    monkeypatch.setattr(main, "recommender", recommender)
+    monkeypatch.setitem(main.app.dependency_overrides, main.get_db, lambda: None)
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://test")
+    return client, recommender
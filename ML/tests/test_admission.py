@@ -0,0 +1,87 @@
+import asyncio
+import time
+
+import pytest
+
+from app.admission import AdmissionController, Lane, Overloaded, BULK, INTERACTIVE
+from tests.test_recommender import STUDENT
+
+pytestmark = pytest.mark.anyio
+
+def _controller(**interactive):
+    lane = Lane(INTERACTIVE, **{"max_concurrent": 1, "max_queue": 1, "max_wait_ms": 1000, **interactive})
+    return AdmissionController(interactive=lane, bulk=Lane(BULK, 1, 1, 1000), enabled=True)
+
+async def _hold(controller, lane, started, release):
+    async with controller.admit(lane):
+        started.set()
+        await release.wait()
+
+async def _occupied(controller, lane=INTERACTIVE):
+    """Start a request that keeps `lane`'s only slot until the returned event is set."""
+    started, release = asyncio.Event(), asyncio.Event()
+    task = asyncio.create_task(_hold(controller, lane, started, release))
+    await started.wait()
+    return task, release
+
+async def test_full_queue_is_shed():
+    controller = _controller(max_queue=0)
+    task, release = await _occupied(controller)
+    with pytest.raises(Overloaded) as exc:
+        async with controller.admit(INTERACTIVE):
+            pass
+    assert exc.value.reason == "queue_full" and exc.value.retry_after >= 1
+    release.set()
+    await task
+    assert controller.lanes[INTERACTIVE].shed == {"queue_full": 1}
+
+async def test_queued_request_times_out():
+    controller = _controller(max_wait_ms=50)
+    task, release = await _occupied(controller)
+    start = time.monotonic()
+    with pytest.raises(Overloaded) as exc:
+        async with controller.admit(INTERACTIVE):
+            pass
+    assert exc.value.reason == "queue_timeout"
+    assert 0.04 <= time.monotonic() - start < 1.0
+    assert controller.lanes[INTERACTIVE].waiting == 0
+    release.set()
+    await task
+
+async def test_queued_request_runs_when_a_slot_frees():
+    controller = _controller(max_wait_ms=2000)
+    task, release = await _occupied(controller)
+    asyncio.get_running_loop().call_later(0.05, release.set)
+    async with controller.admit(INTERACTIVE):
+        assert controller.lanes[INTERACTIVE].in_flight == 1
+    await task
+    assert controller.lanes[INTERACTIVE].queued == 1
+
+async def test_high_latency_sheds_instead_of_queueing():
+    controller = _controller(shed_latency_ms=100)
+    task, release = await _occupied(controller)
+    lane = controller.lanes[INTERACTIVE]
+    lane.latency_ewma_ms, lane.last_done = 500.0, time.monotonic()
+    with pytest.raises(Overloaded) as exc:
+        async with controller.admit(INTERACTIVE):
+            pass
+    assert exc.value.reason == "latency"
+    release.set()
+    await task
+
+async def test_overloaded_lane_returns_503_with_retry_after(api, monkeypatch):
+    from app import main
+
+    client, _ = api
+    controller = _controller(max_queue=0)
+    monkeypatch.setattr(main, "admission", controller)
+    body = {**STUDENT, "location": {**STUDENT["location"], "state": "Maharashtra"}}
+    async with client:
+        task, release = await _occupied(controller)
+        response = await client.post("/recommend", json=body)
+        release.set()
+        await task
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == str(response.json()["details"]["retry_after"])
+        assert response.json()["details"]["reason"] == "queue_full"
+        assert (await client.post("/recommend", json=body)).status_code == 200
@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+
+import app.ann as ann
+import app.embeddings as embeddings
+from app.ann import ANN_WORK_MODES, LSHIndex
+from app.database import nearest_filter_predicate
+from app.embeddings import EmbeddingMatcher, EmbeddingStore, HashingEncoder
+from app.preprocessing import normalize_work_mode
+from app.recommender import Recommender
+from tests.conftest import RANKING_CATALOG
+
+STUDENT = {"job_role": "data analyst", "sector": "technology", "skills": ["python", "sql"]}
+
+def _unit_vectors(n, dim, seed=7):
+    vecs = np.random.default_rng(seed).standard_normal((n, dim)).astype(np.float32)
+    return vecs / np.linalg.norm(vecs, axis=1, keepdims=True)
+
+def _exact(vectors, rows, q, k, exclude=()):
+    rows = [r for r in rows if r not in exclude]
+    sims = vectors[rows] @ q
+    return [rows[i] for i in np.argsort(-sims, kind="stable")[:k]]
+
+def test_query_returns_the_exact_nearest_neighbours():
+    vectors = _unit_vectors(40, 16)
+    rows = list(range(0, 40, 2))
+    # few bits per table so the probed buckets cover every indexed row
+    index = LSHIndex.build(vectors, rows, tables=8, bits=2)
+    for q in _unit_vectors(5, 16, seed=11):
+        assert index.query(q, 5) == _exact(vectors, rows, q, 5)
+    q = vectors[10]
+    assert index.query(q, 3)[0] == 10
+    assert index.query(q, 3, exclude_rows={10}) == _exact(vectors, rows, q, 3, exclude={10})
+
+def test_save_load_round_trip(tmp_path):
+    vectors = _unit_vectors(40, 16)
+    index = LSHIndex.build(vectors, range(40), tables=4, bits=6)
+    index.save(str(tmp_path / "ann"), str(tmp_path / "emb"))
+    loaded = LSHIndex.load(str(tmp_path / "ann"), vectors)
+    for q in _unit_vectors(5, 16, seed=3):
+        assert loaded.query(q, 4) == index.query(q, 4)
+
+@pytest.fixture
+def recommender(monkeypatch, tmp_path, sqlite_ranking_catalog):
+    encoder = HashingEncoder(dim=64)
+    EmbeddingStore.build(RANKING_CATALOG, encoder, str(tmp_path / "emb"))
+    store = EmbeddingStore(str(tmp_path / "emb"))
+    rows = [store.row(d["id"]) for d in RANKING_CATALOG
+            if normalize_work_mode(d.get("work_mode") or d.get("mode") or "") in ANN_WORK_MODES]
+    index = LSHIndex.build(store.vectors, rows, tables=8, bits=2)
+    matcher = EmbeddingMatcher(store, encoder)
+    monkeypatch.setattr(ann, "ANN_INDEX_DIR", str(tmp_path / "ann"))
+    monkeypatch.setattr(ann, "get_ann_index", lambda: index)
+    monkeypatch.setattr(embeddings, "get_embedding_matcher", lambda: matcher)
+    return Recommender(backend=sqlite_ranking_catalog)
+
+@pytest.mark.parametrize("preference", [
+    {"work_mode": "remote"},
+    {"sector": "technology"},
+    {"preferred_job_roles": ["data scientist"], "work_mode": "hybrid"},
+])
+def test_remote_candidates_pass_the_nearest_filter(recommender, preference):
+    unfiltered = recommender._remote_candidates(STUDENT, set())
+    filtered = recommender._remote_candidates(STUDENT, set(), preference)
+
+    accept = nearest_filter_predicate(preference)
+    by_id = {d["id"]: d for d in RANKING_CATALOG}
+    expected = [d["id"] for d in unfiltered if accept(by_id[d["id"]])]
+    assert filtered and len(filtered) < len(unfiltered)
+    assert [d["id"] for d in filtered] == expected
+
+def test_remote_candidates_skip_excluded_ids(recommender):
+    first = [d["id"] for d in recommender._remote_candidates(STUDENT, set())]
+    rest = [d["id"] for d in recommender._remote_candidates(STUDENT, set(first[:3]))]
+    assert not set(first[:3]) & set(rest)
@@ -0,0 +1,43 @@
+import pytest
+
+from tests.test_recommender import STUDENT
+
+pytestmark = pytest.mark.anyio
+
+def _students():
+    base = {**STUDENT, "location": {**STUDENT["location"], "state": "Maharashtra"}}
+    return [
+        {**base, "id": "s1", "preferred_job_roles": ["data scientist"], "preferred_sectors": ["technology"]},
+        {**base, "id": "s2", "skills": ["java"], "preferred_job_roles": ["software engineer"]},
+        {**base, "id": "s3", "skills": ["excel", "sql"], "preferred_sectors": ["finance"]},
+        {**base, "id": "s4", "preferred_job_roles": ["data scientist"], "preferred_sectors": ["technology"],
+         "location": {**base["location"], "lat": base["location"]["lat"] + 0.01}},
+    ]
+
+async def test_lean_batch_carries_the_full_recommendations_once(api):
+    client, _ = api
+    async with client:
+        full = (await client.post("/recommend/batch", params={"top_k": 5}, json=_students())).json()
+        lean = (await client.post("/recommend/batch", params={"top_k": 5, "format": "lean"}, json=_students())).json()
+
+    assert lean["format"] == "lean"
+    assert "results" not in lean and "index" not in lean
+    assert (lean["successful"], lean["failed"]) == (full["successful"], full["failed"]) == (4, 0)
+
+    def _recs(body):
+        return {s["student_id"]: [(r["internship_id"], r["score"], r["distance_km"]) for r in s["recommendations"]]
+                for s in body["students"]}
+
+    assert _recs(lean) == _recs(full)
+    assert _recs(lean) == {sid: [(r["internship"]["id"], r["score"], r["distance_km"]) for r in res["recommendations"]]
+                           for sid, res in full["results"].items()}
+
+    # every recommended internship exactly once in the lean table, with the full format's fields
+    recommended = {iid for recs in _recs(lean).values() for iid, _, _ in recs}
+    assert sum(len(recs) for recs in _recs(lean).values()) > len(recommended)  # some are shared
+    assert set(lean["internships"]) == recommended
+    assert lean["internships"] == full["index"]["internships_by_id"]
+    rows = [row["internship_id"] for row in lean["compare"]["rows"]]
+    assert len(rows) == len(set(rows)) and set(rows) == recommended
+    assert {row["internship_id"]: row["by_student"] for row in lean["compare"]["rows"]} == \
+        {row["id"]: row["by_student"] for row in full["compare"]["internships"]}
@@ -0,0 +1,26 @@
+from app.breaker import CircuitBreaker, CLOSED, HALF_OPEN, OPEN
+
+def _tripped(**kwargs):
+    breaker = CircuitBreaker("test", min_calls=1, error_rate=0.5, **kwargs)
+    breaker.record(False, 1.0)
+    assert breaker.state == OPEN
+    return breaker
+
+def test_half_open_admits_a_single_trial():
+    breaker = _tripped(open_seconds=60.0)
+    breaker._opened_at -= 60.0
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow()
+    assert not breaker.allow()  # trial still in flight
+    breaker.record(True, 1.0)
+    assert breaker.state == CLOSED
+    assert breaker.allow() and breaker.allow()
+
+def test_failed_trial_reopens():
+    breaker = _tripped(open_seconds=60.0)
+    assert not breaker.allow()
+    breaker._opened_at -= 60.0
+    assert breaker.allow()
+    breaker.record(False, 1.0)
+    assert breaker.state == OPEN
+    assert not breaker.allow()
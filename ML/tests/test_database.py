@@ -0,0 +1,53 @@
+from app.database import DatabaseManager, INDEX_SPECS, SUPERSEDED_INDEXES, canonical_match_fields
+
+class FakeCollection:
+    def __init__(self, indexes, docs=()):
+        self.indexes = indexes
+        self.docs = list(docs)
+
+    def index_information(self):
+        return self.indexes
+
+    def find_one(self, query, projection=None):
+        (field, cond), = query.items()
+        assert cond == {"$exists": False}
+        return next((d for d in self.docs if field not in d), None)
+
+def _reported(spec):
+    """index_information() entry MongoDB would report for `spec`."""
+    if any(kind == "text" for _, kind in spec["keys"]):
+        return {"key": [("_fts", "text"), ("_ftsx", 1)], "weights": {f: 1 for f, _ in spec["keys"]}}
+    return {"key": list(spec["keys"])}
+
+def _manager(indexes, docs=()):
+    db = DatabaseManager("mongodb://unused")
+    db.internships_collection = FakeCollection(indexes, docs)
+    return db
+
+def test_verify_indexes_accepts_text_index_by_weights():
+    indexes = {"_id_": {"key": [("_id", 1)]}, **{spec["name"]: _reported(spec) for spec in INDEX_SPECS}}
+    report = _manager(indexes).verify_indexes()
+    assert report["ok"], report
+    assert report["mismatched"] == [] and report["missing"] == []
+
+def test_verify_indexes_flags_text_index_over_other_fields():
+    indexes = {spec["name"]: _reported(spec) for spec in INDEX_SPECS}
+    indexes["idx_text_all"] = {"key": [("_fts", "text"), ("_ftsx", 1)], "weights": {"title": 1}}
+    indexes[SUPERSEDED_INDEXES[0]] = {"key": [("location_point_exact", "2dsphere")]}
+    report = _manager(indexes).verify_indexes()
+    assert not report["ok"]
+    assert report["mismatched"] == ["idx_text_all"]
+    assert report["superseded_present"] == [SUPERSEDED_INDEXES[0]]
+
+def test_verify_indexes_reports_missing_required_only():
+    indexes = {spec["name"]: _reported(spec) for spec in INDEX_SPECS if spec["name"] not in ("idx_id", "idx_text_all")}
+    report = _manager(indexes).verify_indexes()
+    assert report["missing"] == ["idx_id"]  # idx_text_all is optional
+
+def test_verify_indexes_reports_unmigrated_documents():
+    indexes = {spec["name"]: _reported(spec) for spec in INDEX_SPECS}
+    migrated = {"_id": 1, "sector": "IT", **canonical_match_fields({"sector": "IT"})}
+    assert _manager(indexes, [migrated]).verify_indexes()["needs_backfill"] is False
+    report = _manager(indexes, [migrated, {"_id": 2, "sector": "Finance"}]).verify_indexes()
+    assert report["needs_backfill"] is True
+    assert not report["ok"]
@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+
+from app.embeddings import EmbeddingMatcher, EmbeddingStore, HashingEncoder
+from app.preprocessing import internship_text
+from tests.conftest import CATALOG
+
+STUDENT = {"job_role": "data scientist", "sector": "technology", "skills": ["python", "sql"]}
+
+@pytest.fixture
+def encoder():
+    return HashingEncoder(dim=64)
+
+@pytest.fixture
+def store(encoder, tmp_path):
+    # batch_size smaller than the catalog so the memmap is written in several slices
+    assert EmbeddingStore.build(CATALOG + [{"title": "no id"}], encoder, str(tmp_path / "emb"), batch_size=4) == len(CATALOG)
+    return EmbeddingStore(str(tmp_path / "emb"))
+
+def test_reload_reads_the_memmap_rows(store, encoder):
+    assert isinstance(store.vectors, np.memmap)
+    assert store.ids == [d["id"] for d in CATALOG]
+    assert (store.count, store.dim) == (len(CATALOG), 64)
+    assert store.meta["encoder"] == "hash:64"
+    expected = encoder.encode([internship_text(d) for d in CATALOG])
+    np.testing.assert_allclose(np.asarray(store.vectors), expected, rtol=0, atol=1e-7)
+
+def test_row_lookup(store):
+    for i, doc in enumerate(CATALOG):
+        assert store.row(doc["id"]) == i
+    assert store.row("missing") is None
+
+def test_matcher_scores_by_store_row(store, encoder):
+    matcher = EmbeddingMatcher(store, encoder)
+    shortlist = [CATALOG[3], {"id": "missing", "title": "data scientist"}, CATALOG[0]]
+    sims = matcher.similarities(STUDENT, shortlist)
+    profile = matcher.profile_embedding(STUDENT)
+
+    assert sims[1] == 0.0
+    assert sims[0] == pytest.approx(max(0.0, float(store.vectors[3] @ profile)), abs=1e-6)
+    assert sims[2] == pytest.approx(max(0.0, float(store.vectors[0] @ profile)), abs=1e-6)
+
+def test_matcher_rejects_a_dimension_mismatch(store):
+    with pytest.raises(ValueError):
+        EmbeddingMatcher(store, HashingEncoder(dim=32))
@@ -0,0 +1,68 @@
+import pytest
+
+from app.recommender import CursorExpiredError, Recommender, RecommenderConfig
+from app.utils import LRUCache
+from tests.test_recommender import STUDENT
+
+@pytest.fixture
+def recommender(sqlite_ranking_catalog):
+    return Recommender(backend=sqlite_ranking_catalog)
+
+def _full_ranking(backend):
+    full = Recommender(RecommenderConfig(prune_ranking=False), backend=backend).recommend_internships(STUDENT, top_k=1000)
+    return [(r["internship"]["id"], r["score"]) for r in full["recommendations"]]
+
+@pytest.mark.parametrize("page_size", [1, 4, 7, 100])
+def test_pages_cover_the_full_ranking_once(recommender, sqlite_ranking_catalog, page_size):
+    seen, cursor, pages = [], None, 0
+    while True:
+        page = recommender.recommend_page(STUDENT, page_size=page_size, cursor=cursor)
+        assert len(page["recommendations"]) <= page_size
+        seen += [(r["internship"]["id"], r["score"]) for r in page["recommendations"]]
+        pages += 1
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    ids = [iid for iid, _ in seen]
+    assert len(ids) == len(set(ids)) == page["total_ranked"]
+    assert seen == _full_ranking(sqlite_ranking_catalog)
+    assert pages == -(-len(seen) // page_size)
+
+def test_evicted_or_expired_cursor_raises(recommender):
+    first = recommender.recommend_page(STUDENT, page_size=2)
+    recommender._rankings = LRUCache(10, ttl_seconds=0)  # every ranking already expired
+    with pytest.raises(CursorExpiredError):
+        recommender.recommend_page(STUDENT, page_size=2, cursor=first["next_cursor"])
+
+    recommender._rankings = LRUCache(1)
+    first = recommender.recommend_page(STUDENT, page_size=2)
+    recommender.recommend_page({**STUDENT, "id": "s2"}, page_size=2)  # evicts the first ranking
+    with pytest.raises(CursorExpiredError):
+        recommender.recommend_page(STUDENT, page_size=2, cursor=first["next_cursor"])
+
+def test_cursor_rejected_for_another_profile(recommender):
+    first = recommender.recommend_page(STUDENT, page_size=2)
+    other = {**STUDENT, "skills": ["java"]}
+    with pytest.raises(ValueError, match="different profile"):
+        recommender.recommend_page(other, page_size=2, cursor=first["next_cursor"])
+    with pytest.raises(ValueError, match="malformed"):
+        recommender.recommend_page(STUDENT, page_size=2, cursor="no-offset")
+
+@pytest.mark.anyio
+async def test_recommend_maps_cursor_errors_to_http(api):
+    client, recommender = api
+    body = {**STUDENT, "location": {**STUDENT["location"], "state": "Maharashtra"},
+            "preferred_job_roles": ["data scientist"]}
+    async with client:
+        first = await client.post("/recommend", params={"page_size": 2}, json=body)
+        assert first.status_code == 200, first.text
+        cursor = first.json()["next_cursor"]
+        assert (await client.post("/recommend", params={"cursor": cursor}, json=body)).status_code == 200
+
+        other = await client.post("/recommend", params={"cursor": cursor}, json={**body, "skills": ["java"]})
+        assert other.status_code == 400
+
+        recommender._rankings = LRUCache(10, ttl_seconds=0)
+        expired = await client.post("/recommend", params={"cursor": cursor}, json=body)
+        assert expired.status_code == 410
+        assert expired.json()["error"] == "Cursor expired"
@@ -0,0 +1,87 @@
+import pytest
+
+from app.pools import CityPoolManager
+from app.preprocessing import calculate_distance_km
+from app.storage import SQLiteBackend
+from tests.conftest import LAT, LON, RANKING_CATALOG
+
+PREFERENCES = [
+    None,
+    {"sector": "technology"},
+    {"preferred_job_roles": ["data analyst"], "work_mode": "hybrid"},
+    {"skills": ["SQL"], "min_duration_months": 3},
+    {"sector": "Technology", "preferred_sectors": ["finance"], "work_mode": "remote"},
+]
+
+class CreatedSinceBackend(SQLiteBackend):
+    """SQLite catalog plus the created_at feed the pools merge incrementally (MongoDB has it)."""
+
+    def find_internships_created_since(self, since, projection=None, limit=1000):
+        rows = [doc for doc in self.find_internships_by_ids([d["id"] for d in self.rows])
+                if isinstance(doc.get("created_at"), str) and doc["created_at"] > since]
+        return sorted(rows, key=lambda d: d["created_at"])[:limit]
+
+@pytest.fixture
+def backend(tmp_path):
+    backend = CreatedSinceBackend(str(tmp_path / "pools.sqlite3"))
+    backend.rows = [dict(doc) for doc in RANKING_CATALOG]
+    assert backend.insert_internships_bulk(backend.rows)
+    return backend
+
+@pytest.fixture
+def pools(backend):
+    manager = CityPoolManager(lambda: backend)
+    assert manager.rebuild(["Mumbai"]) == 1
+    return manager
+
+def _ids(docs):
+    return [d["id"] for d in docs]
+
+def _ranked(docs, lat, lon):
+    """
+    (distance, id) in result order. Equidistant internships have no defined
+    order ($near included), so exact ties (to the micrometre) compare by id.
+    """
+    keyed = [(round(calculate_distance_km(lat, lon, d["location"]["lat"], d["location"]["lon"]), 9), d["id"])
+             for d in docs]
+    assert [k[0] for k in keyed] == sorted(k[0] for k in keyed)  # closest first
+    return sorted(keyed)
+
+@pytest.mark.parametrize("preference", PREFERENCES)
+@pytest.mark.parametrize("offset", [(0.0, 0.0), (0.05, -0.03)])
+@pytest.mark.parametrize("radius_km", [2, 5, 30])
+def test_pool_matches_live_nearest(pools, backend, preference, offset, radius_km):
+    lat, lon = LAT + offset[0], LON + offset[1]
+    pooled = pools.nearest(lat, lon, preference, radius_km, n=100)
+    assert pooled is not None
+    live = backend.find_nearest_internships(lat, lon, preference, n=100, max_distance_km=radius_km)
+    assert _ranked(pooled, lat, lon) == _ranked(live, lat, lon)
+    assert _ids(pools.nearest(lat, lon, preference, radius_km, n=3)) == _ids(pooled)[:3]
+
+def test_pool_declines_what_it_does_not_cover(pools):
+    assert pools.nearest(LAT, LON, None, pools.radius_km + pools.slack_km, n=5) is None  # beyond the pool
+    assert pools.nearest(18.52, 73.86, None, 5, n=5) is None  # Pune: not built here
+
+def test_incremental_refresh_merges_rows_after_the_watermark(pools, backend):
+    watermark = pools.stats()["watermark"]
+    assert watermark == max(d["created_at"] for d in RANKING_CATALOG if "created_at" in d)
+    new = [
+        {"id": "n1", "sector": "Technology", "job_role": "Data Scientist", "work_mode": "hybrid", "skills": ["Python"],
+         "duration": {"months": 3}, "created_at": "2026-12-01T09:00:00",
+         "location": {"lat": LAT + 0.001, "lon": LON, "city": "Mumbai"}},
+        {"id": "n0", "sector": "Technology", "job_role": "Data Scientist", "work_mode": "hybrid",
+         "created_at": "2025-01-01T09:00:00",  # older than the watermark: left to the full rebuild
+         "location": {"lat": LAT, "lon": LON + 0.001, "city": "Mumbai"}},
+    ]
+    backend.rows += new
+    assert backend.insert_internships_bulk([dict(d) for d in new])
+
+    assert pools.refresh_incremental() == 1
+    assert pools.stats()["watermark"] == "2026-12-01T09:00:00"
+    pooled = _ids(pools.nearest(LAT, LON, {"sector": "technology"}, 5, n=50))
+    assert "n1" in pooled and "n0" not in pooled
+    assert pools.refresh_incremental() == 0  # nothing newer now
+
+    pools.rebuild(["Mumbai"])
+    live = backend.find_nearest_internships(LAT, LON, {"sector": "technology"}, n=50, max_distance_km=5)
+    assert _ranked(pools.nearest(LAT, LON, {"sector": "technology"}, 5, n=50), LAT, LON) == _ranked(live, LAT, LON)
@@ -0,0 +1,83 @@
+from app.database import build_nearest_filter, canonical_match_fields, nearest_filter_predicate
+
+LAT, LON = 19.076, 72.8777
+
+NEAR = {"$near": {"$geometry": {"type": "Point", "coordinates": [LON, LAT]}}}
+
+
+def test_no_preferences():
+    assert build_nearest_filter(LAT, LON) == {"location_point_exact": NEAR}
+    assert build_nearest_filter(LAT, LON, {}, "location_point_city", 50) == {
+        "location_point_city": {"$near": {
+            "$geometry": {"type": "Point", "coordinates": [LON, LAT]},
+            "$maxDistance": 50000,
+        }},
+    }
+
+
+def test_sectors_merged_and_sorted():
+    pref = {"sector": "Technology", "preferred_sectors": ["IT & Software", "finance", "technology", ""]}
+    assert build_nearest_filter(LAT, LON, pref) == {
+        "location_point_exact": NEAR,
+        "sector_norm": {"$in": ["finance", "it and software", "technology"]},
+    }
+
+
+def test_work_mode_only():
+    assert build_nearest_filter(LAT, LON, {"work_mode": "Hybrid"}) == {
+        "location_point_exact": NEAR,
+        "work_mode_norm": "hybrid",
+    }
+
+
+def test_duration_only():
+    assert build_nearest_filter(LAT, LON, {"min_duration_months": 3}) == {
+        "location_point_exact": NEAR,
+        "duration_months": {"$gte": 3},
+    }
+
+
+def test_all_preferences_in_index_order():
+    pref = {
+        "sector": "Social Impact",
+        "preferred_sectors": [],
+        "preferred_job_roles": ["Data Scientist", "data analyst"],
+        "skills": ["SQL", "Python"],
+        "work_mode": "remote",
+        "min_duration_months": 2,
+    }
+    query = build_nearest_filter(LAT, LON, pref)
+    assert query == {
+        "location_point_exact": NEAR,
+        "sector_norm": {"$in": ["social impact"]},
+        "job_role_norm": {"$in": ["data analyst", "data scientist"]},
+        "work_mode_norm": "remote",
+        "duration_months": {"$gte": 2},
+        "skills_norm": {"$in": ["python", "sql"]},
+    }
+    assert list(query) == ["location_point_exact", "sector_norm", "job_role_norm", "work_mode_norm",
+                           "duration_months", "skills_norm"]
+    # same preferences in another order: same document
+    assert build_nearest_filter(LAT, LON, dict(reversed(list(pref.items())))) == query
+
+
+def test_canonical_fields_keep_mixed_case_documents_matchable():
+    doc = {
+        "sector": "IT & Software",
+        "job_role": "Data Scientist",
+        "preference": {"work_mode": "Work From Home"},  # legacy field only
+        "skills": ["Python", "SQL"],
+        "duration": {"months": 3},
+    }
+    assert canonical_match_fields(doc) == {
+        "sector_norm": "it and software",
+        "job_role_norm": "data scientist",
+        "work_mode_norm": "remote",
+        "skills_norm": ["python", "sql"],
+        "duration_months": 3,
+    }
+    accept = nearest_filter_predicate({"sector": "IT & Software", "work_mode": "Remote", "min_duration_months": 3})
+    assert accept(doc)
+    assert accept({**doc, **canonical_match_fields(doc)})
+    assert not nearest_filter_predicate({"work_mode": "onsite"})(doc)
+    assert not nearest_filter_predicate({"min_duration_months": 4})(doc)
@@ -0,0 +1,73 @@
+import pytest
+
+from app.database import DatabaseManager
+from app.recommender import Recommender, RecommenderConfig, Weights
+from tests.conftest import LAT, LON
+
+BASE = ("skills", "role", "sector", "interests", "qualification", "salary", "duration", "support")
+
+def test_rebalanced_without_optional_weights_is_unchanged():
+    weights = Weights(semantic=0.0, embedding=0.0)
+    assert weights.rebalanced() is weights
+
+def test_semantic_weight_takes_its_share_from_the_base_weights():
+    weights = Weights(semantic=0.2, embedding=0.0).rebalanced()
+    assert sum(vars(weights).values()) == pytest.approx(1.0)
+    assert weights.semantic == 0.2
+    assert weights.skills / weights.role == pytest.approx(0.30 / 0.20)
+    assert weights.rebalanced() is weights
+
+def test_semantic_and_embedding_weights_share_the_remainder():
+    weights = Weights(semantic=0.1, embedding=0.15).rebalanced()
+    assert sum(vars(weights).values()) == pytest.approx(1.0)
+    assert (weights.semantic, weights.embedding) == (0.1, 0.15)
+    assert sum(getattr(weights, k) for k in BASE) == pytest.approx(0.75)
+
+STUDENT = {
+    "id": "s1",
+    "location": {"lat": LAT, "lon": LON, "city": "Mumbai", "max_distance_km": 50},
+    "skills": ["python", "sql"],
+    "interests": ["analytics"],
+    "education": "B.Tech",
+    "preference": {"preferred_job_roles": ["data scientist"], "preferred_sectors": ["technology"]},
+}
+
+def _recommender(backend, **cfg):
+    return Recommender(RecommenderConfig(**cfg), backend=backend)
+
+def _ranking(result):
+    return [(r["internship"]["id"], r["score"]) for r in result["recommendations"]]
+
+@pytest.mark.parametrize("top_k", [1, 3, 5, 8, 40])
+@pytest.mark.parametrize("preference", [
+    STUDENT["preference"],
+    {},
+    {"work_mode": "hybrid"},
+])
+def test_pruned_ranking_equals_full_scoring(sqlite_ranking_catalog, top_k, preference):
+    student = {**STUDENT, "preference": preference}
+    pruned = _recommender(sqlite_ranking_catalog, prune_ranking=True).recommend_internships(student, top_k=top_k)
+    full = _recommender(sqlite_ranking_catalog, prune_ranking=False).recommend_internships(student, top_k=top_k)
+    assert _ranking(pruned) == _ranking(full)
+    assert len(pruned["recommendations"]) == min(top_k, pruned["total_found"])
+
+def test_tied_group_straddles_the_cut_off(sqlite_ranking_catalog):
+    full = _recommender(sqlite_ranking_catalog, prune_ranking=False).recommend_internships(STUDENT, top_k=40)
+    ranking = _ranking(full)
+    tied = [i for i, (iid, _) in enumerate(ranking) if iid.startswith("t")]
+    assert len({ranking[i][1] for i in tied}) == 1  # identical internships score the same
+    cut = tied[0] + 2  # a top_k ending inside the tied group
+    pruned = _recommender(sqlite_ranking_catalog, prune_ranking=True).recommend_internships(STUDENT, top_k=cut)
+    assert _ranking(pruned) == ranking[:cut]
+    assert pruned["pruned_candidates"] > 0  # the bound did skip work
+
+def test_uses_mongo_is_resolved_once_per_backend(monkeypatch, sqlite_catalog):
+    recommender = Recommender(backend=sqlite_catalog)
+    calls = []
+    catalog = recommender._catalog
+    monkeypatch.setattr(recommender, "_catalog", lambda: calls.append(1) or catalog())
+    assert recommender.uses_mongo is False
+    assert recommender.uses_mongo is False
+    assert len(calls) == 1
+    recommender.backend = DatabaseManager("mongodb://localhost:1")
+    assert recommender.uses_mongo is True
@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+
+from app.semantic import TfidfIndex
+from tests.conftest import CATALOG
+
+STUDENT = {"job_role": "data scientist", "sector": "technology", "skills": ["python", "sql"], "interests": ["analytics"]}
+
+@pytest.fixture
+def index():
+    return TfidfIndex.fit(CATALOG + [{"title": "no id"}])
+
+def test_fit_skips_documents_without_id(index):
+    assert index.ids == [d["id"] for d in CATALOG]
+    assert index.matrix.shape[0] == len(CATALOG)
+
+def test_save_load_round_trip(index, tmp_path):
+    index.save(str(tmp_path / "tfidf"))
+    loaded = TfidfIndex.load(str(tmp_path / "tfidf"))
+
+    assert loaded.ids == index.ids
+    assert (loaded.matrix != index.matrix).nnz == 0
+    assert loaded.vectorizer.vocabulary_ == index.vectorizer.vocabulary_
+    assert loaded.similarities(STUDENT, CATALOG) == index.similarities(STUDENT, CATALOG)
+
+def test_similarities_follow_the_shortlist_order(index):
+    forward = dict(zip([d["id"] for d in CATALOG], index.similarities(STUDENT, CATALOG)))
+    shuffled = list(reversed(CATALOG))
+    backward = dict(zip([d["id"] for d in shuffled], index.similarities(STUDENT, shuffled)))
+
+    assert forward == backward
+    assert forward["i1"] > forward["i5"]
+
+def test_unknown_internships_are_vectorized_in_place(index):
+    copy = dict(CATALOG[0], id="new")
+    sims = index.similarities(STUDENT, [CATALOG[4], copy, CATALOG[0]])
+
+    assert sims[1] == pytest.approx(sims[2])
+    assert sims[0] < sims[2]
+
+def test_no_shared_terms_scores_zero(index):
+    assert index.similarities({"skills": ["zzz"]}, CATALOG[:2]) == [0.0, 0.0]
+    assert np.all(np.asarray(index.similarities(STUDENT, CATALOG)) <= 1.0)
@@ -0,0 +1,70 @@
+import asyncio
+
+import pytest
+
+from app.singleflight import SingleFlight
+
+pytestmark = pytest.mark.anyio
+
+def _gated(result=None, error=None):
+    """fn for do(): counts calls and finishes once `gate` is set."""
+    state = {"calls": 0, "gate": asyncio.Event()}
+
+    async def fn():
+        state["calls"] += 1
+        await state["gate"].wait()
+        if error is not None:
+            raise error
+        return result
+    return fn, state
+
+async def _all_waiting(flight, n):
+    while flight.stats()["executions"] + flight.stats()["coalesced"] < n:
+        await asyncio.sleep(0)
+
+async def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight()
+    fn, state = _gated(result={"ok": 1})
+    calls = [asyncio.create_task(flight.do("k", fn)) for _ in range(10)]
+    await _all_waiting(flight, 10)
+    state["gate"].set()
+    results = await asyncio.gather(*calls)
+    assert state["calls"] == 1
+    assert all(value is results[0][0] for value, _ in results)
+    assert [shared for _, shared in results] == [False] + [True] * 9
+    assert flight.stats() == {"in_flight": 0, "executions": 1, "coalesced": 9, "max_waiters": 10}
+
+async def test_exception_reaches_every_caller_once_raised():
+    flight = SingleFlight()
+    fn, state = _gated(error=RuntimeError("boom"))
+    calls = [asyncio.create_task(flight.do("k", fn)) for _ in range(5)]
+    await _all_waiting(flight, 5)
+    state["gate"].set()
+    results = await asyncio.gather(*calls, return_exceptions=True)
+    assert state["calls"] == 1
+    assert all(isinstance(r, RuntimeError) and str(r) == "boom" for r in results)
+    # nothing is cached: the next call runs again
+    fn2, state2 = _gated(result=2)
+    state2["gate"].set()
+    assert await flight.do("k", fn2) == (2, False)
+
+async def test_different_keys_do_not_coalesce():
+    flight = SingleFlight()
+    fn, state = _gated(result=1)
+    state["gate"].set()
+    await asyncio.gather(flight.do("a", fn), flight.do("b", fn))
+    assert state["calls"] == 2
+
+async def test_cancelled_waiter_does_not_cancel_the_shared_execution():
+    flight = SingleFlight()
+    fn, state = _gated(result="done")
+    first = asyncio.create_task(flight.do("k", fn))
+    second = asyncio.create_task(flight.do("k", fn))
+    await _all_waiting(flight, 2)
+    first.cancel()  # the caller that started the execution goes away
+    with pytest.raises(asyncio.CancelledError):
+        await first
+    assert flight.stats()["in_flight"] == 1
+    state["gate"].set()
+    assert await second == ("done", True)
+    assert state["calls"] == 1
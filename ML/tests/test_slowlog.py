@@ -0,0 +1,11 @@
+import os
+
+from app.slowlog import SlowRequestRecorder, list_bundles
+
+def test_bundle_file_name_keeps_only_safe_request_id_characters(tmp_path):
+    recorder = SlowRequestRecorder(threshold_ms=0, directory=str(tmp_path / "slow"))
+    bundle = {"request_id": "../../etc/passwd x?*", "catalog": {}, "tiers": [], "latency_ms": 1.0}
+    path = recorder._write(bundle)
+    assert os.path.dirname(path) == str(tmp_path / "slow")
+    assert os.path.basename(path).endswith("-______etc_passwd_x__.json")
+    assert list_bundles(str(tmp_path / "slow")) == [path]
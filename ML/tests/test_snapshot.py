@@ -0,0 +1,68 @@
+import os
+
+import pytest
+
+from app.database import nearest_filter_predicate
+from app.preprocessing import calculate_distance_km
+from app.snapshot import CURRENT_FILE, CatalogSnapshot, build_snapshot, get_catalog_snapshot, open_current
+from tests.conftest import LAT, LON, RANKING_CATALOG
+from tests.test_storage import PREFERENCES
+
+@pytest.fixture
+def root(tmp_path):
+    path = str(tmp_path / "snapshots")
+    build_snapshot([dict(d) for d in RANKING_CATALOG], path, version="1")
+    return path
+
+@pytest.fixture
+def snapshot(root):
+    return open_current(root)
+
+def _km(doc, lat, lon):
+    return calculate_distance_km(lat, lon, doc["location"]["lat"], doc["location"]["lon"])
+
+@pytest.mark.parametrize("preference", PREFERENCES)
+@pytest.mark.parametrize("radius_km", [3, 50, None])
+def test_nearest_matches_filter_semantics(snapshot, preference, radius_km):
+    accept = nearest_filter_predicate(preference)
+    docs = snapshot.find_nearest_internships(LAT, LON, preference, n=100, max_distance_km=radius_km)
+    expected = {d["id"] for d in RANKING_CATALOG if accept(d) and (radius_km is None or _km(d, LAT, LON) <= radius_km)}
+    assert {d["id"] for d in docs} == expected
+    distances = [round(_km(d, LAT, LON), 9) for d in docs]  # equidistant pairs differ in the last bits
+    assert distances == sorted(distances)
+    assert [d["id"] for d in snapshot.find_nearest_internships(LAT, LON, preference, n=2,
+                                                               max_distance_km=radius_km)] == [d["id"] for d in docs[:2]]
+
+def test_documents_round_trip_and_by_ids(snapshot):
+    assert snapshot.get_collection_count() == len(RANKING_CATALOG)
+    ids = ["t3", "missing", "i2", "r07"]
+    docs = snapshot.find_internships_by_ids(ids)
+    assert [d["id"] for d in docs] == ["t3", "i2", "r07"]
+    originals = {d["id"]: d for d in RANKING_CATALOG}
+    for doc in docs:
+        assert doc == originals[doc["id"]]
+    accept = nearest_filter_predicate({"sector": "technology"})
+    assert [accept(d) for d in docs] == [True, False, False]  # Technology, IT & Software, Healthcare
+
+def test_rebuild_swaps_current_and_prunes_the_oldest(root, monkeypatch):
+    import app.snapshot as snapshot_module
+
+    monkeypatch.setattr(snapshot_module, "SNAPSHOT_ROOT", root)
+    monkeypatch.setattr(snapshot_module, "SNAPSHOT_CHECK_SECONDS", 0.0)
+    monkeypatch.setattr(snapshot_module, "_snapshot", None)
+    first = get_catalog_snapshot()
+    assert first.version == "1"
+
+    build_snapshot([dict(d) for d in RANKING_CATALOG[:10]], root, version="2", keep=2)
+    with open(os.path.join(root, CURRENT_FILE)) as f:
+        assert f.read() == "v2"
+    second = get_catalog_snapshot()
+    assert second.version == "2" and second.count == 10
+    assert len(first.find_internships_by_ids(["t0"])) == 1  # the old instance stays readable
+
+    build_snapshot([dict(d) for d in RANKING_CATALOG[:5]], root, version="3", keep=2)
+    assert sorted(d for d in os.listdir(root) if d.startswith("v")) == ["v2", "v3"]
+    assert open_current(root).count == 5
+    with pytest.raises(FileExistsError):
+        build_snapshot([], root, version="3")
+    assert isinstance(CatalogSnapshot(os.path.join(root, "v2")), CatalogSnapshot)
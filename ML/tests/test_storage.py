@@ -0,0 +1,37 @@
+import math
+
+import pytest
+
+from app.database import nearest_filter_predicate
+from tests.conftest import CATALOG, LAT, LON
+
+PREFERENCES = [
+    {},
+    {"sector": "technology"},
+    {"sector": "Technology", "preferred_sectors": ["it & software"]},
+    {"preferred_job_roles": ["DATA ANALYST", "data scientist"]},
+    {"work_mode": "Remote"},
+    {"work_mode": "onsite"},
+    {"skills": ["SQL"]},
+    {"min_duration_months": 3},
+    {"sector": "technology", "skills": ["python"], "work_mode": "hybrid", "min_duration_months": 3},
+]
+
+def _km(doc):
+    loc = doc["location"]
+    dlat, dlon = math.radians(loc["lat"] - LAT), math.radians(loc["lon"] - LON)
+    a = math.sin(dlat / 2) ** 2 + math.cos(math.radians(LAT)) * math.cos(math.radians(loc["lat"])) * math.sin(dlon / 2) ** 2
+    return 2 * 6371.0 * math.asin(math.sqrt(a))
+
+@pytest.mark.parametrize("preference", PREFERENCES)
+def test_sqlite_nearest_matches_filter_semantics(sqlite_catalog, preference):
+    accept = nearest_filter_predicate(preference)
+    expected = [d["id"] for d in sorted(CATALOG, key=_km) if _km(d) <= 50 and accept(d)]
+    docs = sqlite_catalog.find_nearest_internships(LAT, LON, preference, n=50, max_distance_km=50)
+    assert [d["id"] for d in docs] == expected
+
+def test_sqlite_nearest_limits_and_unbounded_radius(sqlite_catalog):
+    assert [d["id"] for d in sqlite_catalog.find_nearest_internships(LAT, LON, {}, n=2)] == \
+        [d["id"] for d in sorted(CATALOG, key=_km)[:2]]
+    far = sqlite_catalog.find_nearest_internships(LAT, LON, {"sector": "technology", "work_mode": "hybrid"}, n=50)
+    assert [d["id"] for d in far] == ["i1", "i6"]
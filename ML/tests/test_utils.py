@@ -0,0 +1,21 @@
+import logging
+
+from app.utils import DEFAULT_CONFIG, _SamplingFilter, _parse_sampling
+
+def _record(name, level=logging.INFO):
+    return logging.LogRecord(name, level, __file__, 1, "msg", None, None)
+
+def test_default_sampling_only_touches_per_call_loggers():
+    sampler = _SamplingFilter(_parse_sampling(DEFAULT_CONFIG["log_sampling"]))
+    assert sampler._rate("app.database.query") == 0.1
+    assert sampler._rate("app.recommender.tiers") == 0.1
+    # module-level lines (connects, index builds, startup) are never sampled
+    assert sampler._rate("app.database") == 1.0
+    assert sampler._rate("app.recommender") == 1.0
+    assert sampler._rate("app.databases") == 1.0
+
+def test_sampling_never_drops_warnings():
+    sampler = _SamplingFilter({"app.database.query": 0.0})
+    assert not sampler.filter(_record("app.database.query"))
+    assert sampler.filter(_record("app.database.query", logging.WARNING))
+    assert sampler.filter(_record("app.database"))